@@ -1,24 +1,46 @@
 import pygame
 
 from constants import BOARD_SIZE, SQUARE_SIZE
-from chesslib.utils import BoardCoordinates, Color, get_opponent
+from chesslib.utils import BoardCoordinates, Color, SQUARES, get_opponent
+from chesslib.analysis import Analyser
 from chesslib.board import Board
+from chesslib.chess_move import ChessMove
+from chesslib.engine import SearchResult
+from chesslib.events import Event
 from chesslib.piece import Piece
+from chesslib.termination import Termination
 
 
 class ChessUI:
-    def __init__(self, screen: pygame.display):
-        self.board = Board()
+    def __init__(self, screen: pygame.display, board: Board | None = None, analyser: Analyser | None = None):
+        self.board = board if board is not None else Board()
         self.screen = screen
         self.icons: dict[str, pygame.image] = {}
 
         self.selected_position = None
         self.highlighted: list[BoardCoordinates] = []
         self.check: BoardCoordinates | None = None
-
+        self.game_over = False
+        self.board.subscribe(Event.MOVE_MADE, self._on_move)
+        self.board.subscribe(Event.CHECK, self._on_check)
+        self.board.subscribe(Event.CHECKMATE, self._on_checkmate)
+        self.board.subscribe(Event.DRAW, self._on_draw)
+
+        # The empty board is drawn once; squares are redrawn from it as pieces and highlights change
+        self.background = self._render_background()
+        self.drawn: list[tuple[str | None, str | None] | None] = []
+        self.invalidate()
         self.load_images()
 
+        # Engine analysis of the current position runs in the background and is collected every frame
+        self.analyser = analyser
+        self.analysis: SearchResult | None = None
+        if analyser is not None:
+            analyser.analyse(self.board)
+
     def click(self, x: int, y: int):
+        if self.game_over:
+            return
         clicked_position = BoardCoordinates(y // SQUARE_SIZE, x // SQUARE_SIZE)
         clicked_piece = self.board.get_piece_at(clicked_position)
         if self.selected_position is None:
@@ -31,55 +53,71 @@ class ChessUI:
         if self.board.move(self.selected_position, clicked_position):
             self.selected_position = None
             self.highlighted = []
-            self.check = None
-            if self.board.check_validator(self.board.current_player):
-                self.check = self.board.find_piece("K", self.board.current_player)
-
-            if self.board.is_checkmate(self.board.current_player):
-                print("Checkmate! Game Over.")
 
     def suggest_moves(self, pos: BoardCoordinates):
-        piece = self.board.get_piece_at(pos)
-        possible_moves = piece.possible_moves(pos)
-        self._highlight_all(list(map(lambda x: x.end, possible_moves)))
+        legal_moves = self.board.iter_legal_moves(pos)
+        self._highlight_all(list(map(lambda x: x.end, legal_moves)))
 
-    def draw_game(self):
-        self.draw_squares()
-        self.draw_highlighted()
-        self.draw_pieces()
+    @property
+    def analysing(self) -> bool:
+        return self.analyser is not None and self.analyser.busy
 
-    def draw_squares(self):
-        colors = [pygame.Color("white"), pygame.Color("gray")]
-        for row in range(BOARD_SIZE):
-            for col in range(BOARD_SIZE):
-                square_color = colors[(row + col) % 2]
-                pygame.draw.rect(self.screen, square_color, pygame.Rect(row * SQUARE_SIZE, col * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
-
-    def draw_highlighted(self):
-        for h in self.highlighted:
-            x = h.col * SQUARE_SIZE
-            y = h.row * SQUARE_SIZE
-            pygame.draw.rect(self.screen, "dark green", pygame.Rect(x, y, SQUARE_SIZE, SQUARE_SIZE))
+    def update_analysis(self):
+        """Take in the analysis results that arrived since the last frame, without waiting for any"""
+        if self.analyser is None:
+            return
+        updates = self.analyser.poll()
+        if updates:
+            self.analysis = updates[-1].result
+            pygame.display.set_caption(f"{self.analysis.move} ({self.analysis})")
 
+    def draw_game(self):
+        """Redraw the whole board"""
+        self.invalidate()
+        self.render()
+
+    def render(self) -> list[pygame.Rect]:
+        """
+        Redraw only the squares whose piece or highlight changed since they were last drawn, from the cached
+        board background. Returns the rectangles drawn, for `pygame.display.update`.
+        """
+        overlays = {}
+        if self.analysis is not None and self.analysis.move is not None:
+            overlays = dict.fromkeys((self.analysis.move.start, self.analysis.move.end), "light blue")
+        overlays.update(dict.fromkeys(self.highlighted, "dark green"))
         if self.check is not None:
-            x = self.check.col * SQUARE_SIZE
-            y = self.check.row * SQUARE_SIZE
-            pygame.draw.rect(self.screen, "red", pygame.Rect(x, y, SQUARE_SIZE, SQUARE_SIZE))
-
-    def draw_pieces(self):
+            overlays[self.check] = "red"
+
+        dirty = []
+        for square in SQUARES:
+            piece = self.board.get_piece_at(square)
+            look = (overlays.get(square), None if piece is None else self._get_piece_name(piece))
+            if self.drawn[square.index] == look:
+                continue
+
+            self.drawn[square.index] = look
+            rect = pygame.Rect(square.col * SQUARE_SIZE, square.row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+            self.screen.blit(self.background, rect, rect)
+            overlay, icon = look
+            if overlay is not None:
+                pygame.draw.rect(self.screen, overlay, rect)
+            if icon is not None:
+                self.screen.blit(self.icons[icon], rect)
+            dirty.append(rect)
+        return dirty
+
+    def invalidate(self):
+        """Have the next `render` redraw every square, e.g. after the window was covered"""
+        self.drawn = [None] * (BOARD_SIZE * BOARD_SIZE)
+
+    def _render_background(self) -> pygame.Surface:
+        background = pygame.Surface((BOARD_SIZE * SQUARE_SIZE, BOARD_SIZE * SQUARE_SIZE))
+        colors = [pygame.Color("white"), pygame.Color("gray")]
         for row in range(BOARD_SIZE):
             for col in range(BOARD_SIZE):
-                self.draw_piece(row, col)
-
-    def draw_piece(self, row: int, col: int):
-        x = col * SQUARE_SIZE
-        y = row * SQUARE_SIZE
-
-        piece = self.board.get_piece_at(BoardCoordinates(row, col))
-        if piece is None:
-            return
-
-        self.screen.blit(self.icons[self._get_piece_name(piece)], pygame.Rect(x, y, SQUARE_SIZE, SQUARE_SIZE))
+                square_color = colors[(row + col) % 2]
+                pygame.draw.rect(background, square_color, pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+        return background
 
     def load_images(self):
         color = ["white", "black"]
@@ -89,6 +127,25 @@ class ChessUI:
             for p in piece:
                 self.icons[c + p] = pygame.image.load(f"img/{c}{p}.png")
 
+    def _on_move(self, board: Board, move: ChessMove, movetext: str):
+        # Any check is raised after the move, so the old highlight is cleared first
+        self.check = None
+        self.analysis = None
+        if self.analyser is not None:
+            self.analyser.analyse(board)
+
+    def _on_check(self, board: Board, player: Color):
+        self.check = board.find_piece("K", player)
+
+    def _on_checkmate(self, board: Board, player: Color):
+        self.game_over = True
+
+    def _on_draw(self, board: Board, termination: Termination):
+        self.game_over = True
+        self.selected_position = None
+        self.highlighted = []
+        pygame.display.set_caption(f"Draw by {termination.value}")
+
     def _set_piece(self, pos: BoardCoordinates):
         self.selected_position = pos
         self.highlighted = []
@@ -1,29 +1,59 @@
+import argparse
+
 import pygame
 
 from constants import SCREEN_WIDTH, SCREEN_HEIGHT
 from ChessUI import ChessUI
+from chesslib.analysis import Analyser
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.events import print_events
 
 def main():
+    parser = argparse.ArgumentParser(description="Play chess")
+    parser.add_argument("--bitboard", action="store_true", help="use the bitboard backend")
+    parser.add_argument("--fps", type=int, default=30, help="most frames drawn per second")
+    parser.add_argument("--analyse", type=float, metavar="SECONDS",
+                        help="show the engine's best move, searching each position for this long in the background")
+    args = parser.parse_args()
+
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    # Only these events wake the loop, so mouse movement over an idle board costs nothing
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed([pygame.QUIT, pygame.MOUSEBUTTONUP, pygame.WINDOWEXPOSED])
+    clock = pygame.time.Clock()
     running = True
 
-    player_pos = pygame.Vector2(screen.get_width() / 2, screen.get_height() / 2)
-    game = ChessUI(screen)
+    board = BitBoard() if args.bitboard else Board()
+    print_events(board)
+    analyser = None if args.analyse is None else Analyser(time_limit=args.analyse)
+    game = ChessUI(screen, board, analyser)
+    pygame.display.update(game.render())
 
     while running:
-        for event in pygame.event.get():
+        # Sleep until something happens, then handle everything that did. While the engine is
+        # working, wake up every frame to collect its results.
+        timeout = 1000 // args.fps if game.analysing else 0
+        for event in [pygame.event.wait(timeout)] + pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
 
             if event.type == pygame.MOUSEBUTTONUP:
-                x, y = pygame.mouse.get_pos()
+                x, y = event.pos
                 game.click(x, y)
 
-        game.draw_game()
+            if event.type == pygame.WINDOWEXPOSED:
+                game.invalidate()
 
-        pygame.display.flip()
+        game.update_analysis()
+        dirty = game.render()
+        if dirty:
+            pygame.display.update(dirty)
+        clock.tick(args.fps)
 
+    if analyser is not None:
+        analyser.close()
     pygame.quit()
 
 
@@ -0,0 +1,111 @@
+import multiprocessing
+import queue
+
+from .engine import Searcher, SearchResult, TranspositionTable, DEFAULT_TABLE_SIZE
+from .board import Board
+from .bitboard import BitBoard
+
+BACKENDS = {"board": Board, "bitboard": BitBoard}
+# Request id meaning nothing is being analysed
+IDLE = 0
+
+
+class AnalysisUpdate:
+    """One iteration's result for an analysis request; the last update for a request is `final`"""
+    def __init__(self, request: int, result: SearchResult, final: bool):
+        self.request = request
+        self.result = result
+        self.final = final
+
+    def __str__(self):
+        return f"request {self.request}{' final' if self.final else ''}: {self.result}"
+
+
+def _analysis_worker(requests, updates, current, backend: str, table_size: int):
+    """Search each requested position until it is done or `current` moves on to another request"""
+    board = BACKENDS[backend]()
+    searcher = Searcher(board, TranspositionTable(table_size))
+    while True:
+        request = requests.get()
+        if request is None:
+            return
+        request_id, fen, depth, time_limit = request
+        if current.value != request_id:
+            # Superseded before it was started
+            continue
+
+        board.load(fen)
+        searcher.should_stop = lambda: current.value != request_id
+        result = searcher.search(depth, time_limit,
+                                 on_iteration=lambda r: updates.put(AnalysisUpdate(request_id, r, False)))
+        updates.put(AnalysisUpdate(request_id, result, True))
+
+
+class Analyser:
+    """
+    Searches positions in a background process, so a UI keeps drawing while the engine runs at full speed.
+    `analyse` submits a position, superseding any earlier one, and `poll` returns the results streamed back
+    since the last call, one per completed iteration; results for superseded positions are dropped.
+    """
+    def __init__(self, depth: int | None = None, time_limit: float | None = None, backend: str = "bitboard",
+                 table_size: int = DEFAULT_TABLE_SIZE):
+        self.depth = depth
+        self.time_limit = time_limit
+        # Spawned rather than forked, as the parent is usually a UI with a display connection open
+        context = multiprocessing.get_context("spawn")
+        self.requests = context.Queue()
+        self.updates = context.Queue()
+        self.current = context.Value("l", IDLE, lock=False)
+        self.last_request = IDLE
+        self.pending = False
+        self.process = context.Process(target=_analysis_worker, daemon=True,
+                                       args=(self.requests, self.updates, self.current, backend, table_size))
+        self.process.start()
+
+    @property
+    def busy(self) -> bool:
+        """Whether the latest request has not sent its final result yet"""
+        return self.pending
+
+    def analyse(self, board) -> int:
+        """Start analysing the position on `board`, cancelling any earlier request. Returns the request id."""
+        self.last_request += 1
+        self.current.value = self.last_request
+        self.pending = True
+        self.requests.put((self.last_request, board.fen(), self.depth, self.time_limit))
+        return self.last_request
+
+    def cancel(self):
+        """Stop the running search at its next clock check; its results are no longer returned"""
+        self.current.value = IDLE
+        self.pending = False
+
+    def poll(self, timeout: float = 0) -> list[AnalysisUpdate]:
+        """Results of the current request received so far, waiting up to `timeout` seconds for the first one"""
+        received = []
+        try:
+            if timeout > 0:
+                received.append(self.updates.get(timeout=timeout))
+            while True:
+                received.append(self.updates.get_nowait())
+        except queue.Empty:
+            pass
+
+        current = self.current.value
+        received = [u for u in received if u.request == current]
+        if any(u.final for u in received):
+            self.pending = False
+        return received
+
+    def close(self):
+        self.cancel()
+        self.requests.put(None)
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
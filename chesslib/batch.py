@@ -0,0 +1,159 @@
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, TextIO
+
+from .constants import InvalidFEN
+from .utils import Color, get_opponent
+from .board import Board
+from .bitboard import BitBoard
+
+BACKENDS = {"board": Board, "bitboard": BitBoard}
+DEFAULT_CHUNK_SIZE = 256
+# Chunks queued per worker; together with the chunk size this bounds how many positions are in memory
+CHUNKS_PER_WORKER = 2
+
+RESULT_FIELDS = ("index", "id", "fen", "valid", "error", "check", "checkmate", "stalemate", "legal_moves")
+
+# Board reused for every position a worker process analyses, by backend name
+_worker_boards = {}
+
+
+def epd_to_fen(line: str) -> tuple[str, str | None]:
+    """
+    Split an EPD or FEN line into a FEN and the EPD `id` operation, if any.
+    EPD lines have no move counters, so default ones are added.
+    """
+    fields = line.split(None, 4)
+    if len(fields) < 4:
+        return line, None
+
+    rest = fields[4] if len(fields) > 4 else ""
+    counters = rest.split()[:2]
+    if len(counters) == 2 and all(c.isdigit() for c in counters):
+        return " ".join(fields[:4] + counters), None
+
+    position_id = None
+    for operation in rest.split(";"):
+        opcode, _, operand = operation.strip().partition(" ")
+        if opcode == "id":
+            position_id = operand.strip().strip('"')
+    return " ".join(fields[:4]) + " 0 1", position_id
+
+
+def analyse(board, fen: str) -> dict:
+    """Load `fen` into `board` and report whether it is legal, and whether the side to move is in check or mated"""
+    result = {"fen": fen, "valid": False, "error": None, "check": None, "checkmate": None,
+              "stalemate": None, "legal_moves": None}
+    try:
+        board.load(fen)
+    except InvalidFEN as e:
+        result["error"] = str(e)
+        return result
+
+    kings = {Color.WHITE: 0, Color.BLACK: 0}
+    for _, piece in board.items():
+        if piece.abbreviation == "K":
+            kings[piece.color] += 1
+    if kings[Color.WHITE] != 1 or kings[Color.BLACK] != 1:
+        result["error"] = "each side needs exactly one king"
+        return result
+
+    player = board.current_player
+    if board.check_validator(get_opponent(player)):
+        result["error"] = "side not to move is in check"
+        return result
+
+    check = board.check_validator(player)
+    moves = len(board.legal_moves())
+    result.update(valid=True, check=check, checkmate=check and moves == 0, stalemate=not check and moves == 0,
+                  legal_moves=moves)
+    return result
+
+
+def _analyse_chunk(backend: str, chunk: list[tuple[int, str]]) -> list[dict]:
+    board = _worker_boards.get(backend)
+    if board is None:
+        board = _worker_boards[backend] = BACKENDS[backend]()
+
+    results = []
+    for index, line in chunk:
+        fen, position_id = epd_to_fen(line)
+        result = analyse(board, fen)
+        result["index"] = index
+        result["id"] = position_id
+        results.append(result)
+    return results
+
+
+def read_positions(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """Number the non-blank, non-comment lines of a FEN/EPD file, reading it lazily"""
+    for index, line in enumerate(lines):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield index, line
+
+
+def analyse_positions(lines: Iterable[str], workers: int | None = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      backend: str = "bitboard") -> Iterator[dict]:
+    """
+    Analyse every position in `lines`, yielding results in input order. Positions are sent to `workers`
+    processes in chunks, and only a few chunks per worker are read ahead, so memory stays bounded.
+    """
+    positions = read_positions(lines)
+    chunks = iter(lambda: list(islice(positions, chunk_size)), [])
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for chunk in chunks:
+            yield from _analyse_chunk(backend, chunk)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_analyse_chunk, backend, chunk))
+            if len(pending) >= workers * CHUNKS_PER_WORKER:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_jsonl(results: Iterable[dict], output: TextIO):
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+
+
+def write_csv(results: Iterable[dict], output: TextIO):
+    writer = csv.DictWriter(output, RESULT_FIELDS)
+    writer.writeheader()
+    writer.writerows(results)
+
+
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check legality, check and mate for every position in a FEN/EPD file")
+    parser.add_argument("input", help="FEN or EPD file, one position per line, or - for stdin")
+    parser.add_argument("-o", "--output", help="result file, stdout by default")
+    parser.add_argument("--format", choices=WRITERS, default="jsonl")
+    parser.add_argument("--workers", type=int, help="worker processes, one per CPU by default")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="positions sent to a worker at once")
+    parser.add_argument("--backend", choices=BACKENDS, default="bitboard")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output is None else open(args.output, "w", newline="")
+    with source, output:
+        results = analyse_positions(source, args.workers, args.chunk_size, args.backend)
+        WRITERS[args.format](results, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import struct
+from typing import Sequence
+
+from .constants import BOARD_SIZE
+from .utils import Color, BoardCoordinates
+
+# A position packs into 32 bytes, little-endian:
+#   occupancy   8 bytes, bit `row * 8 + col` set for every occupied square
+#   pieces     16 bytes, a 4-bit piece index (`color.value * 6 + kind`) per occupied square, in square order
+#   flags       1 byte, bit 0 set when black is to move, bits 1-4 the castling rights in FEN order (KQkq)
+#   en passant  1 byte, file of the en passant square plus one, or 0 for none
+#   halfmove clock and fullmove number, 2 bytes each, then 2 reserved zero bytes
+POSITION_FORMAT = struct.Struct("<Q16sBBHH2x")
+POSITION_SIZE = POSITION_FORMAT.size
+MAX_PIECES = 32
+CASTLING_SYMBOLS = "KQkq"
+
+# Lookup tables for unpacking a byte at a time: the squares set in each occupancy byte, and both nibbles of a byte
+BYTE_SQUARES = [[tuple(offset * 8 + bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+                for offset in range(8)]
+NIBBLES = [(byte & 0xF, byte >> 4) for byte in range(256)]
+
+
+def castling_bits(castling: str) -> int:
+    return sum(1 << i for i, symbol in enumerate(CASTLING_SYMBOLS) if symbol in castling)
+
+
+def castling_symbols(bits: int) -> str:
+    return "".join(symbol for i, symbol in enumerate(CASTLING_SYMBOLS) if bits >> i & 1)
+
+
+def pack_position(mailbox: Sequence[int | None], player: Color, castling: int, en_passant: BoardCoordinates | None,
+                  halfmove_clock: int, fullmove_number: int) -> bytes:
+    """Pack the piece index (or `None`) on each square, numbered `row * 8 + col`, and the game state"""
+    occupancy = 0
+    codes = []
+    for square, piece in enumerate(mailbox):
+        if piece is not None:
+            occupancy |= 1 << square
+            codes.append(piece)
+    if len(codes) > MAX_PIECES:
+        raise ValueError(f"cannot pack more than {MAX_PIECES} pieces")
+
+    codes += [0] * (MAX_PIECES - len(codes))
+    pieces = bytes(codes[i] | codes[i + 1] << 4 for i in range(0, MAX_PIECES, 2))
+    flags = (player == Color.BLACK) | castling << 1
+    return POSITION_FORMAT.pack(occupancy, pieces, flags, 0 if en_passant is None else en_passant.col + 1,
+                                halfmove_clock, fullmove_number)
+
+
+def unpack_position(data, offset: int = 0) -> tuple[list[tuple[int, int]], Color, int, BoardCoordinates | None, int, int]:
+    """
+    Unpack a position packed by `pack_position` from `data` at `offset`. `data` can be any buffer,
+    such as a `memoryview` over a memory-mapped file; nothing is copied out of it but the 32 bytes read.
+    Returns `(square, piece index)` pairs and the game state.
+    """
+    occupancy, pieces, flags, en_passant_file, halfmove_clock, fullmove_number = POSITION_FORMAT.unpack_from(data, offset)
+    if occupancy.bit_count() > MAX_PIECES:
+        raise ValueError(f"more than {MAX_PIECES} occupied squares")
+    return (_pieces(occupancy, pieces), Color.BLACK if flags & 1 else Color.WHITE, flags >> 1 & 0xF,
+            _en_passant_square(flags & 1, en_passant_file), halfmove_clock, fullmove_number)
+
+
+def _pieces(occupancy: int, pieces: bytes) -> list[tuple[int, int]]:
+    squares = []
+    for offset, byte in enumerate(occupancy.to_bytes(8, "little")):
+        if byte:
+            squares += BYTE_SQUARES[offset][byte]
+    codes = []
+    for byte in pieces[:(len(squares) + 1) // 2]:
+        codes += NIBBLES[byte]
+    if codes and max(codes[:len(squares)]) >= 12:
+        raise ValueError("bad piece index")
+    return list(zip(squares, codes))
+
+
+def _en_passant_square(black_to_move: int, en_passant_file: int) -> BoardCoordinates | None:
+    """The en passant square is behind a pawn that just moved two squares, so the side to move fixes its rank"""
+    if en_passant_file == 0:
+        return None
+    if en_passant_file > BOARD_SIZE:
+        raise ValueError(f"bad en passant file {en_passant_file}")
+    return BoardCoordinates(5 if black_to_move else 2, en_passant_file - 1)
@@ -0,0 +1,632 @@
+from typing import Iterable, Iterator
+
+from .constants import INIT_FEN, BOARD_SIZE, GAME_BOARD, OutOfBoundsError, NotYourTurn, InvalidFEN
+from .utils import Color, BoardCoordinates, SQUARES, get_opponent
+from .chess_move import MoveType, ChessMove, SQUARE_MASK, TYPE_SHIFT, PROMOTION_SHIFT, PIECE_ABBREVIATIONS
+from chesslib.piece import generate_piece, Piece
+from .fen import iter_placement, parse_fields, format_fen
+from .pgn import san
+from .events import Event, EventSource, IllegalMoveReason
+from .termination import GameStatus
+from .binary import pack_position, unpack_position, castling_bits
+from .zobrist import PIECE_KEYS, EN_PASSANT_KEYS, CASTLING_RIGHTS_KEYS, BLACK_TO_MOVE_KEY
+from .evaluation import PIECE_SQUARE_SCORES, pawn_key
+
+# Squares are numbered row * 8 + col, so square 0 is A8 and square 63 is H1.
+# Bitboards are indexed by `color.value * 6 + kind`: black pieces are 0-5, white pieces 6-11.
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PIECE_SYMBOLS = "pnbrqkPNBRQK"
+PIECE_INDEXES = {symbol: index for index, symbol in enumerate(PIECE_SYMBOLS)}
+
+# Moves are handled as the packed ints behind `ChessMove`
+TYPE_MASK = 0x7 << TYPE_SHIFT
+REGULAR_FLAG = MoveType.REGULAR.value << TYPE_SHIFT
+EN_PASSANT_FLAG = MoveType.EN_PASSANT.value << TYPE_SHIFT
+CASTLING_FLAG = MoveType.CASTLING.value << TYPE_SHIFT
+PROMOTION_FLAG = MoveType.PROMOTION.value << TYPE_SHIFT
+PROMOTION_KINDS = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# Castling rights as bits, in FEN order
+CASTLING_SYMBOLS = "KQkq"
+CASTLE_WHITE_KING, CASTLE_WHITE_QUEEN, CASTLE_BLACK_KING, CASTLE_BLACK_QUEEN = 1, 2, 4, 8
+# Rights kept when a piece moves from or to a square; only the king and rook home squares clear anything
+CASTLING_KEPT = [0xF] * 64
+CASTLING_KEPT[60] = 0xF ^ (CASTLE_WHITE_KING | CASTLE_WHITE_QUEEN)
+CASTLING_KEPT[63] = 0xF ^ CASTLE_WHITE_KING
+CASTLING_KEPT[56] = 0xF ^ CASTLE_WHITE_QUEEN
+CASTLING_KEPT[4] = 0xF ^ (CASTLE_BLACK_KING | CASTLE_BLACK_QUEEN)
+CASTLING_KEPT[7] = 0xF ^ CASTLE_BLACK_KING
+CASTLING_KEPT[0] = 0xF ^ CASTLE_BLACK_QUEEN
+# Rook start and end squares, keyed by the square the castling king lands on
+CASTLING_ROOKS = {62: (63, 61), 58: (56, 59), 6: (7, 5), 2: (0, 3)}
+# Per color value: (right, king start, king end, squares that must be empty, squares that must not be attacked)
+CASTLES = (
+    ((CASTLE_BLACK_KING, 4, 6, 1 << 5 | 1 << 6, (4, 5, 6)),
+     (CASTLE_BLACK_QUEEN, 4, 2, 1 << 1 | 1 << 2 | 1 << 3, (4, 3, 2))),
+    ((CASTLE_WHITE_KING, 60, 62, 1 << 61 | 1 << 62, (60, 61, 62)),
+     (CASTLE_WHITE_QUEEN, 60, 58, 1 << 57 | 1 << 58 | 1 << 59, (60, 59, 58))),
+)
+
+KNIGHT_STEPS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+KING_STEPS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def square_index(location: BoardCoordinates) -> int:
+    return location.index
+
+
+def square_coordinates(square: int) -> BoardCoordinates:
+    return SQUARES[square]
+
+
+def _step_attacks(steps: tuple[tuple[int, int], ...]) -> list[int]:
+    table = []
+    for square in range(64):
+        row, col = divmod(square, BOARD_SIZE)
+        attacks = 0
+        for dr, dc in steps:
+            r, c = row + dr, col + dc
+            if 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE:
+                attacks |= 1 << (r * BOARD_SIZE + c)
+        table.append(attacks)
+    return table
+
+
+def _ray_attacks(square: int, directions: tuple[tuple[int, int], ...], occupancy: int) -> int:
+    """Walk each direction from `square`, stopping on (and including) the first occupied square"""
+    row, col = divmod(square, BOARD_SIZE)
+    attacks = 0
+    for dr, dc in directions:
+        r, c = row + dr, col + dc
+        while 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE:
+            bit = 1 << (r * BOARD_SIZE + c)
+            attacks |= bit
+            if occupancy & bit:
+                break
+            r, c = r + dr, c + dc
+    return attacks
+
+
+def _relevant_mask(square: int, directions: tuple[tuple[int, int], ...]) -> int:
+    """Squares whose occupancy changes the attacks from `square`; the last square of each ray never does"""
+    row, col = divmod(square, BOARD_SIZE)
+    mask = 0
+    for dr, dc in directions:
+        r, c = row + dr, col + dc
+        while 0 <= r + dr < BOARD_SIZE and 0 <= c + dc < BOARD_SIZE:
+            mask |= 1 << (r * BOARD_SIZE + c)
+            r, c = r + dr, c + dc
+    return mask
+
+
+def _slider_tables(directions: tuple[tuple[int, int], ...]) -> tuple[list[int], list[dict[int, int]]]:
+    """
+    Precompute slider attacks for every square and every blocker subset of its relevant mask.
+    This plays the role of magic bitboards: the dict hash replaces the magic multiply and shift.
+    """
+    masks = []
+    tables = []
+    for square in range(64):
+        mask = _relevant_mask(square, directions)
+        table = {}
+        subset = 0
+        while True:
+            table[subset] = _ray_attacks(square, directions, subset)
+            subset = (subset - mask) & mask
+            if subset == 0:
+                break
+        masks.append(mask)
+        tables.append(table)
+    return masks, tables
+
+
+KNIGHT_ATTACKS = _step_attacks(KNIGHT_STEPS)
+KING_ATTACKS = _step_attacks(KING_STEPS)
+# Indexed by color value: black pawns move down the board (increasing row), white pawns up
+PAWN_ATTACKS = (_step_attacks(((1, -1), (1, 1))), _step_attacks(((-1, -1), (-1, 1))))
+ROOK_MASKS, ROOK_TABLES = _slider_tables(ROOK_DIRECTIONS)
+BISHOP_MASKS, BISHOP_TABLES = _slider_tables(BISHOP_DIRECTIONS)
+
+# Rows a pawn lands on after a single push from its home row, and its promotion row, indexed by color value
+DOUBLE_PUSH_ROWS = (0xFF << 16, 0xFF << 40)
+PROMOTION_ROWS = (0xFF << 56, 0xFF)
+FULL_BOARD = (1 << 64) - 1
+
+
+def rook_attacks(square: int, occupancy: int) -> int:
+    return ROOK_TABLES[square][occupancy & ROOK_MASKS[square]]
+
+
+def bishop_attacks(square: int, occupancy: int) -> int:
+    return BISHOP_TABLES[square][occupancy & BISHOP_MASKS[square]]
+
+
+def encode_move(move: ChessMove) -> int:
+    return move.value
+
+
+def decode_move(move: int) -> ChessMove:
+    return ChessMove.from_int(move)
+
+
+def bit_squares(bitboard: int) -> list[int]:
+    squares = []
+    while bitboard:
+        lowest = bitboard & -bitboard
+        squares.append(lowest.bit_length() - 1)
+        bitboard ^= lowest
+    return squares
+
+
+class BitBoard(EventSource, GameStatus):
+    """Board backend storing the position as twelve 64-bit bitboards, with the same interface as `Board`"""
+    def __init__(self, fen: str = INIT_FEN):
+        self.bitboards: list[int] = [0] * 12
+        self.mailbox: list[int | None] = [None] * 64
+        self.occupancy: list[int] = [0, 0]
+        self.current_player: Color = Color.WHITE
+        self.castling_rights: int = 0
+        self.en_passant_square: int | None = None
+        self.hash: int = 0
+        # Packed material and piece-square score of `chesslib.evaluation`, kept up to date like the hash
+        self.psqt: int = 0
+        self.halfmove_clock: int = 0
+        self.fullmove_number: int = 1
+        self.move_stack: list[tuple[int, int | None, int, int | None, int, int, int]] = []
+        # Keys of the positions before each move on the move stack
+        self.positions: list[int] = []
+        self.listeners = {}
+
+        self.load(fen)
+
+    @property
+    def castling(self) -> str:
+        """Castling rights in FEN order, e.g. `KQkq`"""
+        return "".join(s for i, s in enumerate(CASTLING_SYMBOLS) if self.castling_rights >> i & 1)
+
+    @property
+    def pawn_key(self) -> int:
+        """Both sides' pawns as bits, identifying the pawn structure"""
+        return pawn_key(self.bitboards[Color.WHITE.value * 6 + PAWN], self.bitboards[Color.BLACK.value * 6 + PAWN])
+
+    @property
+    def en_passant(self) -> BoardCoordinates | None:
+        if self.en_passant_square is None:
+            return None
+        return square_coordinates(self.en_passant_square)
+
+    def move(self, start: BoardCoordinates, end: BoardCoordinates, promotion: str = "Q") -> bool:
+        """
+        Move piece from `start` to `end`, only if the move is valid. Subscribers are told about the move,
+        or why it is illegal.
+        A pawn reaching the last row is promoted to `promotion`.
+        """
+        if not start.is_in_bounds() or not end.is_in_bounds():
+            raise OutOfBoundsError
+
+        moved_piece = self.get_piece_at(start)
+        if not moved_piece.color == self.current_player:
+            raise NotYourTurn
+
+        # An unknown letter matches no promotion, so only moves that do not promote are valid, as on `Board`
+        promotion_kind = PIECE_ABBREVIATIONS.find(promotion) if len(promotion) == 1 else -1
+        valid_move = self._valid_move(square_index(start), square_index(end), promotion_kind)
+
+        if valid_move is None:
+            return False
+
+        move = decode_move(valid_move)
+        movetext = san(self, move) if Event.MOVE_MADE in self.listeners else None
+        self._push(valid_move)
+        if self.listeners:
+            self._announce_move(move, movetext)
+        return True
+
+    def _valid_move(self, start: int, end: int, promotion: int) -> int | None:
+        side = self.current_player.value
+        filtered_move = [m for m in self._generate_moves(side)
+                         if m & 0xFFF == start | end << 6 and m >> PROMOTION_SHIFT in (0, promotion)]
+
+        if len(filtered_move) != 1:
+            self._reject_move(start, end, IllegalMoveReason.ILLEGAL)
+            return None
+
+        if self._leaves_king_attacked(filtered_move[0], side):
+            self._reject_move(start, end, IllegalMoveReason.KING_IN_CHECK)
+            return None
+
+        return filtered_move[0]
+
+    def load(self, config: str):
+        """Import state from FEN notation. Raises `InvalidFEN`, leaving the board unchanged, if it is malformed."""
+        fields = config.split()
+        if not fields:
+            raise InvalidFEN("empty FEN")
+        player, castling, en_passant, halfmove_clock, fullmove_number = parse_fields(fields)
+
+        castling_rights = castling_bits(castling)
+        pieces = ((square, PIECE_INDEXES[symbol]) for square, symbol in iter_placement(fields[GAME_BOARD]))
+        self._set_position(pieces, player, castling_rights, en_passant, halfmove_clock, fullmove_number)
+
+    def load_bytes(self, data, offset: int = 0):
+        """Import state from a position packed by `to_bytes`, read from any buffer at `offset` without copying it"""
+        self._set_position(*unpack_position(data, offset))
+
+    @classmethod
+    def from_bytes(cls, data, offset: int = 0) -> "BitBoard":
+        board = cls()
+        board.load_bytes(data, offset)
+        return board
+
+    def to_bytes(self) -> bytes:
+        """Export the position in the fixed-size binary format of `chesslib.binary`"""
+        return pack_position(self.mailbox, self.current_player, self.castling_rights, self.en_passant,
+                             self.halfmove_clock, self.fullmove_number)
+
+    def _set_position(self, pieces: Iterable[tuple[int, int]], player: Color, castling_rights: int,
+                      en_passant: BoardCoordinates | None, halfmove_clock: int, fullmove_number: int):
+        """Replace the position with `(square, piece index)` pairs and game state, computing its hash"""
+        bitboards = [0] * 12
+        mailbox: list[int | None] = [None] * 64
+        key = 0
+        psqt = 0
+        for square, piece in pieces:
+            bitboards[piece] |= 1 << square
+            mailbox[square] = piece
+            key ^= PIECE_KEYS[piece][square]
+            psqt += PIECE_SQUARE_SCORES[piece][square]
+
+        self.bitboards = bitboards
+        self.mailbox = mailbox
+        self.occupancy = [0, 0]
+        for piece in range(12):
+            self.occupancy[piece // 6] |= bitboards[piece]
+        self.current_player = player
+        self.castling_rights = castling_rights
+        self.en_passant_square = None if en_passant is None else en_passant.index
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+        self.move_stack = []
+        self.positions = []
+        self._status = None
+
+        key ^= CASTLING_RIGHTS_KEYS[self.castling_rights]
+        if en_passant is not None:
+            key ^= EN_PASSANT_KEYS[en_passant.col]
+        if player == Color.BLACK:
+            key ^= BLACK_TO_MOVE_KEY
+        self.hash = key
+        self.psqt = psqt
+
+    def fen(self) -> str:
+        """Export the position as FEN, the inverse of `load`"""
+        symbols = [None if piece is None else PIECE_SYMBOLS[piece] for piece in self.mailbox]
+        return format_fen(symbols, self.current_player, self.castling, self.en_passant, self.halfmove_clock,
+                          self.fullmove_number)
+
+    def push(self, move: ChessMove):
+        """Make `move` without validating it. The move can be taken back with `pop`."""
+        self._push(encode_move(move))
+
+    def pop(self) -> ChessMove:
+        """Take back the last pushed move and return it"""
+        return decode_move(self._pop())
+
+    def legal_moves(self) -> list[ChessMove]:
+        """All legal moves for the player to move"""
+        return [decode_move(m) for m in self._legal_moves()]
+
+    def iter_legal_moves(self, origin: BoardCoordinates | None = None) -> Iterator[ChessMove]:
+        """
+        Lazily generate the legal moves for the player to move, or only those of the piece on `origin`.
+        The board must not be changed until the generator is exhausted.
+        """
+        side = self.current_player.value
+        start = None if origin is None else square_index(origin)
+        for move in self._generate_moves(side):
+            if (start is None or move & SQUARE_MASK == start) and not self._leaves_king_attacked(move, side):
+                yield decode_move(move)
+
+    def _legal_moves(self) -> list[int]:
+        side = self.current_player.value
+        return [m for m in self._generate_moves(side) if not self._leaves_king_attacked(m, side)]
+
+    def occupied(self, color: Color) -> list[BoardCoordinates]:
+        """Return all coordinates occupied by player `color`"""
+        return [square_coordinates(s) for s in bit_squares(self.occupancy[color.value])]
+
+    def is_checkmate(self, player: Color) -> bool:
+        """Checks whether `player` is check-mated"""
+        if not self.check_validator(player):
+            return False
+
+        side = player.value
+        for move in self._generate_moves(side):
+            if not self._leaves_king_attacked(move, side):
+                return False
+
+        return True
+
+    def check_validator(self, player: Color) -> bool:
+        """Checks whether `player` is currently checked"""
+        king = self.bitboards[player.value * 6 + KING]
+        if not king:
+            return False
+
+        return self._is_attacked(king.bit_length() - 1, player.value ^ 1)
+
+    def is_attacked(self, location: BoardCoordinates, color: Color) -> bool:
+        """Checks whether any piece of player `color` attacks `location`"""
+        return self._is_attacked(square_index(location), color.value)
+
+    def mobility(self, color: Color) -> tuple[int, int]:
+        """
+        Squares attacked by the knights, bishops, rooks and queens of `color` that it does not occupy itself,
+        and how many of those are on or next to the enemy king
+        """
+        side = color.value
+        bitboards = self.bitboards
+        free = ~self.occupancy[side] & FULL_BOARD
+        both = self.occupancy[0] | self.occupancy[1]
+        king = bitboards[(side ^ 1) * 6 + KING]
+        zone = KING_ATTACKS[king.bit_length() - 1] | king if king else 0
+        base = side * 6
+
+        attacks = [KNIGHT_ATTACKS[s] for s in bit_squares(bitboards[base + KNIGHT])]
+        attacks += [bishop_attacks(s, both) for s in bit_squares(bitboards[base + BISHOP] | bitboards[base + QUEEN])]
+        attacks += [rook_attacks(s, both) for s in bit_squares(bitboards[base + ROOK] | bitboards[base + QUEEN])]
+        mobility = king_attacks = 0
+        for attacked in attacks:
+            attacked &= free
+            mobility += attacked.bit_count()
+            king_attacks += (attacked & zone).bit_count()
+        return mobility, king_attacks
+
+    def find_piece(self, abbr: str, color: Color) -> BoardCoordinates | None:
+        pieces = self.bitboards[color.value * 6 + PIECE_ABBREVIATIONS.index(abbr)]
+        if not pieces:
+            return None
+        return square_coordinates((pieces & -pieces).bit_length() - 1)
+
+    def get_piece_at(self, location: BoardCoordinates) -> Piece | None:
+        if not location.is_in_bounds():
+            raise OutOfBoundsError
+
+        index = self.mailbox[square_index(location)]
+        if index is None:
+            return None
+        return self._piece_view(index)
+
+    def items(self):
+        return [(square_coordinates(s).letter_notation(), self._piece_view(p))
+                for s, p in enumerate(self.mailbox) if p is not None]
+
+    def _piece_view(self, index: int) -> Piece:
+        """Pieces are not stored on a bitboard, so callers get a fresh `Piece` bound to this board"""
+        piece = generate_piece(PIECE_SYMBOLS[index])
+        piece.place(self)
+        return piece
+
+    def _put(self, piece: int, square: int):
+        bit = 1 << square
+        self.bitboards[piece] |= bit
+        self.occupancy[piece // 6] |= bit
+        self.mailbox[square] = piece
+
+    def _generate_moves(self, side: int) -> list[int]:
+        """Pseudo-legal moves for `side`, encoded as `start | end << 6 | flags`"""
+        bitboards = self.bitboards
+        own = self.occupancy[side]
+        both = own | self.occupancy[side ^ 1]
+        enemy = self.occupancy[side ^ 1]
+        empty = ~both & FULL_BOARD
+        base = side * 6
+        moves = []
+
+        pawns = bitboards[base + PAWN]
+        if side == Color.WHITE.value:
+            single = (pawns >> 8) & empty
+            double = ((single & DOUBLE_PUSH_ROWS[side]) >> 8) & empty
+            step = 8
+        else:
+            single = (pawns << 8) & empty
+            double = ((single & DOUBLE_PUSH_ROWS[side]) << 8) & empty
+            step = -8
+        promotion_row = PROMOTION_ROWS[side]
+        for end in bit_squares(single):
+            self._add_pawn_move(moves, end + step, end, promotion_row)
+        for end in bit_squares(double):
+            moves.append((end + 2 * step) | end << 6 | REGULAR_FLAG)
+
+        pawn_attacks = PAWN_ATTACKS[side]
+        en_passant = self.en_passant_square if side == self.current_player.value else None
+        for start in bit_squares(pawns):
+            for end in bit_squares(pawn_attacks[start] & enemy):
+                self._add_pawn_move(moves, start, end, promotion_row)
+            if en_passant is not None and pawn_attacks[start] >> en_passant & 1:
+                moves.append(start | en_passant << 6 | EN_PASSANT_FLAG)
+
+        not_own = ~own
+        for start in bit_squares(bitboards[base + KNIGHT]):
+            for end in bit_squares(KNIGHT_ATTACKS[start] & not_own):
+                moves.append(start | end << 6 | REGULAR_FLAG)
+        for start in bit_squares(bitboards[base + BISHOP]):
+            for end in bit_squares(bishop_attacks(start, both) & not_own):
+                moves.append(start | end << 6 | REGULAR_FLAG)
+        for start in bit_squares(bitboards[base + ROOK]):
+            for end in bit_squares(rook_attacks(start, both) & not_own):
+                moves.append(start | end << 6 | REGULAR_FLAG)
+        for start in bit_squares(bitboards[base + QUEEN]):
+            for end in bit_squares((rook_attacks(start, both) | bishop_attacks(start, both)) & not_own):
+                moves.append(start | end << 6 | REGULAR_FLAG)
+        for start in bit_squares(bitboards[base + KING]):
+            for end in bit_squares(KING_ATTACKS[start] & not_own):
+                moves.append(start | end << 6 | REGULAR_FLAG)
+
+        for right, king_start, king_end, between, passed in CASTLES[side]:
+            if not self.castling_rights & right or both & between:
+                continue
+            if not bitboards[base + KING] >> king_start & 1:
+                continue
+            if not bitboards[base + ROOK] >> CASTLING_ROOKS[king_end][0] & 1:
+                continue
+            if any(self._is_attacked(square, side ^ 1) for square in passed):
+                continue
+            moves.append(king_start | king_end << 6 | CASTLING_FLAG)
+
+        return moves
+
+    @staticmethod
+    def _add_pawn_move(moves: list[int], start: int, end: int, promotion_row: int):
+        """Moving onto the last row is one move per piece the pawn can promote to"""
+        if promotion_row >> end & 1:
+            for kind in PROMOTION_KINDS:
+                moves.append(start | end << 6 | PROMOTION_FLAG | kind << PROMOTION_SHIFT)
+        else:
+            moves.append(start | end << 6 | REGULAR_FLAG)
+
+    def _is_attacked(self, square: int, by_side: int) -> bool:
+        """Checks whether any piece of `by_side` attacks `square`"""
+        bitboards = self.bitboards
+        base = by_side * 6
+        if KNIGHT_ATTACKS[square] & bitboards[base + KNIGHT]:
+            return True
+        if PAWN_ATTACKS[by_side ^ 1][square] & bitboards[base + PAWN]:
+            return True
+        if KING_ATTACKS[square] & bitboards[base + KING]:
+            return True
+
+        both = self.occupancy[0] | self.occupancy[1]
+        queens = bitboards[base + QUEEN]
+        if bishop_attacks(square, both) & (bitboards[base + BISHOP] | queens):
+            return True
+        return bool(rook_attacks(square, both) & (bitboards[base + ROOK] | queens))
+
+    def _leaves_king_attacked(self, move: int, side: int) -> bool:
+        self._push(move)
+        king = self.bitboards[side * 6 + KING]
+        attacked = bool(king) and self._is_attacked(king.bit_length() - 1, side ^ 1)
+        self._pop()
+        return attacked
+
+    def _push(self, move: int):
+        start = move & SQUARE_MASK
+        end = move >> 6 & SQUARE_MASK
+        move_type = move & TYPE_MASK
+        captured_at = (start & ~7) | (end & 7) if move_type == EN_PASSANT_FLAG else end
+
+        bitboards = self.bitboards
+        occupancy = self.occupancy
+        mailbox = self.mailbox
+        piece = mailbox[start]
+        captured = mailbox[captured_at]
+        castling_rights = self.castling_rights
+        en_passant_square = self.en_passant_square
+        self.move_stack.append((move, captured, castling_rights, en_passant_square, self.hash, self.psqt,
+                                self.halfmove_clock))
+        self.positions.append(self.hash)
+        key = self.hash ^ BLACK_TO_MOVE_KEY
+        scores = PIECE_SQUARE_SCORES
+        psqt = self.psqt
+
+        if captured is not None:
+            bit = 1 << captured_at
+            bitboards[captured] ^= bit
+            occupancy[captured // 6] ^= bit
+            mailbox[captured_at] = None
+            key ^= PIECE_KEYS[captured][captured_at]
+            psqt -= scores[captured][captured_at]
+
+        if move_type == PROMOTION_FLAG:
+            promoted = piece - PAWN + (move >> PROMOTION_SHIFT)
+            bitboards[piece] ^= 1 << start
+            bitboards[promoted] |= 1 << end
+            occupancy[piece // 6] ^= 1 << start | 1 << end
+            mailbox[start] = None
+            mailbox[end] = promoted
+            key ^= PIECE_KEYS[piece][start] ^ PIECE_KEYS[promoted][end]
+            psqt += scores[promoted][end] - scores[piece][start]
+        else:
+            self._shift(piece, start, end)
+            key ^= PIECE_KEYS[piece][start] ^ PIECE_KEYS[piece][end]
+            psqt += scores[piece][end] - scores[piece][start]
+            if move_type == CASTLING_FLAG:
+                rook = piece - KING + ROOK
+                rook_start, rook_end = CASTLING_ROOKS[end]
+                self._shift(rook, rook_start, rook_end)
+                key ^= PIECE_KEYS[rook][rook_start] ^ PIECE_KEYS[rook][rook_end]
+                psqt += scores[rook][rook_end] - scores[rook][rook_start]
+
+        if en_passant_square is not None:
+            key ^= EN_PASSANT_KEYS[en_passant_square & 7]
+        if piece % 6 == PAWN and abs(end - start) == 16:
+            self.en_passant_square = (start + end) >> 1
+            key ^= EN_PASSANT_KEYS[start & 7]
+        else:
+            self.en_passant_square = None
+
+        self.castling_rights = castling_rights & CASTLING_KEPT[start] & CASTLING_KEPT[end]
+        if self.castling_rights != castling_rights:
+            key ^= CASTLING_RIGHTS_KEYS[castling_rights] ^ CASTLING_RIGHTS_KEYS[self.castling_rights]
+
+        self.hash = key
+        self.psqt = psqt
+        self.halfmove_clock = 0 if piece % 6 == PAWN or captured is not None else self.halfmove_clock + 1
+        if self.current_player == Color.BLACK:
+            self.fullmove_number += 1
+        self.current_player = get_opponent(self.current_player)
+
+    def _pop(self) -> int:
+        (move, captured, castling_rights, en_passant_square, self.hash, self.psqt,
+         self.halfmove_clock) = self.move_stack.pop()
+        self.positions.pop()
+        # Another move can lead to a position with the same key and depth but a different history
+        self._status = None
+        start = move & SQUARE_MASK
+        end = move >> 6 & SQUARE_MASK
+        move_type = move & TYPE_MASK
+
+        bitboards = self.bitboards
+        occupancy = self.occupancy
+        mailbox = self.mailbox
+        piece = mailbox[end]
+
+        if move_type == PROMOTION_FLAG:
+            pawn = piece - (move >> PROMOTION_SHIFT) + PAWN
+            bitboards[piece] ^= 1 << end
+            bitboards[pawn] |= 1 << start
+            occupancy[piece // 6] ^= 1 << start | 1 << end
+            mailbox[end] = None
+            mailbox[start] = pawn
+        else:
+            self._shift(piece, end, start)
+            if move_type == CASTLING_FLAG:
+                rook_start, rook_end = CASTLING_ROOKS[end]
+                self._shift(piece - KING + ROOK, rook_end, rook_start)
+
+        if captured is not None:
+            captured_at = (start & ~7) | (end & 7) if move_type == EN_PASSANT_FLAG else end
+            bit = 1 << captured_at
+            bitboards[captured] |= bit
+            occupancy[captured // 6] |= bit
+            mailbox[captured_at] = captured
+
+        self.castling_rights = castling_rights
+        self.en_passant_square = en_passant_square
+        self.current_player = get_opponent(self.current_player)
+        if self.current_player == Color.BLACK:
+            self.fullmove_number -= 1
+        return move
+
+    def _shift(self, piece: int, start: int, end: int):
+        move_mask = 1 << start | 1 << end
+        self.bitboards[piece] ^= move_mask
+        self.occupancy[piece // 6] ^= move_mask
+        self.mailbox[start] = None
+        self.mailbox[end] = piece
+
+    def _reject_move(self, start: int, end: int, reason: IllegalMoveReason):
+        if Event.ILLEGAL_MOVE in self.listeners:
+            self._emit(Event.ILLEGAL_MOVE, square_coordinates(start), square_coordinates(end), reason)
@@ -1,85 +1,366 @@
-import re
-import copy
+from typing import Iterator
 
-from .constants import INIT_FEN, OutOfBoundsError, NotYourTurn, InvalidPiece
-from .utils import Color, BoardCoordinates, parse_letter_coordinates, get_opponent
+from .constants import INIT_FEN, BOARD_SIZE, GAME_BOARD, OutOfBoundsError, NotYourTurn, InvalidPiece, InvalidFEN
+from .utils import Color, BoardCoordinates, LETTER_NOTATIONS, SQUARES_BY_LETTER_NOTATION, parse_letter_coordinates, get_opponent
 from .chess_move import MoveType, ChessMove
-from chesslib.piece import generate_piece, Piece, Pawn
-
-
-def expand_blanks(match: re.Match[str]) -> str:
-    return " " * int(match.group(0))
-
-
-def extract_move(move: ChessMove) -> BoardCoordinates:
-    return move.end
-
-
-class Board:
-    def __init__(self):
+from chesslib.piece import generate_piece, Piece, Pawn, King
+from chesslib.piece.piece import ORTHOGONAL_DIRECTIONS, DIAGONAL_DIRECTIONS
+from .fen import iter_placement, parse_fields, format_fen
+from .pgn import san
+from .events import Event, EventSource, IllegalMoveReason
+from .termination import GameStatus
+from .binary import pack_position, unpack_position, castling_bits, castling_symbols
+from .zobrist import piece_key, castling_key, position_hash, EN_PASSANT_KEYS, BLACK_TO_MOVE_KEY
+from .evaluation import PIECE_SQUARE_SCORES, position_scores
+
+# Castling right lost when a piece moves from or to each corner, keyed by (row, col)
+CORNER_CASTLING_RIGHTS = {(7, 7): "K", (7, 0): "Q", (0, 7): "k", (0, 0): "q"}
+# Rook start and end columns, keyed by the column the castling king lands on
+CASTLING_ROOK_COLUMNS = {6: (7, 5), 2: (0, 3)}
+# Pieces whose attacked squares depend on what stands in the way
+SLIDING_PIECES = ("B", "R", "Q")
+PIECE_SYMBOLS = "pnbrqkPNBRQK"
+PIECE_INDEXES = {symbol: index for index, symbol in enumerate(PIECE_SYMBOLS)}
+# Bit of a pawn in the pawn key on square 0, by piece index; black pawns are kept in the upper 64 bits
+PAWN_KEY_BITS = {PIECE_INDEXES["P"]: 1, PIECE_INDEXES["p"]: 1 << 64}
+
+
+class MoveRecord:
+    """Everything `Board.pop` needs to restore the position before a pushed move"""
+    def __init__(self, move: ChessMove, moved_piece: Piece, captured: Piece | None,
+                 captured_at: BoardCoordinates | None, castling: str,
+                 en_passant: BoardCoordinates | None, player: Color, hash: int | None, halfmove_clock: int):
+        self.move = move
+        self.moved_piece = moved_piece
+        self.captured = captured
+        self.captured_at = captured_at
+        self.castling = castling
+        self.en_passant = en_passant
+        self.player = player
+        self.hash = hash
+        self.halfmove_clock = halfmove_clock
+
+
+class Board(EventSource, GameStatus):
+    def __init__(self, fen: str = INIT_FEN):
         self.state: dict[str, Piece] = {}
         self.current_player: Color = Color.WHITE
-        self.previous_moved_pawn: BoardCoordinates | None = None
-
-        self.positions = []
-
-        self.load(INIT_FEN)
-
-    def move(self, start: BoardCoordinates, end: BoardCoordinates) -> bool:
-        """Move piece from `start` to `end`, only if the move is valid. Prints out a successful move to console."""
+        self.castling: str = ""
+        self.en_passant: BoardCoordinates | None = None
+        self.halfmove_clock: int = 0
+        self.fullmove_number: int = 1
+
+        # Keys of the positions before each move on the move stack
+        self.positions: list[int] = []
+        self.move_stack: list[MoveRecord] = []
+        self.listeners = {}
+        # Pieces hold no per-square state, so one object per symbol serves every square of this board
+        self._pieces: dict[str, Piece] = {}
+        for symbol in PIECE_SYMBOLS:
+            self._pieces[symbol] = generate_piece(symbol)
+            self._pieces[symbol].place(self)
+
+        self.load(fen)
+
+    @property
+    def state(self) -> dict[str, Piece]:
+        return self._state
+
+    @state.setter
+    def state(self, value: dict[str, Piece]):
+        """
+        Replacing the state drops the attack maps, hash, evaluation scores and game status; they are rebuilt
+        from the new state on first use
+        """
+        self._state = value
+        self._status = None
+        self._hash: int | None = None
+        self._psqt: int | None = None
+        self._pawn_key: int | None = None
+        self._piece_attacks: dict[str, tuple[Piece, set[str]]] | None = None
+        self._attack_counts: dict[Color, dict[str, int]] = {}
+        self._king_locations: dict[Color, str | None] = {}
+
+    @property
+    def hash(self) -> int:
+        """Zobrist hash of the position, kept up to date by every push and pop"""
+        if self._hash is None:
+            self._hash = position_hash(self)
+        return self._hash
+
+    @property
+    def psqt(self) -> int:
+        """Packed material and piece-square score of `chesslib.evaluation`, kept up to date by every push and pop"""
+        if self._psqt is None:
+            self._psqt, self._pawn_key = position_scores(self)
+        return self._psqt
+
+    @property
+    def pawn_key(self) -> int:
+        """Both sides' pawns as bits, identifying the pawn structure"""
+        if self._pawn_key is None:
+            self._psqt, self._pawn_key = position_scores(self)
+        return self._pawn_key
+
+    def move(self, start: BoardCoordinates, end: BoardCoordinates, promotion: str = "Q") -> bool:
+        """
+        Move piece from `start` to `end`, only if the move is valid. Subscribers are told about the move,
+        or why it is illegal.
+        A pawn reaching the last row is promoted to `promotion`.
+        """
         if not start.is_in_bounds() or not end.is_in_bounds():
             raise OutOfBoundsError
 
-        self.previous_moved_pawn = None
         moved_piece = self.get_piece_at(start)
-        target = self.get_piece_at(end)
         if not moved_piece.color == self.current_player:
             raise NotYourTurn
 
-        valid_move = self._valid_move(start, end)
+        valid_move = self._valid_move(start, end, promotion)
 
         if valid_move is None:
             return False
 
-        self._make_move(valid_move)
-        self._finish_move(moved_piece, target, start, end)
+        movetext = san(self, valid_move) if Event.MOVE_MADE in self.listeners else None
+        self.push(valid_move)
+        if self.listeners:
+            self._announce_move(valid_move, movetext)
         return True
 
-    def _valid_move(self, start: BoardCoordinates, end: BoardCoordinates) -> ChessMove | None:
-        moved_piece = self.get_piece_at(start)
-        legal_moves = moved_piece.possible_moves(start)
-
-        filtered_move = list(filter(lambda x: x.end == end, legal_moves))
+    def push(self, move: ChessMove):
+        """Make `move` without validating it. The move can be taken back with `pop`."""
+        moved_piece = self.get_piece_at(move.start)
+        if move.type == MoveType.EN_PASSANT:
+            captured_at = BoardCoordinates(move.start.row, move.end.col)
+        else:
+            captured_at = move.end
+        captured = self.get_piece_at(captured_at)
+        if captured is None:
+            captured_at = None
+
+        self.positions.append(self.hash)
+        self.move_stack.append(MoveRecord(move, moved_piece, captured, captured_at, self.castling,
+                                          self.en_passant, self.current_player, self._hash, self.halfmove_clock))
+
+        self._make_move(move)
+        self._refresh_attack_maps(self._changed_squares(move))
+        self._update_castling(move, moved_piece)
+        self._update_en_passant(move, moved_piece)
+        if isinstance(moved_piece, Pawn) or captured is not None:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if self.current_player == Color.BLACK:
+            self.fullmove_number += 1
+        self.current_player = get_opponent(self.current_player)
+        if self._hash is not None:
+            self._hash ^= BLACK_TO_MOVE_KEY
+
+    def pop(self) -> ChessMove:
+        """Take back the last pushed move and return it"""
+        record = self.move_stack.pop()
+        self.positions.pop()
+        # Another move can lead to a position with the same key and depth but a different history
+        self._status = None
+        move = record.move
+
+        self._update_coord_piece(move.end, None)
+        self._update_coord_piece(move.start, record.moved_piece)
+        if record.captured is not None:
+            self._update_coord_piece(record.captured_at, record.captured)
+        if move.type == MoveType.CASTLING:
+            rook_start, rook_end = CASTLING_ROOK_COLUMNS[move.end.col]
+            rook = self.get_piece_at(BoardCoordinates(move.end.row, rook_end))
+            self._update_coord_piece(BoardCoordinates(move.end.row, rook_end), None)
+            self._update_coord_piece(BoardCoordinates(move.end.row, rook_start), rook)
+        self._refresh_attack_maps(self._changed_squares(move))
+
+        self.castling = record.castling
+        self.en_passant = record.en_passant
+        self.current_player = record.player
+        self._hash = record.hash
+        self.halfmove_clock = record.halfmove_clock
+        if record.player == Color.BLACK:
+            self.fullmove_number -= 1
+        return move
+
+    def legal_moves(self) -> list[ChessMove]:
+        """All legal moves for the player to move"""
+        return list(self.iter_legal_moves())
+
+    def iter_legal_moves(self, origin: BoardCoordinates | None = None) -> Iterator[ChessMove]:
+        """
+        Lazily generate the legal moves for the player to move, or only those of the piece on `origin`.
+        The board must not be changed until the generator is exhausted.
+        """
+        return self._iter_legal_moves(self.current_player, origin)
 
-        if len(filtered_move) != 1:
-            print("Illegal move")
-            return None
+    def _iter_legal_moves(self, player: Color, origin: BoardCoordinates | None) -> Iterator[ChessMove]:
+        """
+        Checks and pins are worked out once, from the king outwards, so candidate moves are only filtered,
+        never made. En passant, which can uncover a check along the rank, is the one move tested by making it.
+        """
+        self._build_attack_maps()
+        enemy = get_opponent(player)
+        enemy_attacks = self._attack_counts[enemy]
+        king_key = self._king_locations[player]
+
+        pins: dict[str, set[str]] = {}
+        evasions: set[str] | None = None
+        king_forbidden: set[str] = set()
+        checkers = 0
+        if king_key is not None:
+            king = parse_letter_coordinates(king_key)
+            pins = self._pins(king, player)
+            for key, (piece, attacked) in self._piece_attacks.items():
+                if piece.color != enemy or king_key not in attacked:
+                    continue
+                checkers += 1
+                line, beyond = self._check_line(king, parse_letter_coordinates(key), piece)
+                evasions = line if evasions is None else evasions & line
+                if beyond is not None:
+                    king_forbidden.add(beyond)
+
+        origin_key = None if origin is None else origin.letter_notation()
+        for key, piece in list(self.state.items()):
+            if piece.color != player or (origin_key is not None and key != origin_key):
+                continue
+            is_king = key == king_key
+            if checkers > 1 and not is_king:
+                continue
 
-        # Check for check
-        if self._is_in_check(self.current_player, ChessMove(start, end, MoveType.REGULAR)):
-            print("You're in check!")
-            return None
+            pinned_line = pins.get(key)
+            for move in piece.possible_moves(parse_letter_coordinates(key)):
+                end = move.end.letter_notation()
+                if is_king:
+                    # Castling moves already avoid attacked squares
+                    if move.type != MoveType.CASTLING and (enemy_attacks.get(end, 0) > 0 or end in king_forbidden):
+                        continue
+                elif move.type == MoveType.EN_PASSANT:
+                    if self._is_in_check(player, move):
+                        continue
+                elif (pinned_line is not None and end not in pinned_line) or (evasions is not None and end not in evasions):
+                    continue
+                yield move
+
+    def _pins(self, king: BoardCoordinates, player: Color) -> dict[str, set[str]]:
+        """Pieces of `player` pinned to their king, with the squares they can still move to along the pin"""
+        pins = {}
+        for sliders, directions in (("RQ", ORTHOGONAL_DIRECTIONS), ("BQ", DIAGONAL_DIRECTIONS)):
+            for row_step, col_step in directions:
+                line = []
+                pinned = None
+                row, col = king.row + row_step, king.col + col_step
+                while 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE:
+                    key = BoardCoordinates(row, col).letter_notation()
+                    line.append(key)
+                    piece = self.state.get(key)
+                    if piece is not None:
+                        if piece.color != player:
+                            if pinned is not None and piece.abbreviation in sliders:
+                                pins[pinned] = set(line)
+                            break
+                        if pinned is not None:
+                            break
+                        pinned = key
+                    row += row_step
+                    col += col_step
+
+        return pins
 
-        return filtered_move[0]
+    @staticmethod
+    def _check_line(king: BoardCoordinates, checker: BoardCoordinates, piece: Piece) -> tuple[set[str], str | None]:
+        """
+        Squares that end a check by `piece` on `checker`: capturing it, or blocking a sliding piece.
+        Also the square behind the king on the sliding piece's line, which the king cannot step back to.
+        """
+        if piece.abbreviation not in SLIDING_PIECES:
+            return {checker.letter_notation()}, None
+
+        row_step = (checker.row > king.row) - (checker.row < king.row)
+        col_step = (checker.col > king.col) - (checker.col < king.col)
+        line = set()
+        row, col = king.row + row_step, king.col + col_step
+        while (row, col) != (checker.row, checker.col):
+            line.add(BoardCoordinates(row, col).letter_notation())
+            row += row_step
+            col += col_step
+        line.add(checker.letter_notation())
+
+        beyond = BoardCoordinates(king.row - row_step, king.col - col_step)
+        return line, beyond.letter_notation() if beyond.is_in_bounds() else None
+
+    def _valid_move(self, start: BoardCoordinates, end: BoardCoordinates, promotion: str) -> ChessMove | None:
+        def matches(move: ChessMove) -> bool:
+            return move.end == end and move.promotion in (None, promotion)
+
+        legal_moves = [m for m in self.iter_legal_moves(start) if matches(m)]
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+
+        if Event.ILLEGAL_MOVE in self.listeners:
+            # Tell an impossible move apart from one that would leave the king in check
+            moved_piece = self.get_piece_at(start)
+            if len([m for m in moved_piece.possible_moves(start) if matches(m)]) != 1:
+                reason = IllegalMoveReason.ILLEGAL
+            else:
+                reason = IllegalMoveReason.KING_IN_CHECK
+            self._emit(Event.ILLEGAL_MOVE, start, end, reason)
+        return None
 
     def load(self, config: str):
-        """Import state from FEN notation"""
-        fen = config.split(" ")
-        fen[0] = re.compile(r"\d").sub(expand_blanks, fen[0])
+        """Import state from FEN notation. Raises `InvalidFEN`, leaving the board unchanged, if it is malformed."""
+        fields = config.split()
+        if not fields:
+            raise InvalidFEN("empty FEN")
+        player, castling, en_passant, halfmove_clock, fullmove_number = parse_fields(fields)
+
+        pieces = self._pieces
+        state = {}
+        for square, symbol in iter_placement(fields[GAME_BOARD]):
+            state[LETTER_NOTATIONS[square]] = pieces[symbol]
+        self._set_position(state, player, castling, en_passant, halfmove_clock, fullmove_number)
+
+    def load_bytes(self, data, offset: int = 0):
+        """Import state from a position packed by `to_bytes`, read from any buffer at `offset` without copying it"""
+        squares, player, castling, en_passant, halfmove_clock, fullmove_number = unpack_position(data, offset)
+        pieces = self._pieces
+        state = {}
+        for square, piece in squares:
+            state[LETTER_NOTATIONS[square]] = pieces[PIECE_SYMBOLS[piece]]
+        self._set_position(state, player, castling_symbols(castling), en_passant, halfmove_clock, fullmove_number)
+
+    @classmethod
+    def from_bytes(cls, data, offset: int = 0) -> "Board":
+        board = cls()
+        board.load_bytes(data, offset)
+        return board
+
+    def to_bytes(self) -> bytes:
+        """Export the position in the fixed-size binary format of `chesslib.binary`"""
+        mailbox: list[int | None] = [None] * (BOARD_SIZE * BOARD_SIZE)
+        for key, piece in self.state.items():
+            mailbox[SQUARES_BY_LETTER_NOTATION[key].index] = PIECE_SYMBOLS.index(piece.symbol)
+        return pack_position(mailbox, self.current_player, castling_bits(self.castling), self.en_passant,
+                             self.halfmove_clock, self.fullmove_number)
+
+    def _set_position(self, state: dict[str, Piece], player: Color, castling: str, en_passant: BoardCoordinates | None,
+                      halfmove_clock: int, fullmove_number: int):
+        self.state = state
         self.positions = []
-        for x, row in enumerate(self._get_rows(fen[0])):
-            for y, letter in enumerate(row):
-                if self._is_cell_empty(letter):
-                    continue
-                coords = BoardCoordinates(x, 7 - y)
-                letter_coords = coords.letter_notation()
-                self.state[letter_coords] = generate_piece(letter)
-                self.state[letter_coords].place(self)
-
-        if fen[1] == "w":
-            self.current_player = Color.WHITE
-        else:
-            self.current_player = Color.BLACK
+        self.move_stack = []
+        self.current_player = player
+        self.castling = castling
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+
+    def fen(self) -> str:
+        """Export the position as FEN, the inverse of `load`"""
+        symbols: list[str | None] = [None] * (BOARD_SIZE * BOARD_SIZE)
+        for key, piece in self.state.items():
+            symbols[SQUARES_BY_LETTER_NOTATION[key].index] = piece.symbol
+        return format_fen(symbols, self.current_player, self.castling, self.en_passant, self.halfmove_clock,
+                          self.fullmove_number)
 
     def occupied(self, color: Color) -> list[BoardCoordinates]:
         """Return all coordinates occupied by player `color`"""
@@ -96,55 +377,146 @@ class Board:
         if not self.check_validator(player):
             return False
 
-        for pos, piece in self.state.items():
-            if not piece.color == player:
-                continue
-
-            start = parse_letter_coordinates(pos)
-            moves = piece.possible_moves(start)
-
-            for move in moves:
-                if not self._is_in_check(player, move):
-                    return False
-
-        return True
+        return next(self._iter_legal_moves(player, None), None) is None
 
     def _is_in_check(self, player: Color, move: ChessMove) -> bool:
-        clone = copy.deepcopy(self)
-        clone._make_move(move)
+        """Checks whether `player` is checked after `move` is made"""
+        self.push(move)
+        in_check = self.check_validator(player)
+        self.pop()
 
-        return clone.check_validator(player)
+        return in_check
 
     def check_validator(self, player: Color) -> bool:
         """Checks whether `player` is currently checked"""
-        king_location = self.find_piece("K", player)
+        self._build_attack_maps()
+        king_location = self._king_locations[player]
 
         if king_location is None:
             return False
 
-        for pos, piece in self.state.items():
-            if piece.color == player:
-                continue
+        return self._attack_counts[get_opponent(player)].get(king_location, 0) > 0
 
-            moves = piece.possible_moves(parse_letter_coordinates(pos))
+    def is_attacked(self, location: BoardCoordinates, color: Color) -> bool:
+        """Checks whether any piece of player `color` attacks `location`"""
+        self._build_attack_maps()
+        return self._attack_counts[color].get(location.letter_notation(), 0) > 0
 
-            if king_location in map(extract_move, moves):
-                return True
+    def attack_count(self, location: BoardCoordinates, color: Color) -> int:
+        """Number of pieces of player `color` attacking `location`"""
+        self._build_attack_maps()
+        return self._attack_counts[color].get(location.letter_notation(), 0)
 
-        return False
+    def mobility(self, color: Color) -> tuple[int, int]:
+        """
+        Squares attacked by the knights, bishops, rooks and queens of `color` that it does not occupy itself,
+        and how many of those are on or next to the enemy king
+        """
+        self._build_attack_maps()
+        state = self.state
+        enemy_king = self._king_locations[get_opponent(color)]
+        zone = set() if enemy_king is None else self._piece_attacks[enemy_king][1] | {enemy_king}
+
+        mobility = king_attacks = 0
+        for piece, attacked in self._piece_attacks.values():
+            if piece.color != color or piece.abbreviation in "PK":
+                continue
+            for square in attacked:
+                occupant = state.get(square)
+                if occupant is None or occupant.color != color:
+                    mobility += 1
+                    if square in zone:
+                        king_attacks += 1
+        return mobility, king_attacks
 
     def find_piece(self, abbr: str, color: Color) -> BoardCoordinates | None:
+        if abbr == "K":
+            self._build_attack_maps()
+            king_location = self._king_locations[color]
+            if king_location is not None:
+                return parse_letter_coordinates(king_location)
+
         for coord, piece in self.state.items():
             if piece.abbreviation == abbr and piece.color == color:
                 return parse_letter_coordinates(coord)
-        print("Piece not found")
         return None
 
+    def _build_attack_maps(self):
+        """Compute attacked squares and king locations from scratch, unless they are already up to date"""
+        if self._piece_attacks is not None:
+            return
+
+        self._piece_attacks = {}
+        self._attack_counts = {Color.WHITE: {}, Color.BLACK: {}}
+        self._king_locations = {Color.WHITE: None, Color.BLACK: None}
+        for key, piece in self.state.items():
+            self._add_attacks(key, piece)
+
+    def _refresh_attack_maps(self, changed: list[BoardCoordinates]):
+        """
+        Update the attack maps after the pieces on `changed` moved. Only the pieces on those squares
+        and the sliding pieces whose lines pass through them can attack different squares now.
+        """
+        if self._piece_attacks is None:
+            return
+
+        changed_keys = [str(c) for c in changed]
+        affected = set(changed_keys)
+        for key, (piece, attacked) in self._piece_attacks.items():
+            if piece.abbreviation in SLIDING_PIECES and not attacked.isdisjoint(changed_keys):
+                affected.add(key)
+
+        for key in affected:
+            self._remove_attacks(key)
+        for key in affected:
+            piece = self.state.get(key)
+            if piece is not None:
+                self._add_attacks(key, piece)
+
+    def _add_attacks(self, key: str, piece: Piece):
+        attacked = {str(c) for c in piece.attacked_squares(parse_letter_coordinates(key))}
+        self._piece_attacks[key] = (piece, attacked)
+
+        counts = self._attack_counts[piece.color]
+        for square in attacked:
+            counts[square] = counts.get(square, 0) + 1
+
+        if isinstance(piece, King):
+            self._king_locations[piece.color] = key
+
+    def _remove_attacks(self, key: str):
+        entry = self._piece_attacks.pop(key, None)
+        if entry is None:
+            return
+
+        piece, attacked = entry
+        counts = self._attack_counts[piece.color]
+        for square in attacked:
+            counts[square] -= 1
+
+        if isinstance(piece, King) and self._king_locations[piece.color] == key:
+            self._king_locations[piece.color] = None
+
+    @staticmethod
+    def _changed_squares(move: ChessMove) -> list[BoardCoordinates]:
+        """Squares whose contents change when `move` is made or taken back"""
+        changed = [move.start, move.end]
+        if move.type == MoveType.EN_PASSANT:
+            changed.append(BoardCoordinates(move.start.row, move.end.col))
+        elif move.type == MoveType.CASTLING:
+            for col in CASTLING_ROOK_COLUMNS[move.end.col]:
+                changed.append(BoardCoordinates(move.end.row, col))
+
+        return changed
+
     def _make_move(self, move: ChessMove):
-        self._move_pawn(move)
         match move.type:
             case MoveType.EN_PASSANT:
                 self._make_en_passant_move(move)
+            case MoveType.CASTLING:
+                self._make_castling_move(move)
+            case MoveType.PROMOTION:
+                self._make_promotion_move(move)
             case _:
                 self._make_regular_move(move)
 
@@ -161,29 +533,48 @@ class Board:
         self._update_coord_piece(target_location, None)
         self._make_regular_move(move)
 
-    def _move_pawn(self, move: ChessMove):
-        moved_piece = self.state[move.start.letter_notation()]
-        if not isinstance(moved_piece, Pawn):
-            return
+    def _make_castling_move(self, move: ChessMove):
+        rook_start, rook_end = CASTLING_ROOK_COLUMNS[move.end.col]
+        self._make_regular_move(ChessMove(BoardCoordinates(move.end.row, rook_start),
+                                          BoardCoordinates(move.end.row, rook_end), MoveType.REGULAR))
+        self._make_regular_move(move)
 
-        self.previous_moved_pawn = move.end
+    def _make_promotion_move(self, move: ChessMove):
+        moved_piece = self.state[move.start.letter_notation()]
+        promoted = self._pieces[move.promotion if moved_piece.color == Color.WHITE else move.promotion.lower()]
 
-        moved_piece.pawn_is_moved(move)
+        self._update_coord_piece(move.start, None)
+        self._update_coord_piece(move.end, promoted)
 
-    def _reset_pawns(self):
-        if self.previous_moved_pawn is None:
+    def _update_castling(self, move: ChessMove, moved_piece: Piece):
+        """Castling rights are lost once the king moves, or a rook moves from or is captured on its corner"""
+        if not self.castling:
             return
 
-        for location, p in self.state.items():
-            if isinstance(p, Pawn) and parse_letter_coordinates(location) != self.previous_moved_pawn:
-                p.first_move = False
-
-    def _finish_move(self, moved_piece: Piece, target: Piece, start: BoardCoordinates, end: BoardCoordinates):
-        enemy = get_opponent(self.current_player)
-        self.current_player = enemy
-        self._reset_pawns()
-
-        self._print_move(moved_piece, target, start, end)
+        castling = self.castling
+        if isinstance(moved_piece, King):
+            rights = "KQ" if moved_piece.color == Color.WHITE else "kq"
+            castling = castling.replace(rights[0], "").replace(rights[1], "")
+        for square in (move.start, move.end):
+            right = CORNER_CASTLING_RIGHTS.get((square.row, square.col))
+            if right is not None:
+                castling = castling.replace(right, "")
+
+        if self._hash is not None and castling != self.castling:
+            self._hash ^= castling_key(self.castling) ^ castling_key(castling)
+        self.castling = castling
+
+    def _update_en_passant(self, move: ChessMove, moved_piece: Piece):
+        """After a pawn's double move, the square it passed over can be captured en passant"""
+        if self._hash is not None and self.en_passant is not None:
+            self._hash ^= EN_PASSANT_KEYS[self.en_passant.col]
+
+        if isinstance(moved_piece, Pawn) and abs(move.start.row - move.end.row) == 2:
+            self.en_passant = BoardCoordinates((move.start.row + move.end.row) // 2, move.start.col)
+            if self._hash is not None:
+                self._hash ^= EN_PASSANT_KEYS[self.en_passant.col]
+        else:
+            self.en_passant = None
 
     def _update_coord_piece(self, coord: BoardCoordinates, piece: Piece | None):
         """
@@ -191,6 +582,25 @@ class Board:
         If piece is `None`, the coordinate is unoccupied
         """
         pos = str(coord)
+        previous = self.state.get(pos)
+        if self._hash is not None:
+            if previous is not None:
+                self._hash ^= piece_key(previous.color, previous.abbreviation, coord.row, coord.col)
+            if piece is not None:
+                self._hash ^= piece_key(piece.color, piece.abbreviation, coord.row, coord.col)
+        if self._psqt is not None:
+            square = coord.index
+            if previous is not None:
+                index = PIECE_INDEXES[previous.symbol]
+                self._psqt -= PIECE_SQUARE_SCORES[index][square]
+                if index in PAWN_KEY_BITS:
+                    self._pawn_key ^= PAWN_KEY_BITS[index] << square
+            if piece is not None:
+                index = PIECE_INDEXES[piece.symbol]
+                self._psqt += PIECE_SQUARE_SCORES[index][square]
+                if index in PAWN_KEY_BITS:
+                    self._pawn_key ^= PAWN_KEY_BITS[index] << square
+
         if piece is None:
             del self.state[pos]
         else:
@@ -203,23 +613,5 @@ class Board:
             return None
         return self.state[coordinates]
 
-    def _print_move(self, moved_piece: Piece, target: Piece, source: BoardCoordinates, destination: BoardCoordinates):
-        abbr = moved_piece.abbreviation
-
-        if target is None:
-            movetext = abbr + destination.letter_notation().lower()
-        else:
-            movetext = abbr + "x" + destination.letter_notation()
-
-        print("move: " + movetext)
-
     def items(self):
         return self.state.items()
-
-    @staticmethod
-    def _get_rows(fen: str) -> list[str]:
-        return fen.split("/")
-
-    @staticmethod
-    def _is_cell_empty(val: str) -> bool:
-        return val == " "
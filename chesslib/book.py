@@ -0,0 +1,146 @@
+import mmap
+import os
+import random
+import struct
+
+from .constants import BOARD_SIZE
+from .utils import Color, BoardCoordinates, parse_letter_coordinates
+from .chess_move import MoveType, ChessMove
+from .polyglot_random import POLYGLOT_RANDOM
+
+# Book entries are 16 bytes, sorted by key: key, move, weight and learn data, big-endian
+ENTRY_FORMAT = struct.Struct(">QHHI")
+ENTRY_SIZE = ENTRY_FORMAT.size
+KEY_FORMAT = struct.Struct(">Q")
+
+PIECE_KINDS = "PNBRQK"
+PROMOTIONS = (None, "N", "B", "R", "Q")
+CASTLING_OFFSET = 768
+EN_PASSANT_OFFSET = 772
+TURN_OFFSET = 780
+# Polyglot writes castling as the king capturing its own rook, keyed by the king's and rook's columns
+CASTLING_MOVES = {(4, 7): 6, (4, 0): 2}
+
+
+class BookEntry:
+    def __init__(self, move: ChessMove, weight: int, learn: int):
+        self.move = move
+        self.weight = weight
+        self.learn = learn
+
+
+def polyglot_key(board) -> int:
+    """Position key as defined by the Polyglot book format, for any board with `items`, `castling` and `en_passant`"""
+    key = 0
+    for coordinates, piece in board.items():
+        square = parse_letter_coordinates(coordinates)
+        kind = 2 * PIECE_KINDS.index(piece.abbreviation) + (piece.color == Color.WHITE)
+        key ^= POLYGLOT_RANDOM[64 * kind + 8 * (BOARD_SIZE - 1 - square.row) + square.col]
+
+    for i, symbol in enumerate("KQkq"):
+        if symbol in board.castling:
+            key ^= POLYGLOT_RANDOM[CASTLING_OFFSET + i]
+
+    # The en passant file only counts when a pawn of the side to move can actually capture there
+    en_passant = board.en_passant
+    if en_passant is not None:
+        row = en_passant.row + (1 if board.current_player == Color.WHITE else -1)
+        for col in (en_passant.col - 1, en_passant.col + 1):
+            if 0 <= col < BOARD_SIZE:
+                piece = board.get_piece_at(BoardCoordinates(row, col))
+                if piece is not None and piece.abbreviation == "P" and piece.color == board.current_player:
+                    key ^= POLYGLOT_RANDOM[EN_PASSANT_OFFSET + en_passant.col]
+                    break
+
+    if board.current_player == Color.WHITE:
+        key ^= POLYGLOT_RANDOM[TURN_OFFSET]
+    return key
+
+
+def encode_book_move(move: ChessMove) -> int:
+    """Polyglot move encoding: destination file and rank, origin file and rank, then promotion, 3 bits each"""
+    start, end = move.start, move.end
+    end_col = end.col
+    if move.type == MoveType.CASTLING:
+        end_col = 7 if end.col == 6 else 0
+    promotion = PROMOTIONS.index(move.promotion)
+    return (end_col | (BOARD_SIZE - 1 - end.row) << 3 | start.col << 6 | (BOARD_SIZE - 1 - start.row) << 9
+            | promotion << 12)
+
+
+class OpeningBook:
+    """
+    Polyglot `.bin` opening book. The file is memory-mapped and binary-searched by position key, never read
+    into memory, so processes opening the same book share its pages through the page cache.
+    """
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            # An empty file cannot be mapped, but is a valid book with no entries
+            size = os.fstat(f.fileno()).st_size
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+        self.size = size // ENTRY_SIZE
+
+    def entries(self, board) -> list[BookEntry]:
+        """Book moves for the position, best weighted first. Entries that are not legal moves here are skipped."""
+        key = polyglot_key(board)
+        index = self._first_index(key)
+        if index == self.size:
+            return []
+
+        legal_moves = {(m.start, m.end, m.promotion): m for m in board.legal_moves()}
+        entries = []
+        while index < self.size:
+            entry_key, move, weight, learn = ENTRY_FORMAT.unpack_from(self.map, index * ENTRY_SIZE)
+            if entry_key != key:
+                break
+            legal_move = legal_moves.get(self._decode_move(board, move))
+            if legal_move is not None:
+                entries.append(BookEntry(legal_move, weight, learn))
+            index += 1
+
+        entries.sort(key=lambda e: e.weight, reverse=True)
+        return entries
+
+    def best_move(self, board) -> ChessMove | None:
+        entries = self.entries(board)
+        return entries[0].move if entries else None
+
+    def weighted_move(self, board, rng: random.Random | None = None) -> ChessMove | None:
+        """Pick a book move at random, in proportion to the entry weights"""
+        entries = [e for e in self.entries(board) if e.weight > 0]
+        if not entries:
+            return None
+        return (rng or random).choices([e.move for e in entries], [e.weight for e in entries])[0]
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _first_index(self, key: int) -> int:
+        """Index of the first entry with a key no lower than `key`"""
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if KEY_FORMAT.unpack_from(self.map, middle * ENTRY_SIZE)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @staticmethod
+    def _decode_move(board, move: int) -> tuple[BoardCoordinates, BoardCoordinates, str | None]:
+        start = BoardCoordinates(BOARD_SIZE - 1 - (move >> 9 & 0x7), move >> 6 & 0x7)
+        end = BoardCoordinates(BOARD_SIZE - 1 - (move >> 3 & 0x7), move & 0x7)
+        promotion = PROMOTIONS[move >> 12 & 0x7] if move >> 12 & 0x7 < len(PROMOTIONS) else None
+
+        piece = board.get_piece_at(start)
+        if piece is not None and piece.abbreviation == "K" and (start.col, end.col) in CASTLING_MOVES and start.row == end.row:
+            end = BoardCoordinates(end.row, CASTLING_MOVES[(start.col, end.col)])
+        return start, end, promotion
+
@@ -1,15 +1,76 @@
 from enum import Enum
 
-from chesslib.utils import BoardCoordinates
+from chesslib.utils import BoardCoordinates, SQUARES
 
 
 class MoveType(Enum):
     REGULAR = 1
     EN_PASSANT = 2
+    CASTLING = 3
+    PROMOTION = 4
+
+
+# Moves are packed as `start | end << 6 | move_type.value << 12 | promotion kind << 15`, squares numbered
+# `row * 8 + col` and promotion kinds indexed into `PIECE_ABBREVIATIONS` (0, a pawn, meaning no promotion)
+SQUARE_MASK = 0x3F
+TYPE_SHIFT = 12
+PROMOTION_SHIFT = 15
+PIECE_ABBREVIATIONS = "PNBRQK"
+MOVE_TYPES = (None,) + tuple(MoveType)
+PROMOTIONS = (None, "N", "B", "R", "Q")
 
 
 class ChessMove:
-    def __init__(self, start: BoardCoordinates, end: BoardCoordinates, type: MoveType):
-        self.start = start
-        self.end = end
-        self.type = type
+    """Immutable move, stored as a single packed int; `start`, `end`, `type` and `promotion` are unpacked on access"""
+    __slots__ = ("value",)
+
+    def __init__(self, start: BoardCoordinates, end: BoardCoordinates, type: MoveType, promotion: str | None = None):
+        value = start.index | end.index << 6 | type.value << TYPE_SHIFT
+        if promotion is not None:
+            value |= PIECE_ABBREVIATIONS.index(promotion) << PROMOTION_SHIFT
+        object.__setattr__(self, "value", value)
+
+    @classmethod
+    def from_int(cls, value: int) -> "ChessMove":
+        move = object.__new__(cls)
+        object.__setattr__(move, "value", value)
+        return move
+
+    @property
+    def start(self) -> BoardCoordinates:
+        return SQUARES[self.value & SQUARE_MASK]
+
+    @property
+    def end(self) -> BoardCoordinates:
+        return SQUARES[self.value >> 6 & SQUARE_MASK]
+
+    @property
+    def type(self) -> MoveType:
+        return MOVE_TYPES[self.value >> TYPE_SHIFT & 0x7]
+
+    @property
+    def promotion(self) -> str | None:
+        return PROMOTIONS[self.value >> PROMOTION_SHIFT]
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ChessMove is immutable")
+
+    def __reduce__(self):
+        return ChessMove.from_int, (self.value,)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ChessMove) and self.value == other.value
+
+    def __hash__(self) -> int:
+        return self.value
+
+    def __int__(self) -> int:
+        return self.value
+
+    def __repr__(self):
+        return f"ChessMove({self})"
+
+    def __str__(self):
+        """Coordinate notation, e.g. `e2e4` or `e7e8q`"""
+        promotion = self.promotion
+        return self.start.algebra_notation() + self.end.algebra_notation() + ("" if promotion is None else promotion.lower())
@@ -11,7 +11,11 @@ FEN_EN_PASSANT = 3
 FEN_HALFMOVE_CLOCK = 4
 FEN_FULLMOVE_NUMBER = 5
 
+PROMOTION_PIECES = ("Q", "R", "B", "N")
+
 
 class OutOfBoundsError(Exception): pass
 class InvalidPiece(Exception): pass
 class NotYourTurn(Exception): pass
+class InvalidFEN(Exception): pass
+class InvalidSAN(Exception): pass
@@ -0,0 +1,369 @@
+import argparse
+import time
+
+from .constants import INIT_FEN
+from .chess_move import MoveType, ChessMove
+from .board import Board
+from .bitboard import BitBoard
+from .book import OpeningBook
+from .evaluation import evaluate
+
+PIECE_VALUES = {"P": 100, "N": 320, "B": 330, "R": 500, "Q": 900, "K": 0}
+MATE_SCORE = 100000
+MAX_PLY = 64
+DEFAULT_DEPTH = 3
+DEFAULT_TABLE_SIZE = 1 << 18
+# How many nodes are searched between checks of the clock
+TIME_CHECK_INTERVAL = 1024
+
+# Transposition table bound types
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+# Move ordering scores, highest first
+TABLE_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 24
+KILLER_SCORES = (1 << 23, (1 << 23) - 1)
+
+
+class SearchTimeout(Exception): pass
+
+
+def move_key(move: ChessMove) -> int:
+    """Compact identity of a move, used by the transposition table, killer moves and history"""
+    return move.value
+
+
+def material(board) -> int:
+    """Material balance from the point of view of the player to move"""
+    score = 0
+    for _, piece in board.items():
+        value = PIECE_VALUES[piece.abbreviation]
+        score += value if piece.color == board.current_player else -value
+    return score
+
+
+def score_to_table(score: int, ply: int) -> int:
+    """Mate scores are stored relative to the node, not the root, so they stay valid in other positions"""
+    if score >= MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score - ply
+    return score
+
+
+def score_from_table(score: int, ply: int) -> int:
+    if score >= MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -MATE_SCORE + MAX_PLY:
+        return score + ply
+    return score
+
+
+class TranspositionTable:
+    """
+    Fixed-size table of search results indexed by position hash. A slot is overwritten when the new result
+    comes from a search at least as deep, or the stored one is left over from an earlier search.
+    """
+    def __init__(self, size: int = DEFAULT_TABLE_SIZE):
+        self.size = size
+        self.slots: list[tuple[int, int, int, int, int | None, int] | None] = [None] * size
+        self.generation = 0
+
+    def probe(self, key: int) -> tuple[int, int, int, int, int | None, int] | None:
+        """Stored `(key, depth, score, bound, move key, generation)` for the position, if any"""
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, score: int, bound: int, move: int | None):
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.slots[index] = (key, depth, score, bound, move, self.generation)
+
+    def new_search(self):
+        self.generation += 1
+
+    def clear(self):
+        self.slots = [None] * self.size
+
+
+class SearchResult:
+    def __init__(self, move: ChessMove | None, score: int, depth: int, nodes: int, elapsed: float,
+                 pv: list[ChessMove]):
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.pv = pv
+
+    def __str__(self):
+        nps = self.nodes / self.elapsed if self.elapsed > 0 else 0
+        pv = " ".join(map(str, self.pv))
+        return f"depth {self.depth} score {self.score} nodes {self.nodes} nps {nps:.0f} pv {pv}"
+
+
+class Searcher:
+    """Iterative-deepening alpha-beta search over any board with `legal_moves`, `push`, `pop` and `hash`"""
+    def __init__(self, board, table: TranspositionTable | None = None, evaluate=evaluate):
+        self.board = board
+        self.table = table if table is not None else TranspositionTable()
+        self.evaluate = evaluate
+        self.killers: list[list[int | None]] = [[None, None] for _ in range(MAX_PLY + 1)]
+        self.history: dict[int, int] = {}
+        self.nodes = 0
+        self.deadline: float | None = None
+        # Polled alongside the clock; returning True abandons the current iteration
+        self.should_stop = None
+        # Root moves after the first are rotated by this much, so parallel helpers start on different subtrees
+        self.root_rotation = 0
+        self._interruptible = False
+
+    def search(self, depth: int | None = None, time_limit: float | None = None, on_iteration=None,
+               start_depth: int = 1) -> SearchResult:
+        """
+        Search to `depth` plies, or deepen until `time_limit` seconds have passed, starting from `start_depth`.
+        The deepest completed iteration is returned. `on_iteration` is called with each iteration's `SearchResult`.
+        """
+        if depth is None and time_limit is None:
+            depth = DEFAULT_DEPTH
+
+        start = time.perf_counter()
+        base = len(self.board.move_stack)
+        self.table.new_search()
+        self.nodes = 0
+        self.deadline = None if time_limit is None else start + time_limit
+        self._interruptible = False
+        result = SearchResult(None, 0, 0, 0, 0.0, [])
+
+        for iteration in range(start_depth, (depth or MAX_PLY) + 1):
+            try:
+                score, move = self._search_root(iteration)
+            except SearchTimeout:
+                while len(self.board.move_stack) > base:
+                    self.board.pop()
+                break
+
+            result = SearchResult(move, score, iteration, self.nodes, time.perf_counter() - start,
+                                  self.principal_variation(iteration))
+            if on_iteration is not None:
+                on_iteration(result)
+            if move is None or abs(score) >= MATE_SCORE - MAX_PLY:
+                break
+            # The first iteration always completes, so there is a move to return
+            self._interruptible = True
+            if self._should_stop():
+                break
+
+        return result
+
+    def principal_variation(self, depth: int) -> list[ChessMove]:
+        """Follow best moves through the transposition table"""
+        pv = []
+        for _ in range(depth):
+            entry = self.table.probe(self.board.hash)
+            if entry is None or entry[4] is None:
+                break
+            move = next((m for m in self.board.legal_moves() if move_key(m) == entry[4]), None)
+            if move is None:
+                break
+            pv.append(move)
+            self.board.push(move)
+
+        for _ in pv:
+            self.board.pop()
+        return pv
+
+    def _search_root(self, depth: int) -> tuple[int, ChessMove | None]:
+        board = self.board
+        moves = board.legal_moves()
+        if not moves:
+            return self._no_moves_score(0), None
+
+        entry = self.table.probe(board.hash)
+        table_move = entry[4] if entry is not None else None
+        alpha, beta = -MATE_SCORE - 1, MATE_SCORE + 1
+        best_move = None
+        ordered = self._order_moves(moves, table_move, 0)
+        if self.root_rotation and len(ordered) > 2:
+            shift = self.root_rotation % (len(ordered) - 1)
+            ordered = ordered[:1] + ordered[1 + shift:] + ordered[1:1 + shift]
+        for move in ordered:
+            board.push(move)
+            score = -self._negamax(depth - 1, -beta, -alpha, 1)
+            board.pop()
+            if score > alpha:
+                alpha = score
+                best_move = move
+
+        self.table.store(board.hash, depth, score_to_table(alpha, 0), EXACT, move_key(best_move))
+        return alpha, best_move
+
+    def _negamax(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self._count_node()
+        board = self.board
+        key = board.hash
+
+        entry = self.table.probe(key)
+        table_move = None
+        if entry is not None:
+            table_move = entry[4]
+            if entry[1] >= depth:
+                score = score_from_table(entry[2], ply)
+                bound = entry[3]
+                if bound == EXACT or (bound == LOWER_BOUND and score >= beta) or (bound == UPPER_BOUND and score <= alpha):
+                    return score
+
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiescence(alpha, beta, ply)
+
+        moves = board.legal_moves()
+        if not moves:
+            return self._no_moves_score(ply)
+
+        original_alpha = alpha
+        best_score = -MATE_SCORE - 1
+        best_move = None
+        for move in self._order_moves(moves, table_move, ply):
+            board.push(move)
+            score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not self._is_tactical(move):
+                    self._record_cutoff(move, depth, ply)
+                break
+
+        if best_score <= original_alpha:
+            bound = UPPER_BOUND
+        elif best_score >= beta:
+            bound = LOWER_BOUND
+        else:
+            bound = EXACT
+        self.table.store(key, depth, score_to_table(best_score, ply), bound, move_key(best_move))
+        return best_score
+
+    def _quiescence(self, alpha: int, beta: int, ply: int) -> int:
+        """Search captures and promotions only, so the evaluation is never taken in the middle of an exchange"""
+        self._count_node()
+        board = self.board
+
+        stand_pat = self.evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+
+        captures = [m for m in board.legal_moves() if self._is_tactical(m)]
+        for move in sorted(captures, key=self._capture_score, reverse=True):
+            board.push(move)
+            score = -self._quiescence(-beta, -alpha, ply + 1)
+            board.pop()
+
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        return alpha
+
+    def _no_moves_score(self, ply: int) -> int:
+        """Checkmated, scored so that quicker mates are preferred, or stalemated"""
+        if self.board.check_validator(self.board.current_player):
+            return -MATE_SCORE + ply
+        return 0
+
+    def _order_moves(self, moves: list[ChessMove], table_move: int | None, ply: int) -> list[ChessMove]:
+        killers = self.killers[ply]
+
+        def score(move: ChessMove) -> int:
+            key = move_key(move)
+            if key == table_move:
+                return TABLE_MOVE_SCORE
+            if self._is_tactical(move):
+                return CAPTURE_SCORE + self._capture_score(move)
+            if key == killers[0]:
+                return KILLER_SCORES[0]
+            if key == killers[1]:
+                return KILLER_SCORES[1]
+            return self.history.get(key, 0)
+
+        return sorted(moves, key=score, reverse=True)
+
+    def _is_tactical(self, move: ChessMove) -> bool:
+        return move.type in (MoveType.EN_PASSANT, MoveType.PROMOTION) or self.board.get_piece_at(move.end) is not None
+
+    def _capture_score(self, move: ChessMove) -> int:
+        """Most valuable victim first, then least valuable attacker (MVV-LVA)"""
+        victim = self.board.get_piece_at(move.end)
+        victim_value = PIECE_VALUES["P"] if victim is None else PIECE_VALUES[victim.abbreviation]
+        if move.promotion is not None:
+            victim_value += PIECE_VALUES[move.promotion]
+        attacker = self.board.get_piece_at(move.start)
+        return victim_value * 10 - PIECE_VALUES[attacker.abbreviation] // 10
+
+    def _record_cutoff(self, move: ChessMove, depth: int, ply: int):
+        """A quiet move that caused a beta cutoff is tried early in sibling nodes and elsewhere in the tree"""
+        key = move_key(move)
+        killers = self.killers[ply]
+        if killers[0] != key:
+            killers[1] = killers[0]
+            killers[0] = key
+        self.history[key] = self.history.get(key, 0) + depth * depth
+
+    def _count_node(self):
+        self.nodes += 1
+        if self._interruptible and self.nodes % TIME_CHECK_INTERVAL == 0 and self._should_stop():
+            raise SearchTimeout
+
+    def _should_stop(self) -> bool:
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            return True
+        return self.should_stop is not None and self.should_stop()
+
+
+def search(board, depth: int | None = None, time_limit: float | None = None,
+           table: TranspositionTable | None = None) -> SearchResult:
+    """Find the best move for the player to move. The board is left as it was."""
+    return Searcher(board, table).search(depth, time_limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search a position for the best move")
+    parser.add_argument("--fen", default=INIT_FEN, help="position to search")
+    parser.add_argument("--depth", type=int, help="number of plies to search")
+    parser.add_argument("--time", type=float, help="seconds to search for")
+    parser.add_argument("--backend", choices=("board", "bitboard"), default="bitboard")
+    parser.add_argument("--workers", type=int, default=1, help="search in this many processes (Lazy SMP)")
+    parser.add_argument("--book", help="Polyglot opening book to play from before searching")
+    args = parser.parse_args()
+
+    board = BitBoard() if args.backend == "bitboard" else Board()
+    board.load(args.fen)
+
+    if args.book is not None:
+        with OpeningBook(args.book) as book:
+            move = book.weighted_move(board)
+        if move is not None:
+            print(f"bestmove {move} (book)")
+            return
+
+    if args.workers > 1:
+        # Imported here because the parallel module builds on this one
+        from .parallel import parallel_search
+        result = parallel_search(board, args.depth, args.time, args.workers)
+        print(result)
+    else:
+        result = Searcher(board).search(args.depth, args.time, on_iteration=print)
+    print(f"bestmove {result.move}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+from .utils import Color
+
+# Scores are in centipawns. A midgame score, an endgame score and a game phase are packed into one int,
+# `mg + (eg << 20) + (phase << 40)`, so a piece's whole contribution is added or removed with one addition.
+# The packing is linear, so packed scores can be summed and negated freely while each part stays below 2 ** 19.
+PHASE_SHIFT = 40
+EG_SHIFT = 20
+HALF_FIELD = 1 << 19
+# Phase of the starting position; more material than that still counts as a pure midgame
+MAX_PHASE = 24
+DEFAULT_PAWN_TABLE_SIZE = 1 << 14
+# Pawn keys differ in few, clustered bits, so slots are picked by Fibonacci hashing of the key
+FIBONACCI_MULTIPLIER = 0x9E3779B97F4A7C15
+
+
+def pack(mg: int, eg: int, phase: int = 0) -> int:
+    return mg + (eg << EG_SHIFT) + (phase << PHASE_SHIFT)
+
+
+def unpack(packed: int) -> tuple[int, int, int]:
+    """`(mg, eg, phase)` of a packed score"""
+    upper = (packed + HALF_FIELD) >> EG_SHIFT
+    mg = packed - (upper << EG_SHIFT)
+    phase = (upper + HALF_FIELD) >> EG_SHIFT
+    return mg, upper - (phase << EG_SHIFT), phase
+
+
+def taper(packed: int) -> int:
+    """Blend the midgame and endgame scores by how much material is left"""
+    mg, eg, phase = unpack(packed)
+    phase = min(phase, MAX_PHASE)
+    blended = mg * phase + eg * (MAX_PHASE - phase)
+    # Rounded towards zero, so a position and its mirror image score the same for the side to move
+    return blended // MAX_PHASE if blended >= 0 else -(-blended // MAX_PHASE)
+
+
+# Indexed by kind, in bitboard order: pawn, knight, bishop, rook, queen, king
+MG_VALUES = (82, 337, 365, 477, 1025, 0)
+EG_VALUES = (94, 281, 297, 512, 936, 0)
+PHASE_WEIGHTS = (0, 1, 1, 2, 4, 0)
+
+# Piece-square tables for white, indexed by square `row * 8 + col` (A8 first), from the PeSTO evaluation
+MG_TABLES = (
+    (0, 0, 0, 0, 0, 0, 0, 0,
+     98, 134, 61, 95, 68, 126, 34, -11,
+     -6, 7, 26, 31, 65, 56, 25, -20,
+     -14, 13, 6, 21, 23, 12, 17, -23,
+     -27, -2, -5, 12, 17, 6, 10, -25,
+     -26, -4, -4, -10, 3, 3, 33, -12,
+     -35, -1, -20, -23, -15, 24, 38, -22,
+     0, 0, 0, 0, 0, 0, 0, 0),
+    (-167, -89, -34, -49, 61, -97, -15, -107,
+     -73, -41, 72, 36, 23, 62, 7, -17,
+     -47, 60, 37, 65, 84, 129, 73, 44,
+     -9, 17, 19, 53, 37, 69, 18, 22,
+     -13, 4, 16, 13, 28, 19, 21, -8,
+     -23, -9, 12, 10, 19, 17, 25, -16,
+     -29, -53, -12, -3, -1, 18, -14, -19,
+     -105, -21, -58, -33, -17, -28, -19, -23),
+    (-29, 4, -82, -37, -25, -42, 7, -8,
+     -26, 16, -18, -13, 30, 59, 18, -47,
+     -16, 37, 43, 40, 35, 50, 37, -2,
+     -4, 5, 19, 50, 37, 37, 7, -2,
+     -6, 13, 13, 26, 34, 12, 10, 4,
+     0, 15, 15, 15, 14, 27, 18, 10,
+     4, 15, 16, 0, 7, 21, 33, 1,
+     -33, -3, -14, -21, -13, -12, -39, -21),
+    (32, 42, 32, 51, 63, 9, 31, 43,
+     27, 32, 58, 62, 80, 67, 26, 44,
+     -5, 19, 26, 36, 17, 45, 61, 16,
+     -24, -11, 7, 26, 24, 35, -8, -20,
+     -36, -26, -12, -1, 9, -7, 6, -23,
+     -45, -25, -16, -17, 3, 0, -5, -33,
+     -44, -16, -20, -9, -1, 11, -6, -71,
+     -19, -13, 1, 17, 16, 7, -37, -26),
+    (-28, 0, 29, 12, 59, 44, 43, 45,
+     -24, -39, -5, 1, -16, 57, 28, 54,
+     -13, -17, 7, 8, 29, 56, 47, 57,
+     -27, -27, -16, -16, -1, 17, -2, 1,
+     -9, -26, -9, -10, -2, -4, 3, -3,
+     -14, 2, -11, -2, -5, 2, 14, 5,
+     -35, -8, 11, 2, 8, 15, -3, 1,
+     -1, -18, -9, 10, -15, -25, -31, -50),
+    (-65, 23, 16, -15, -56, -34, 2, 13,
+     29, -1, -20, -7, -8, -4, -38, -29,
+     -9, 24, 2, -16, -20, 6, 22, -22,
+     -17, -20, -12, -27, -30, -25, -14, -36,
+     -49, -1, -27, -39, -46, -44, -33, -51,
+     -14, -14, -22, -46, -44, -30, -15, -27,
+     1, 7, -8, -64, -43, -16, 9, 8,
+     -15, 36, 12, -54, 8, -28, 24, 14),
+)
+EG_TABLES = (
+    (0, 0, 0, 0, 0, 0, 0, 0,
+     178, 173, 158, 134, 147, 132, 165, 187,
+     94, 100, 85, 67, 56, 53, 82, 84,
+     32, 24, 13, 5, -2, 4, 17, 17,
+     13, 9, -3, -7, -7, -8, 3, -1,
+     4, 7, -6, 1, 0, -5, -1, -8,
+     13, 8, 8, 10, 13, 0, 2, -7,
+     0, 0, 0, 0, 0, 0, 0, 0),
+    (-58, -38, -13, -28, -31, -27, -63, -99,
+     -25, -8, -25, -2, -9, -25, -24, -52,
+     -24, -20, 10, 9, -1, -9, -19, -41,
+     -17, 3, 22, 22, 22, 11, 8, -18,
+     -18, -6, 16, 25, 16, 17, 4, -18,
+     -23, -3, -1, 15, 10, -3, -20, -22,
+     -42, -20, -10, -5, -2, -20, -23, -44,
+     -29, -51, -23, -15, -22, -18, -50, -64),
+    (-14, -21, -11, -8, -7, -9, -17, -24,
+     -8, -4, 7, -12, -3, -13, -4, -14,
+     2, -8, 0, -1, -2, 6, 0, 4,
+     -3, 9, 12, 9, 14, 10, 3, 2,
+     -6, 3, 13, 19, 7, 10, -3, -9,
+     -12, -3, 8, 10, 13, 3, -7, -15,
+     -14, -18, -7, -1, 4, -9, -15, -27,
+     -23, -9, -23, -5, -9, -16, -5, -17),
+    (13, 10, 18, 15, 12, 12, 8, 5,
+     11, 13, 13, 11, -3, 3, 8, 3,
+     7, 7, 7, 5, 4, -3, -5, -3,
+     4, 3, 13, 1, 2, 1, -1, 2,
+     3, 5, 8, 4, -5, -6, -8, -11,
+     -4, 0, -5, -1, -7, -12, -8, -16,
+     -6, -6, 0, 2, -9, -9, -11, -3,
+     -9, 2, 3, -1, -5, -13, 4, -20),
+    (-9, 22, 22, 27, 27, 19, 10, 20,
+     -17, 20, 32, 41, 58, 25, 30, 0,
+     -20, 6, 9, 49, 47, 35, 19, 9,
+     3, 22, 24, 45, 57, 40, 57, 36,
+     -18, 28, 19, 47, 31, 34, 39, 23,
+     -16, -27, 15, 6, 9, 17, 10, 5,
+     -22, -23, -30, -16, -16, -23, -36, -32,
+     -33, -28, -22, -43, -5, -32, -20, -41),
+    (-74, -35, -18, -18, -11, 15, 4, -17,
+     -12, 17, 14, 17, 17, 38, 23, 11,
+     10, 17, 23, 15, 20, 45, 44, 13,
+     -8, 22, 24, 27, 26, 33, 26, 3,
+     -18, -4, 21, 24, 27, 23, 9, -11,
+     -19, -3, 11, 21, 23, 16, 7, -9,
+     -27, -11, 4, 13, 14, 4, -5, -17,
+     -53, -34, -21, -11, -28, -14, -24, -43),
+)
+
+
+def _piece_square_scores() -> list[list[int]]:
+    """Packed material, piece-square and phase score of each piece on each square, positive for white"""
+    tables = []
+    for color in (Color.BLACK, Color.WHITE):
+        for kind in range(6):
+            table = []
+            for square in range(64):
+                # Black reads the white tables with the ranks mirrored
+                relative = square if color == Color.WHITE else square ^ 56
+                sign = 1 if color == Color.WHITE else -1
+                table.append(pack(sign * (MG_VALUES[kind] + MG_TABLES[kind][relative]),
+                                  sign * (EG_VALUES[kind] + EG_TABLES[kind][relative]), PHASE_WEIGHTS[kind]))
+            tables.append(table)
+    return tables
+
+
+# Indexed by `color.value * 6 + kind` (the bitboard piece index), then by square, like the Zobrist keys.
+# Boards keep the sum over their pieces up to date as moves are pushed and popped.
+PIECE_SQUARE_SCORES = _piece_square_scores()
+
+# Pawn structure, per pawn
+DOUBLED_PAWN = pack(-10, -20)
+ISOLATED_PAWN = pack(-5, -15)
+# Passed pawn bonus by how many rows the pawn has advanced from its own back row
+PASSED_PAWN = tuple(pack(mg, eg) for mg, eg in ((0, 0), (0, 10), (5, 15), (10, 25), (20, 45), (35, 80), (60, 130), (0, 0)))
+# Per square a knight, bishop, rook or queen attacks that is not taken by its own side
+MOBILITY = pack(4, 3)
+# Per attack on the squares around the enemy king, and per pawn sheltering the own king; midgame only
+KING_ZONE_ATTACK = pack(12, 0)
+PAWN_SHIELD = pack(12, 0)
+
+FILES = [sum(1 << (row * 8 + col) for row in range(8)) for col in range(8)]
+ADJACENT_FILES = [(FILES[col - 1] if col > 0 else 0) | (FILES[col + 1] if col < 7 else 0) for col in range(8)]
+
+
+def _ahead_masks(color: Color) -> list[int]:
+    """Squares on the same and adjacent files in front of a pawn of `color` on each square"""
+    masks = []
+    for square in range(64):
+        row, col = divmod(square, 8)
+        rows = range(row) if color == Color.WHITE else range(row + 1, 8)
+        files = FILES[col] | ADJACENT_FILES[col]
+        masks.append(files & sum(0xFF << (r * 8) for r in rows))
+    return masks
+
+
+def _shield_masks(color: Color) -> list[int]:
+    """The two rows of squares in front of a king of `color` on each square, on its own and adjacent files"""
+    masks = []
+    step = -1 if color == Color.WHITE else 1
+    for square in range(64):
+        row, col = divmod(square, 8)
+        mask = 0
+        for r in (row + step, row + 2 * step):
+            for c in (col - 1, col, col + 1):
+                if 0 <= r < 8 and 0 <= c < 8:
+                    mask |= 1 << (r * 8 + c)
+        masks.append(mask)
+    return masks
+
+
+# Indexed by color value
+PASSED_MASKS = (_ahead_masks(Color.BLACK), _ahead_masks(Color.WHITE))
+SHIELD_MASKS = (_shield_masks(Color.BLACK), _shield_masks(Color.WHITE))
+PAWN_KEY_MASK = (1 << 64) - 1
+
+
+def pawn_key(white_pawns: int, black_pawns: int) -> int:
+    """The pawns of both sides as one int; it identifies the pawn structure exactly, so it needs no hashing"""
+    return white_pawns | black_pawns << 64
+
+
+def position_scores(board) -> tuple[int, int]:
+    """Packed piece-square score and pawn key of a position from scratch; boards keep theirs up to date incrementally"""
+    score = 0
+    pawns = [0, 0]
+    for color in (Color.BLACK, Color.WHITE):
+        for location in board.occupied(color):
+            piece = board.get_piece_at(location)
+            kind = "PNBRQK".index(piece.abbreviation)
+            score += PIECE_SQUARE_SCORES[color.value * 6 + kind][location.index]
+            if kind == 0:
+                pawns[color.value] |= 1 << location.index
+    return score, pawn_key(pawns[Color.WHITE.value], pawns[Color.BLACK.value])
+
+
+def _bits(bitboard: int):
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+
+def pawn_structure(key: int) -> int:
+    """Packed doubled, isolated and passed pawn score of a pawn structure, positive for white"""
+    # Indexed by color value
+    pawns = (key >> 64, key & PAWN_KEY_MASK)
+    score = 0
+    for side, sign in ((Color.WHITE.value, 1), (Color.BLACK.value, -1)):
+        own, enemy = pawns[side], pawns[side ^ 1]
+        passed_masks = PASSED_MASKS[side]
+        for col in range(8):
+            count = (own & FILES[col]).bit_count()
+            if count > 1:
+                score += sign * (count - 1) * DOUBLED_PAWN
+            if count and not own & ADJACENT_FILES[col]:
+                score += sign * count * ISOLATED_PAWN
+        for square in _bits(own):
+            if not enemy & passed_masks[square]:
+                row = square >> 3
+                score += sign * PASSED_PAWN[7 - row if side == Color.WHITE.value else row]
+    return score
+
+
+class PawnTable:
+    """
+    Fixed-size cache of pawn structure scores by pawn key; a slot holds the last structure stored in it.
+    Sizes up to 2 ** 24 slots are spread evenly.
+    """
+    def __init__(self, size: int = DEFAULT_PAWN_TABLE_SIZE):
+        self.size = size
+        self.keys: list[int | None] = [None] * size
+        self.scores: list[int] = [0] * size
+        self.hits = 0
+        self.misses = 0
+
+    def score(self, key: int) -> int:
+        index = ((hash(key) * FIBONACCI_MULTIPLIER & 0xFFFFFFFFFFFFFFFF) >> 40) % self.size
+        if self.keys[index] == key:
+            self.hits += 1
+            return self.scores[index]
+
+        self.misses += 1
+        score = pawn_structure(key)
+        self.keys[index] = key
+        self.scores[index] = score
+        return score
+
+    def clear(self):
+        self.keys = [None] * self.size
+
+
+class Evaluator:
+    """
+    Static evaluation for any board with `psqt`, `pawn_key`, `mobility` and `find_piece`, from the point of
+    view of the player to move. Material and piece-square scores come from the board, which updates them as
+    moves are made; pawn structure is cached by pawn key. Calling an evaluator evaluates a board.
+    """
+    def __init__(self, pawn_table: PawnTable | None = None):
+        self.pawn_table = pawn_table if pawn_table is not None else PawnTable()
+
+    def __call__(self, board) -> int:
+        key = board.pawn_key
+        score = board.psqt + self.pawn_table.score(key)
+
+        pawns = (key >> 64, key & PAWN_KEY_MASK)
+        for color, sign in ((Color.WHITE, 1), (Color.BLACK, -1)):
+            mobility, king_attacks = board.mobility(color)
+            score += sign * (mobility * MOBILITY + king_attacks * KING_ZONE_ATTACK)
+            king = board.find_piece("K", color)
+            if king is not None:
+                shelter = pawns[color.value] & SHIELD_MASKS[color.value][king.index]
+                score += sign * shelter.bit_count() * PAWN_SHIELD
+
+        score = taper(score)
+        return score if board.current_player == Color.WHITE else -score
+
+
+# Shared by searches that are not given their own evaluation
+evaluate = Evaluator()
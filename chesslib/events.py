@@ -0,0 +1,88 @@
+from enum import Enum
+from typing import Callable
+
+from .utils import Color
+from .termination import Termination
+
+
+class Event(Enum):
+    """
+    Things a board reports to its subscribers, with the arguments callbacks receive after the board:
+    `MOVE_MADE` (move, SAN), `ILLEGAL_MOVE` (start, end, reason), `CHECK` and `CHECKMATE` (player in check),
+    `DRAW` (termination)
+    """
+    MOVE_MADE = 1
+    ILLEGAL_MOVE = 2
+    CHECK = 3
+    CHECKMATE = 4
+    DRAW = 5
+
+
+class IllegalMoveReason(Enum):
+    ILLEGAL = "Illegal move"
+    KING_IN_CHECK = "You're in check!"
+
+
+class EventSource:
+    """
+    Subscriptions for the boards. Events are only raised by `move`, never by `push` or move generation, and
+    anything an event needs, such as the SAN of a move, is only worked out when someone subscribed to it.
+    """
+    listeners: dict[Event, list[Callable]]
+
+    def subscribe(self, event: Event, callback: Callable) -> Callable:
+        """Call `callback(board, ...)` on every `event`. Returns `callback`, so this can be used as a decorator."""
+        self.listeners.setdefault(event, []).append(callback)
+        return callback
+
+    def unsubscribe(self, event: Event, callback: Callable):
+        callbacks = self.listeners.get(event, [])
+        callbacks.remove(callback)
+        if not callbacks:
+            del self.listeners[event]
+
+    def _emit(self, event: Event, *args):
+        for callback in self.listeners.get(event, ()):
+            callback(self, *args)
+
+    def _announce_move(self, move, movetext: str | None):
+        """Raise the events following a move made through `move`, once it has been pushed"""
+        listeners = self.listeners
+        if Event.MOVE_MADE in listeners:
+            self._emit(Event.MOVE_MADE, move, movetext)
+        if Event.CHECK in listeners or Event.CHECKMATE in listeners:
+            player = self.current_player
+            if self.check_validator(player):
+                self._emit(Event.CHECK, player)
+                if Event.CHECKMATE in listeners and self.is_checkmate(player):
+                    self._emit(Event.CHECKMATE, player)
+        if Event.DRAW in listeners:
+            termination = self.termination()
+            if termination is not None and termination.is_draw:
+                self._emit(Event.DRAW, termination)
+
+
+def _print_move(board, move, movetext: str):
+    print("move: " + movetext)
+
+
+def _print_illegal_move(board, start, end, reason: IllegalMoveReason):
+    print(reason.value)
+
+
+def _print_checkmate(board, player: Color):
+    print("Checkmate! Game Over.")
+
+
+def _print_draw(board, termination: Termination):
+    print(f"Draw by {termination.value}. Game Over.")
+
+
+PRINTERS = {Event.MOVE_MADE: _print_move, Event.ILLEGAL_MOVE: _print_illegal_move, Event.CHECKMATE: _print_checkmate,
+            Event.DRAW: _print_draw}
+
+
+def print_events(board, events=tuple(PRINTERS)):
+    """Print moves, illegal move reasons, checkmate and draws to the console, as a command line game would"""
+    for event in events:
+        board.subscribe(event, PRINTERS[event])
@@ -0,0 +1,135 @@
+import argparse
+import time
+from typing import Iterator, Sequence
+
+from .constants import (BOARD_SIZE, FEN_PLAYER_TURN, FEN_CASTLING, FEN_EN_PASSANT, FEN_HALFMOVE_CLOCK,
+                        FEN_FULLMOVE_NUMBER, InvalidFEN)
+from .utils import Color, BoardCoordinates, SQUARES, ALGEBRA_NOTATIONS
+
+PIECE_SYMBOLS = frozenset("pnbrqkPNBRQK")
+CASTLING_SYMBOLS = "KQkq"
+# Only squares on the third and sixth ranks can be en passant targets
+EN_PASSANT_SQUARES = {ALGEBRA_NOTATIONS[s.index]: s for s in SQUARES if s.row in (2, 5)}
+
+
+def iter_placement(placement: str) -> Iterator[tuple[int, str]]:
+    """Squares (numbered `row * 8 + col`) and piece symbols of a FEN placement field, read in a single pass"""
+    ranks = placement.count("/") + 1
+    if ranks != BOARD_SIZE:
+        raise InvalidFEN(f"expected {BOARD_SIZE} ranks, got {ranks}")
+
+    row = col = 0
+    for letter in placement:
+        if letter == "/":
+            if col != BOARD_SIZE:
+                raise InvalidFEN(f"rank {BOARD_SIZE - row} is not {BOARD_SIZE} squares wide")
+            row += 1
+            col = 0
+        elif "1" <= letter <= "8":
+            col += ord(letter) - ord("0")
+        elif letter in PIECE_SYMBOLS:
+            if col >= BOARD_SIZE:
+                raise InvalidFEN(f"rank {BOARD_SIZE - row} is not {BOARD_SIZE} squares wide")
+            yield row * BOARD_SIZE + col, letter
+            col += 1
+        else:
+            raise InvalidFEN(f"unknown piece {letter!r}")
+
+    if col != BOARD_SIZE:
+        raise InvalidFEN(f"rank 1 is not {BOARD_SIZE} squares wide")
+
+
+def parse_fields(fields: list[str]) -> tuple[Color, str, BoardCoordinates | None, int, int]:
+    """
+    Side to move, castling rights, en passant square, halfmove clock and fullmove number of a split FEN.
+    Missing trailing fields take the values of a fresh game.
+    """
+    if len(fields) <= FEN_PLAYER_TURN:
+        raise InvalidFEN("missing side to move")
+    if fields[FEN_PLAYER_TURN] == "w":
+        player = Color.WHITE
+    elif fields[FEN_PLAYER_TURN] == "b":
+        player = Color.BLACK
+    else:
+        raise InvalidFEN(f"unknown side to move {fields[FEN_PLAYER_TURN]!r}")
+
+    castling = fields[FEN_CASTLING] if len(fields) > FEN_CASTLING else "-"
+    if castling == "-":
+        castling = ""
+    elif castling.strip(CASTLING_SYMBOLS) or len(set(castling)) != len(castling):
+        raise InvalidFEN(f"bad castling field {castling!r}")
+
+    en_passant = None
+    if len(fields) > FEN_EN_PASSANT and fields[FEN_EN_PASSANT] != "-":
+        en_passant = EN_PASSANT_SQUARES.get(fields[FEN_EN_PASSANT])
+        if en_passant is None:
+            raise InvalidFEN(f"bad en passant square {fields[FEN_EN_PASSANT]!r}")
+
+    try:
+        halfmove_clock = int(fields[FEN_HALFMOVE_CLOCK]) if len(fields) > FEN_HALFMOVE_CLOCK else 0
+        fullmove_number = int(fields[FEN_FULLMOVE_NUMBER]) if len(fields) > FEN_FULLMOVE_NUMBER else 1
+    except ValueError:
+        raise InvalidFEN("move counters must be numbers")
+
+    return player, "".join(s for s in CASTLING_SYMBOLS if s in castling), en_passant, halfmove_clock, fullmove_number
+
+
+def format_fen(symbols: Sequence[str | None], player: Color, castling: str, en_passant: BoardCoordinates | None,
+               halfmove_clock: int, fullmove_number: int) -> str:
+    """Build a FEN from the piece symbol (or `None`) on each square, numbered `row * 8 + col`"""
+    ranks = []
+    for row in range(0, BOARD_SIZE * BOARD_SIZE, BOARD_SIZE):
+        rank = ""
+        empty = 0
+        for symbol in symbols[row:row + BOARD_SIZE]:
+            if symbol is None:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            rank += symbol
+        ranks.append(rank + str(empty) if empty else rank)
+
+    side = "w" if player == Color.WHITE else "b"
+    en_passant_field = "-" if en_passant is None else en_passant.algebra_notation()
+    return f"{'/'.join(ranks)} {side} {castling or '-'} {en_passant_field} {halfmove_clock} {fullmove_number}"
+
+
+def benchmark(backend, fens: list[str], iterations: int) -> tuple[float, float]:
+    """Seconds per `load` and per `fen` call, averaged over `iterations` passes over `fens`"""
+    board = backend()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for fen in fens:
+            board.load(fen)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for fen in fens:
+            board.load(fen)
+            board.fen()
+    export_time = time.perf_counter() - start - load_time
+
+    calls = iterations * len(fens)
+    return load_time / calls, export_time / calls
+
+
+def main():
+    # Imported here because both backends build on this module
+    from .perft import BACKENDS, REFERENCE_POSITIONS
+
+    parser = argparse.ArgumentParser(description="Time FEN loading and export on the reference positions")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--backend", choices=BACKENDS, action="append", help="backend to time, all by default")
+    args = parser.parse_args()
+
+    fens = [fen for fen, _ in REFERENCE_POSITIONS.values()]
+    for name in args.backend or BACKENDS:
+        load_time, export_time = benchmark(BACKENDS[name], fens, args.iterations)
+        print(f"{name}: load {load_time * 1e6:.1f}us  fen {export_time * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    main()
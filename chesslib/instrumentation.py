@@ -0,0 +1,175 @@
+import argparse
+import json
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Iterator
+
+from .constants import INIT_FEN
+from .board import Board
+from .bitboard import BitBoard
+from .engine import Searcher
+from .piece import Pawn, Knight, Bishop, Rook, Queen, King
+
+BACKENDS = {"board": Board, "bitboard": BitBoard}
+
+# Methods timed while instrumentation is enabled, as (class, method, whether it returns a list of moves to count).
+# Positions are never copied; pushing and popping moves is what stands in for copies, so those are counted too.
+STAGES = [
+    (Board, "move", False), (Board, "_valid_move", False), (Board, "_is_in_check", False),
+    (Board, "check_validator", False), (Board, "is_checkmate", False), (Board, "occupied", False),
+    (Board, "legal_moves", True), (Board, "push", False), (Board, "pop", False),
+    (BitBoard, "move", False), (BitBoard, "_valid_move", False), (BitBoard, "_leaves_king_attacked", False),
+    (BitBoard, "check_validator", False), (BitBoard, "is_checkmate", False), (BitBoard, "occupied", False),
+    (BitBoard, "legal_moves", True), (BitBoard, "_generate_moves", True), (BitBoard, "_push", False),
+    (BitBoard, "_pop", False),
+] + [(piece, "possible_moves", True) for piece in (Pawn, Knight, Bishop, Rook, Queen, King)]
+
+
+def _stage_name(owner: type, name: str) -> str:
+    return f"{owner.__name__}.{name}"
+
+
+class StageStats:
+    def __init__(self):
+        self.calls = 0
+        # Moves returned, for stages that generate moves
+        self.items = 0
+        self.nanoseconds = 0
+
+    @property
+    def seconds(self) -> float:
+        return self.nanoseconds / 1e9
+
+    def to_dict(self) -> dict:
+        return {"calls": self.calls, "items": self.items, "seconds": self.seconds}
+
+
+class Instrumentation:
+    """
+    Call counts, moves generated and cumulative time of each stage in `STAGES`, named like `Board.move`.
+    Times include the stages called from a stage. Counts are not locked, so they are approximate when
+    several threads use boards at once.
+    """
+    def __init__(self):
+        self.stages = {_stage_name(owner, name): StageStats() for owner, name, _ in STAGES}
+
+    def reset(self):
+        for stage in self.stages.values():
+            stage.calls = stage.items = stage.nanoseconds = 0
+
+    def to_dict(self) -> dict:
+        """Stages that were called, by name"""
+        return {name: stage.to_dict() for name, stage in self.stages.items() if stage.calls}
+
+    def to_json(self) -> str:
+        return json.dumps({"enabled": enabled(), "stages": self.to_dict()})
+
+    def to_prometheus(self, prefix: str = "chesslib") -> str:
+        """The counters in the Prometheus text exposition format"""
+        lines = []
+        called = {name: stage for name, stage in self.stages.items() if stage.calls}
+        for metric, help_text, value in (
+                ("stage_calls_total", "Calls of each instrumented stage", lambda s: s.calls),
+                ("stage_moves_total", "Moves generated by each instrumented stage", lambda s: s.items),
+                ("stage_seconds_total", "Time spent in each instrumented stage", lambda s: s.seconds)):
+            lines.append(f"# HELP {prefix}_{metric} {help_text}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for name, stage in called.items():
+                lines.append(f'{prefix}_{metric}{{stage="{name}"}} {value(stage)}')
+        return "\n".join(lines) + "\n"
+
+    def report(self) -> str:
+        """A table of the stages that were called, slowest first"""
+        rows = sorted(self.to_dict().items(), key=lambda item: item[1]["seconds"], reverse=True)
+        lines = [f"{'stage':<32}{'calls':>12}{'moves':>12}{'seconds':>10}{'us/call':>10}"]
+        for name, stage in rows:
+            lines.append(f"{name:<32}{stage['calls']:>12}{stage['items']:>12}{stage['seconds']:>10.3f}"
+                         f"{stage['seconds'] / stage['calls'] * 1e6:>10.2f}")
+        return "\n".join(lines)
+
+
+# Counters filled while instrumentation is enabled
+stats = Instrumentation()
+# Methods replaced by `enable`, by (class, name), so `disable` can put them back
+_originals: dict[tuple[type, str], object] = {}
+
+
+def _timed(function, stage: StageStats, counts_items: bool):
+    perf_counter_ns = time.perf_counter_ns
+
+    if counts_items:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            result = function(*args, **kwargs)
+            stage.nanoseconds += perf_counter_ns() - start
+            stage.calls += 1
+            stage.items += len(result)
+            return result
+    else:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stage.nanoseconds += perf_counter_ns() - start
+                stage.calls += 1
+    return wrapper
+
+
+def enable(instrumentation: Instrumentation | None = None):
+    """
+    Replace every method in `STAGES` with a timed version counting into `instrumentation`, by default `stats`.
+    While disabled, the original methods are in place, so instrumentation costs nothing.
+    """
+    instrumentation = instrumentation if instrumentation is not None else stats
+    disable()
+    for owner, name, counts_items in STAGES:
+        function = owner.__dict__[name]
+        _originals[(owner, name)] = function
+        setattr(owner, name, _timed(function, instrumentation.stages[_stage_name(owner, name)], counts_items))
+
+
+def disable():
+    for (owner, name), function in _originals.items():
+        setattr(owner, name, function)
+    _originals.clear()
+
+
+def enabled() -> bool:
+    return bool(_originals)
+
+
+@contextmanager
+def instrumented(instrumentation: Instrumentation | None = None) -> Iterator[Instrumentation]:
+    """Enable instrumentation for a `with` block, counting into fresh counters unless given some"""
+    instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+    enable(instrumentation)
+    try:
+        yield instrumentation
+    finally:
+        disable()
+
+
+FORMATS = {"table": Instrumentation.report, "json": Instrumentation.to_json, "prometheus": Instrumentation.to_prometheus}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search a position and report where the time went")
+    parser.add_argument("--fen", default=INIT_FEN, help="position to search")
+    parser.add_argument("--depth", type=int, default=3, help="number of plies to search")
+    parser.add_argument("--backend", choices=BACKENDS, default="board")
+    parser.add_argument("--format", choices=FORMATS, default="table")
+    args = parser.parse_args()
+
+    board = BACKENDS[args.backend](args.fen)
+    with instrumented() as counters:
+        result = Searcher(board).search(args.depth)
+    print(result)
+    print(FORMATS[args.format](counters))
+
+
+if __name__ == "__main__":
+    main()
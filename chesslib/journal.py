@@ -0,0 +1,190 @@
+import os
+import struct
+import threading
+import zlib
+
+from .chess_move import ChessMove
+from .binary import POSITION_SIZE
+from .termination import FIFTY_MOVE_PLIES
+
+# The journal is one file shared by every game: a magic number, then records of
+#   crc32      4 bytes, of everything in the record after it
+#   length     2 bytes, of the payload
+#   game id    4 bytes
+#   kind       1 byte
+#   payload    for snapshots, a 32-byte packed position then the 8-byte keys of the positions before it since
+#              the last capture or pawn move, so repetitions are still found after recovery;
+#              a 4-byte packed move for moves; nothing for closes
+# all little-endian. A record is only valid if its checksum matches, so a write torn by a crash is dropped.
+MAGIC = b"CLJ\x01"
+RECORD_HEADER = struct.Struct("<IHIB")
+MOVE_FORMAT = struct.Struct("<I")
+KEY_FORMAT = struct.Struct("<Q")
+SNAPSHOT, MOVE, CLOSE = 1, 2, 3
+DEFAULT_SNAPSHOT_INTERVAL = 64
+
+
+class Journal:
+    """
+    Append-only log of every game's moves, with a snapshot of the position every `snapshot_interval` moves
+    so recovery replays only a short tail per game. Records are buffered in memory and written with a
+    single write and fsync by `commit` (group commit): a record is durable once a `commit` after it returns.
+    Safe to use from several threads, and records can be logged while another thread commits.
+    """
+    def __init__(self, path: str, snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        # Moves logged since each game's last snapshot
+        self.moves_since_snapshot: dict[int, int] = {}
+        self.buffer = bytearray()
+        # `lock` guards the buffer and is only held briefly; `write_lock` keeps commits in order
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.file = self._open(path)
+
+    def snapshot(self, game: int, board):
+        """Log the full position of `game`, as when it starts, is loaded, or has made many moves"""
+        with self.lock:
+            self._append(game, SNAPSHOT, _snapshot(board))
+            self.moves_since_snapshot[game] = 0
+
+    def record_move(self, game: int, board, move: ChessMove):
+        """Log `move`, already pushed on `board`; every `snapshot_interval` moves the position is logged too"""
+        count = self.moves_since_snapshot.get(game, 0) + 1
+        if count >= self.snapshot_interval:
+            self.snapshot(game, board)
+            return
+        with self.lock:
+            self._append(game, MOVE, MOVE_FORMAT.pack(move.value))
+            self.moves_since_snapshot[game] = count
+
+    def close_game(self, game: int):
+        with self.lock:
+            self._append(game, CLOSE, b"")
+            self.moves_since_snapshot.pop(game, None)
+
+    @property
+    def pending(self) -> int:
+        """Bytes logged but not yet committed"""
+        return len(self.buffer)
+
+    def commit(self):
+        """Write and fsync everything logged so far"""
+        with self.write_lock:
+            with self.lock:
+                batch, self.buffer = self.buffer, bytearray()
+            if batch:
+                self.file.write(batch)
+                self.file.flush()
+                os.fsync(self.file.fileno())
+
+    def recover(self, backend) -> dict[int, object]:
+        """Boards of `backend` for every game not closed, from each one's latest snapshot and the moves after it"""
+        self.commit()
+        games = {}
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for game, kind, payload in _records(data)[0]:
+            if kind == SNAPSHOT:
+                games[game] = (payload, [])
+            elif kind == MOVE and game in games:
+                games[game][1].append(MOVE_FORMAT.unpack(payload)[0])
+            elif kind == CLOSE:
+                games.pop(game, None)
+
+        boards = {}
+        for game, (snapshot, moves) in games.items():
+            board = backend.from_bytes(snapshot)
+            board.positions = [key for key, in KEY_FORMAT.iter_unpack(snapshot[POSITION_SIZE:])]
+            for move in moves:
+                board.push(ChessMove.from_int(move))
+            boards[game] = board
+            self.moves_since_snapshot[game] = len(moves)
+        return boards
+
+    def compact(self, boards: dict[int, object]):
+        """Replace the log with one snapshot per game in `boards`, such as the games `recover` returned"""
+        with self.write_lock, self.lock:
+            self.buffer = bytearray()
+            for game, board in boards.items():
+                self._append(game, SNAPSHOT, _snapshot(board))
+            self.moves_since_snapshot = dict.fromkeys(boards, 0)
+
+            temporary = self.path + ".compact"
+            with open(temporary, "wb") as f:
+                f.write(MAGIC + self.buffer)
+                f.flush()
+                os.fsync(f.fileno())
+            self.buffer = bytearray()
+            self.file.close()
+            os.replace(temporary, self.path)
+            _sync_directory(self.path)
+            self.file = self._open(self.path)
+
+    def close(self):
+        self.commit()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _append(self, game: int, kind: int, payload: bytes):
+        body = RECORD_HEADER.pack(0, len(payload), game, kind)[4:] + payload
+        self.buffer += struct.pack("<I", zlib.crc32(body)) + body
+
+    @staticmethod
+    def _open(path: str):
+        """Open the log for appending, creating it, or cutting off a record torn by a crash"""
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            with open(path, "rb") as f:
+                data = f.read()
+            if not data.startswith(MAGIC):
+                raise ValueError(f"{path} is not a journal")
+            end = _records(data)[1]
+            if end < len(data):
+                with open(path, "r+b") as f:
+                    f.truncate(end)
+        return open(path, "ab")
+
+
+def _sync_directory(path: str):
+    """Make a rename of `path` durable by syncing the directory holding it, where the platform allows it"""
+    if os.name != "posix":
+        return
+    directory = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def _snapshot(board) -> bytes:
+    """The packed position, and the keys of the positions that it could still repeat"""
+    keys = board.positions[max(len(board.positions) - min(board.halfmove_clock, FIFTY_MOVE_PLIES), 0):]
+    return board.to_bytes() + b"".join(KEY_FORMAT.pack(key) for key in keys)
+
+
+def _records(data: bytes) -> tuple[list[tuple[int, int, bytes]], int]:
+    """Valid records of a journal's contents as `(game, kind, payload)`, and where the valid part ends"""
+    records = []
+    offset = len(MAGIC)
+    while offset + RECORD_HEADER.size <= len(data):
+        crc, length, game, kind = RECORD_HEADER.unpack_from(data, offset)
+        end = offset + RECORD_HEADER.size + length
+        if end > len(data) or zlib.crc32(data[offset + 4:end]) != crc:
+            break
+        payload = data[offset + RECORD_HEADER.size:end]
+        if (kind == SNAPSHOT and (length < POSITION_SIZE or (length - POSITION_SIZE) % KEY_FORMAT.size)
+                or kind == MOVE and length != MOVE_FORMAT.size):
+            break
+        records.append((game, kind, payload))
+        offset = end
+    return records, offset
@@ -0,0 +1,365 @@
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Iterable, Iterator, TextIO
+
+from .constants import INIT_FEN
+from .utils import Color
+from .board import Board
+from .bitboard import BitBoard
+from .engine import Searcher, TranspositionTable, material
+from .evaluation import Evaluator
+from .termination import Termination
+from .batch import epd_to_fen, read_positions
+from .pgn import Game, format_game
+
+BACKENDS = {"board": Board, "bitboard": BitBoard}
+EVALUATIONS = {"material": lambda: material, "pst": Evaluator}
+DEFAULT_TABLE_SIZE = 1 << 16
+DEFAULT_MAX_PLIES = 400
+# Games queued per worker, so results stream back while the schedule is still being submitted
+GAMES_PER_WORKER = 2
+# A clock's time is shared out as though this many moves were still to be played
+MOVES_TO_GO = 30
+# Random plies played from the initial position for each opening when no openings are given
+RANDOM_OPENING_PLIES = 8
+# Scores and results, from the point of view of the first engine
+WIN, DRAW, LOSS = 1.0, 0.5, 0.0
+RESULT_SCORES = {"1-0": (WIN, LOSS), "0-1": (LOSS, WIN), "1/2-1/2": (DRAW, DRAW)}
+
+
+class EngineConfig:
+    """
+    One side of a match: the board backend the engine searches on, its evaluation, and its search limits.
+    Written on the command line as `name=new,backend=board,depth=3,eval=pst,table=65536`.
+    """
+    def __init__(self, name: str, backend: str = "bitboard", depth: int | None = None, evaluation: str = "pst",
+                 table_size: int = DEFAULT_TABLE_SIZE):
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown backend {backend!r}")
+        if evaluation not in EVALUATIONS:
+            raise ValueError(f"unknown evaluation {evaluation!r}")
+        self.name = name
+        self.backend = backend
+        self.depth = depth
+        self.evaluation = evaluation
+        self.table_size = table_size
+
+    @classmethod
+    def parse(cls, text: str) -> "EngineConfig":
+        fields = dict(field.split("=", 1) for field in text.split(",") if field)
+        unknown = set(fields) - {"name", "backend", "depth", "eval", "table"}
+        if unknown:
+            raise ValueError(f"unknown engine options {', '.join(sorted(unknown))}")
+        depth = fields.get("depth")
+        return cls(fields.get("name", text), fields.get("backend", "bitboard"), None if depth is None else int(depth),
+                   fields.get("eval", "pst"), int(fields.get("table", DEFAULT_TABLE_SIZE)))
+
+    def __str__(self):
+        return self.name
+
+
+class TimeControl:
+    """`base` seconds per game plus `increment` seconds per move, written as `base+increment`"""
+    def __init__(self, base: float, increment: float = 0.0):
+        self.base = base
+        self.increment = increment
+
+    @classmethod
+    def parse(cls, text: str) -> "TimeControl":
+        base, _, increment = text.partition("+")
+        return cls(float(base), float(increment or 0))
+
+    def allotment(self, remaining: float) -> float:
+        """Seconds to search for with `remaining` seconds on the clock"""
+        return min(remaining / MOVES_TO_GO + self.increment * 0.75, remaining * 0.5)
+
+    def __str__(self):
+        return f"{self.base:g}+{self.increment:g}"
+
+
+class GameResult:
+    """A finished game, as sent back from a worker; `moves` are played from `fen`"""
+    def __init__(self, round: int, white: str, black: str, fen: str, moves: list, result: str, termination: str,
+                 elapsed: float):
+        self.round = round
+        self.white = white
+        self.black = black
+        self.fen = fen
+        self.moves = moves
+        self.result = result
+        self.termination = termination
+        self.elapsed = elapsed
+
+    def to_pgn(self, event: str = "Self-play match", time_control: TimeControl | None = None) -> Game:
+        headers = {"Event": event, "Site": "chesslib.match", "Date": time.strftime("%Y.%m.%d"), "Round": str(self.round),
+                   "White": self.white, "Black": self.black, "Result": self.result}
+        if self.fen != INIT_FEN:
+            headers.update(SetUp="1", FEN=self.fen)
+        headers["Termination"] = self.termination
+        headers["TimeControl"] = "-" if time_control is None else str(time_control)
+        return Game(headers, self.moves)
+
+    def __str__(self):
+        return f"{self.round}. {self.white} - {self.black} {self.result} ({self.termination}, {len(self.moves)} plies)"
+
+
+def play_game(round: int, white: EngineConfig, black: EngineConfig, fen: str, time_control: TimeControl | None,
+              max_plies: int = DEFAULT_MAX_PLIES) -> GameResult:
+    """Play one game from `fen` until it is decided, drawn by rule, or adjudicated a draw after `max_plies`"""
+    engines = {Color.WHITE: white, Color.BLACK: black}
+    board = BACKENDS[white.backend](fen)
+    # Each engine searches its own board, so two backends can be compared against each other
+    boards = {Color.WHITE: board, Color.BLACK: board if black.backend == white.backend else BACKENDS[black.backend](fen)}
+    searchers = {color: Searcher(boards[color], TranspositionTable(config.table_size),
+                                 EVALUATIONS[config.evaluation]())
+                 for color, config in engines.items()}
+    clocks = {color: None if time_control is None else time_control.base for color in engines}
+    moves = []
+    start = time.perf_counter()
+
+    def finish(result: str, termination: str) -> GameResult:
+        return GameResult(round, white.name, black.name, fen, moves, result, termination, time.perf_counter() - start)
+
+    while True:
+        player = board.current_player
+        termination = board.termination()
+        if termination == Termination.CHECKMATE:
+            return finish("0-1" if player == Color.WHITE else "1-0", termination.value)
+        if termination is not None:
+            return finish("1/2-1/2", termination.value)
+        if len(moves) >= max_plies:
+            return finish("1/2-1/2", "adjudication")
+
+        clock = clocks[player]
+        time_limit = None if clock is None else time_control.allotment(clock)
+        thinking = time.perf_counter()
+        result = searchers[player].search(engines[player].depth, time_limit)
+        if clock is not None:
+            clocks[player] = clock - (time.perf_counter() - thinking)
+            if clocks[player] < 0:
+                return finish("0-1" if player == Color.WHITE else "1-0", "time forfeit")
+            clocks[player] += time_control.increment
+
+        moves.append(result.move)
+        board.push(result.move)
+        if boards[Color.BLACK] is not board:
+            boards[Color.BLACK].push(result.move)
+
+
+def random_openings(count: int, seed: int | None = None, plies: int = RANDOM_OPENING_PLIES) -> list[str]:
+    """
+    `count` different positions reached by `plies` random moves from the initial position. Searches to a fixed
+    depth are deterministic, so without varied openings every game with the same colors would be the same game.
+    """
+    rng = random.Random(seed)
+    board = BitBoard()
+    openings = {}
+    while len(openings) < count:
+        board.load(INIT_FEN)
+        for _ in range(plies):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        if board.termination() is None:
+            openings.setdefault(board.fen(), None)
+    return list(openings)
+
+
+def schedule(engines: tuple[EngineConfig, EngineConfig], openings: list[str], games: int) -> Iterator[tuple]:
+    """Rounds to play: each opening twice in turn, with the engines swapping colors"""
+    for i in range(games):
+        opening = openings[i // 2 % len(openings)]
+        white, black = engines if i % 2 == 0 else engines[::-1]
+        yield i + 1, white, black, opening
+
+
+def play_games(engines: tuple[EngineConfig, EngineConfig], openings: list[str], games: int, workers: int | None = 1,
+               time_control: TimeControl | None = None, max_plies: int = DEFAULT_MAX_PLIES) -> Iterator[GameResult]:
+    """
+    Play the match on `workers` processes, yielding games as they finish. Only a few games per worker are
+    queued at a time, so closing the iterator early, e.g. when a test is decided, cancels the rest.
+    """
+    rounds = schedule(engines, openings, games)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for round, white, black, fen in rounds:
+            yield play_game(round, white, black, fen, time_control, max_plies)
+        return
+
+    pool = ProcessPoolExecutor(workers)
+    pending: set[Future] = set()
+    try:
+        for round, white, black, fen in rounds:
+            pending.add(pool.submit(play_game, round, white, black, fen, time_control, max_plies))
+            while len(pending) >= workers * GAMES_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def elo_difference(score: float) -> float:
+    """Elo difference implied by an expected score between 0 and 1"""
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def expected_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class MatchStats:
+    """Wins, draws and losses of the first engine, with its Elo difference and a sequential probability ratio test"""
+    def __init__(self, elo0: float = 0.0, elo1: float = 5.0, alpha: float = 0.05, beta: float = 0.05):
+        self.wins = self.draws = self.losses = 0
+        self.elo0 = elo0
+        self.elo1 = elo1
+        # The test accepts H1 (the first engine is at least elo1 stronger) above the upper bound, H0 below the lower
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+
+    def add(self, score: float):
+        if score == WIN:
+            self.wins += 1
+        elif score == DRAW:
+            self.draws += 1
+        else:
+            self.losses += 1
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self) -> float:
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.5
+
+    def _variance(self, wins: float, draws: float, losses: float) -> float:
+        """Variance of a single game's score"""
+        games = wins + draws + losses
+        score = (wins + draws / 2) / games
+        return (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+
+    def elo(self) -> tuple[float, float]:
+        """Elo difference and the half-width of its 95% confidence interval"""
+        if not self.games:
+            return 0.0, math.inf
+        margin = 1.96 * math.sqrt(self._variance(self.wins, self.draws, self.losses) / self.games)
+        upper, lower = elo_difference(self.score + margin), elo_difference(self.score - margin)
+        return elo_difference(self.score), (upper - lower) / 2
+
+    def llr(self) -> float:
+        """
+        Log-likelihood ratio of elo1 against elo0, by the normal approximation to the trinomial GSPRT.
+        Half a game of each result is added, so a run of identical results does not have zero variance.
+        """
+        wins, draws, losses = self.wins + 0.5, self.draws + 0.5, self.losses + 0.5
+        games = wins + draws + losses
+        score = (wins + draws / 2) / games
+        s0, s1 = expected_score(self.elo0), expected_score(self.elo1)
+        return (s1 - s0) * (2 * score - s0 - s1) * games / (2 * self._variance(wins, draws, losses))
+
+    @property
+    def decision(self) -> str | None:
+        """`H1` once the test shows the first engine gains at least elo1, `H0` once it shows no gain, else `None`"""
+        llr = self.llr()
+        if llr >= self.upper_bound:
+            return "H1"
+        if llr <= self.lower_bound:
+            return "H0"
+        return None
+
+    def __str__(self):
+        elo, margin = self.elo()
+        return (f"+{self.wins} ={self.draws} -{self.losses} score {self.score:.3f} elo {elo:+.1f} +/- {margin:.1f} "
+                f"llr {self.llr():.2f} ({self.lower_bound:.2f}, {self.upper_bound:.2f})")
+
+
+def run_match(engines: tuple[EngineConfig, EngineConfig], openings: Iterable[str], games: int,
+              workers: int | None = 1, time_control: TimeControl | None = None, stats: MatchStats | None = None,
+              pgn: TextIO | None = None, log: TextIO | None = None, sprt: bool = True,
+              max_plies: int = DEFAULT_MAX_PLIES, seed: int | None = None) -> MatchStats:
+    """
+    Play up to `games` games and tally them for the first engine. Each game is written to `pgn` and a line
+    about it to `log` as soon as it finishes. With `sprt`, the match stops as soon as the test is decided.
+    Without `openings`, each pair of games starts from its own random opening, drawn with `seed`.
+    """
+    stats = stats if stats is not None else MatchStats()
+    openings = ([epd_to_fen(line)[0] for _, line in read_positions(openings)]
+                or random_openings((games + 1) // 2, seed))
+    results = play_games(engines, openings, games, workers, time_control, max_plies)
+    try:
+        for game in results:
+            stats.add(RESULT_SCORES[game.result][0 if game.white == engines[0].name else 1])
+            if pgn is not None:
+                if stats.games > 1:
+                    pgn.write("\n")
+                pgn.write(format_game(game.to_pgn(time_control=time_control)))
+                pgn.flush()
+            if log is not None:
+                log.write(f"{game} | {stats}\n")
+                log.flush()
+            if sprt and stats.decision is not None:
+                break
+    finally:
+        results.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play two engine configurations against each other")
+    parser.add_argument("first", type=EngineConfig.parse, help="engine under test, e.g. name=new,backend=board,depth=3")
+    parser.add_argument("second", type=EngineConfig.parse, help="baseline engine, in the same form")
+    parser.add_argument("--games", type=int, default=100, help="most games to play")
+    parser.add_argument("--openings", help="FEN or EPD file of starting positions, each played with both colors")
+    parser.add_argument("--seed", type=int, help="seed of the random openings played without --openings")
+    parser.add_argument("--tc", type=TimeControl.parse, help="time control in seconds, e.g. 10+0.1")
+    parser.add_argument("--workers", type=int, help="worker processes, one per CPU by default")
+    parser.add_argument("--pgn", help="write the games to this PGN file as they finish")
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES, help="adjudicate a draw after this many")
+    parser.add_argument("--elo0", type=float, default=0.0, help="SPRT null hypothesis Elo gain")
+    parser.add_argument("--elo1", type=float, default=5.0, help="SPRT alternative hypothesis Elo gain")
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--no-sprt", action="store_true", help="play every game instead of stopping on a decision")
+    args = parser.parse_args()
+
+    if args.first.name == args.second.name:
+        parser.error("the engines need different names")
+    if args.tc is None and (args.first.depth is None or args.second.depth is None):
+        parser.error("give each engine a depth, or a --tc time control")
+
+    openings = open(args.openings) if args.openings is not None else []
+    pgn = open(args.pgn, "w") if args.pgn is not None else None
+    stats = MatchStats(args.elo0, args.elo1, args.alpha, args.beta)
+    start = time.perf_counter()
+    try:
+        run_match((args.first, args.second), openings, args.games, args.workers, args.tc, stats, pgn, sys.stdout,
+                  not args.no_sprt, args.max_plies, args.seed)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.openings is not None:
+            openings.close()
+        if pgn is not None:
+            pgn.close()
+
+    print(f"{args.first} vs {args.second}: {stats}")
+    if stats.decision is not None:
+        print(f"SPRT: {stats.decision} accepted after {stats.games} games")
+    print(f"{stats.games} games in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from .engine import Searcher, SearchResult, DEFAULT_TABLE_SIZE, MAX_PLY, MATE_SCORE
+
+# Table layout, in 64-bit words: a header of [stop flag, generation], then two words per slot,
+# `key ^ data` and `data`. A slot whose words were written by two processes at once fails the key check.
+HEADER_WORDS = 2
+STOP_WORD = 0
+GENERATION_WORD = 1
+
+# Fields packed into a slot's data word
+SCORE_OFFSET = 1 << 20
+SCORE_BITS = 21
+MOVE_BITS = 18
+NO_MOVE = (1 << MOVE_BITS) - 1
+DEPTH_SHIFT = SCORE_BITS + MOVE_BITS
+BOUND_SHIFT = DEPTH_SHIFT + 8
+GENERATION_SHIFT = BOUND_SHIFT + 2
+
+# Tables opened by this worker process, by shared memory name
+_attached_tables: dict[str, "SharedTranspositionTable"] = {}
+
+
+class SharedTranspositionTable:
+    """
+    Transposition table in shared memory, so every worker process reads and writes the same entries.
+    It has the same interface and replacement policy as `TranspositionTable`. Only the process that
+    created the table starts new searches; workers share its generation.
+    """
+    def __init__(self, size: int = DEFAULT_TABLE_SIZE, name: str | None = None):
+        self.size = size
+        self.owner = name is None
+        self.memory = shared_memory.SharedMemory(name=name, create=self.owner, size=(HEADER_WORDS + 2 * size) * 8)
+        self.name = self.memory.name
+        self.words = self.memory.buf.cast("Q")
+
+    @property
+    def generation(self) -> int:
+        return self.words[GENERATION_WORD]
+
+    def probe(self, key: int) -> tuple[int, int, int, int, int | None, int] | None:
+        """Stored `(key, depth, score, bound, move key, generation)` for the position, if any"""
+        index = HEADER_WORDS + 2 * (key % self.size)
+        data = self.words[index + 1]
+        if self.words[index] ^ data != key or data == 0:
+            return None
+
+        move = data >> SCORE_BITS & NO_MOVE
+        return (key, data >> DEPTH_SHIFT & 0xFF, (data & ((1 << SCORE_BITS) - 1)) - SCORE_OFFSET,
+                data >> BOUND_SHIFT & 0x3, None if move == NO_MOVE else move, data >> GENERATION_SHIFT & 0xFF)
+
+    def store(self, key: int, depth: int, score: int, bound: int, move: int | None):
+        index = HEADER_WORDS + 2 * (key % self.size)
+        generation = self.words[GENERATION_WORD]
+        stored = self.words[index + 1]
+        if stored and self.words[index] ^ stored != key and stored >> GENERATION_SHIFT & 0xFF == generation:
+            if depth < stored >> DEPTH_SHIFT & 0xFF:
+                return
+
+        data = (score + SCORE_OFFSET | (NO_MOVE if move is None else move) << SCORE_BITS
+                | max(depth, 0) << DEPTH_SHIFT | bound << BOUND_SHIFT | generation << GENERATION_SHIFT)
+        self.words[index + 1] = data
+        self.words[index] = key ^ data
+
+    def new_search(self):
+        if self.owner:
+            self.words[GENERATION_WORD] = (self.words[GENERATION_WORD] + 1) & 0xFF
+            self.words[STOP_WORD] = 0
+
+    def stop(self):
+        """Ask every worker searching with this table to finish its current search"""
+        self.words[STOP_WORD] = 1
+
+    def stopped(self) -> bool:
+        return self.words[STOP_WORD] != 0
+
+    def clear(self):
+        for i in range(HEADER_WORDS, len(self.words)):
+            self.words[i] = 0
+
+    def close(self):
+        self.words.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def _attach(name: str, size: int) -> SharedTranspositionTable:
+    if name not in _attached_tables:
+        _attached_tables[name] = SharedTranspositionTable(size, name)
+    return _attached_tables[name]
+
+
+def _search_worker(board, depth: int | None, time_limit: float | None, table_name: str, table_size: int,
+                   worker: int) -> SearchResult:
+    """Worker 0 is the main search; the others are helpers"""
+    table = _attach(table_name, table_size)
+    searcher = Searcher(board, table)
+    searcher.should_stop = table.stopped
+    if worker == 0:
+        return searcher.search(depth, time_limit)
+    # Helpers keep deepening until the main search is done, filling the table ahead of it. Every other helper
+    # starts a ply deeper, and each searches the root moves in a different order, so they do not just repeat
+    # the main search's tree in step with it.
+    searcher.root_rotation = worker
+    return searcher.search(MAX_PLY, time_limit, start_depth=1 + worker % 2)
+
+
+class ParallelSearcher:
+    """
+    Lazy SMP search: every worker process runs its own iterative deepening on the same position,
+    and they share one transposition table, so each benefits from what the others have searched.
+    The pool and table are kept between searches; close the searcher (or use it as a context manager)
+    to release them.
+    """
+    def __init__(self, workers: int | None = None, table_size: int = DEFAULT_TABLE_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.table = SharedTranspositionTable(table_size)
+        self.pool = ProcessPoolExecutor(self.workers)
+
+    def search(self, board, depth: int | None = None, time_limit: float | None = None) -> SearchResult:
+        """Find the best move for the player to move. The main worker's depth and time limit decide when to stop."""
+        self.table.new_search()
+        futures = [self.pool.submit(_search_worker, board, depth, time_limit, self.table.name, self.table.size, i)
+                   for i in range(self.workers)]
+
+        main = futures[0].result()
+        self.table.stop()
+        results = [main] + [f.result() for f in futures[1:]]
+
+        # With a time limit, a helper that got further than the main worker has the better answer,
+        # unless the main worker already found a mate
+        best = main
+        if time_limit is not None and abs(main.score) < MATE_SCORE - MAX_PLY:
+            for result in results[1:]:
+                if result.move is not None and result.depth > best.depth:
+                    best = result
+        best.nodes = sum(r.nodes for r in results)
+        return best
+
+    def close(self):
+        self.pool.shutdown()
+        self.table.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def parallel_search(board, depth: int | None = None, time_limit: float | None = None,
+                    workers: int | None = None) -> SearchResult:
+    """One-off parallel search; keep a `ParallelSearcher` around to reuse the pool across searches"""
+    with ParallelSearcher(workers) as searcher:
+        return searcher.search(board, depth, time_limit)
@@ -0,0 +1,102 @@
+import argparse
+import time
+
+from .constants import INIT_FEN
+from .board import Board
+from .bitboard import BitBoard
+
+# Reference positions and their node counts by depth, from https://www.chessprogramming.org/Perft_Results
+REFERENCE_POSITIONS = {
+    "initial": (INIT_FEN, (20, 400, 8902, 197281, 4865609)),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                 (48, 2039, 97862, 4085603)),
+    "position3": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", (14, 191, 2812, 43238, 674624)),
+    "position4": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1", (6, 264, 9467, 422333)),
+    "position5": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8", (44, 1486, 62379, 2103487)),
+    "position6": ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+                  (46, 2079, 89890, 3894594)),
+}
+
+BACKENDS = {"board": Board, "bitboard": BitBoard}
+
+
+def perft(board, depth: int) -> int:
+    """Count the leaf nodes of the legal move tree `depth` plies deep"""
+    if depth == 0:
+        return 1
+
+    moves = board.legal_moves()
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        board.push(move)
+        nodes += perft(board, depth - 1)
+        board.pop()
+
+    return nodes
+
+
+def divide(board, depth: int) -> dict[str, int]:
+    """Leaf node count below each root move, keyed by the move in coordinate notation"""
+    result = {}
+    for move in board.legal_moves():
+        board.push(move)
+        result[str(move)] = perft(board, depth - 1)
+        board.pop()
+
+    return result
+
+
+def timed_perft(board, depth: int) -> tuple[int, float]:
+    """Run `perft` and return the node count with the elapsed time in seconds"""
+    start = time.perf_counter()
+    nodes = perft(board, depth)
+    return nodes, time.perf_counter() - start
+
+
+def format_result(nodes: int, elapsed: float) -> str:
+    nps = nodes / elapsed if elapsed > 0 else 0
+    return f"nodes: {nodes}  time: {elapsed:.3f}s  nps: {nps:.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count move generation leaf nodes (perft)")
+    parser.add_argument("depth", type=int, help="number of plies to search")
+    parser.add_argument("--fen", default=INIT_FEN, help="position to start from")
+    parser.add_argument("--position", choices=REFERENCE_POSITIONS, help="use a reference position instead of --fen")
+    parser.add_argument("--backend", choices=BACKENDS, default="board")
+    parser.add_argument("--divide", action="store_true", help="print the node count below each root move")
+    parser.add_argument("--suite", action="store_true", help="check every reference position up to `depth`")
+    args = parser.parse_args()
+
+    board = BACKENDS[args.backend]()
+
+    if args.suite:
+        failures = 0
+        for name, (fen, expected) in REFERENCE_POSITIONS.items():
+            for depth in range(1, min(args.depth, len(expected)) + 1):
+                board.load(fen)
+                nodes, elapsed = timed_perft(board, depth)
+                status = "ok" if nodes == expected[depth - 1] else f"FAIL (expected {expected[depth - 1]})"
+                failures += nodes != expected[depth - 1]
+                print(f"{name} depth {depth}: {format_result(nodes, elapsed)}  {status}")
+        raise SystemExit(1 if failures else 0)
+
+    board.load(REFERENCE_POSITIONS[args.position][0] if args.position else args.fen)
+
+    if args.divide:
+        start = time.perf_counter()
+        counts = divide(board, args.depth)
+        elapsed = time.perf_counter() - start
+        for move, nodes in sorted(counts.items()):
+            print(f"{move}: {nodes}")
+        print(f"moves: {len(counts)}  {format_result(sum(counts.values()), elapsed)}")
+        return
+
+    print(format_result(*timed_perft(board, args.depth)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+import argparse
+import re
+import sys
+import time
+from typing import Iterable, Iterator, TextIO
+
+from .constants import INIT_FEN, InvalidFEN, InvalidSAN
+from .constants import BOARD_SIZE
+from .utils import Color, BoardCoordinates, SQUARES, ALGEBRA_NOTATIONS
+from .chess_move import MoveType, ChessMove
+from .piece.piece import ORTHOGONAL_DIRECTIONS, DIAGONAL_DIRECTIONS
+
+# Tags every exported game starts with, in this order, and their values when unknown
+SEVEN_TAG_ROSTER = {"Event": "?", "Site": "?", "Date": "????.??.??", "Round": "?", "White": "?", "Black": "?",
+                    "Result": "*"}
+LINE_LENGTH = 79
+
+SAN_PATTERN = re.compile(r"([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?[+#]?[!?]*")
+CASTLING_PATTERN = re.compile(r"([O0]-[O0](?:-[O0])?)[+#]?[!?]*")
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+TOKEN_PATTERN = re.compile(r"""
+    \{[^}]*\}? | ;[^\n]* | \$\d+ | [()]    # comments, NAGs and variations
+    | (1-0|0-1|1/2-1/2|\*)                  # game termination
+    | \d+\.+                                # move number
+    | ([^\s{};$()]+)                        # move
+""", re.VERBOSE)
+# Where a brace comment or a rest-of-line comment starts
+COMMENT_START_PATTERN = re.compile(r"[{;]")
+SQUARES_BY_NAME = {ALGEBRA_NOTATIONS[s.index]: s for s in SQUARES}
+
+KNIGHT_STEPS = ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1))
+# Steps of each piece kind, and whether it slides along them
+PIECE_STEPS = {"N": (KNIGHT_STEPS, False), "K": (ORTHOGONAL_DIRECTIONS + DIAGONAL_DIRECTIONS, False),
+               "B": (DIAGONAL_DIRECTIONS, True), "R": (ORTHOGONAL_DIRECTIONS, True),
+               "Q": (ORTHOGONAL_DIRECTIONS + DIAGONAL_DIRECTIONS, True)}
+
+
+class Game:
+    """A game read from or written to PGN: its tags, in order, and its main line of moves"""
+    def __init__(self, headers: dict[str, str] | None = None, moves: list[ChessMove] | None = None):
+        self.headers = {} if headers is None else headers
+        self.moves = [] if moves is None else moves
+        # Movetext as read, and why its moves could not all be read, if they could not
+        self.movetext = ""
+        self.error: str | None = None
+
+    @property
+    def fen(self) -> str:
+        return self.headers.get("FEN", INIT_FEN)
+
+    @property
+    def result(self) -> str:
+        return self.headers.get("Result", "*")
+
+    def __repr__(self):
+        return f"Game({self.headers.get('White', '?')} - {self.headers.get('Black', '?')}, {len(self.moves)} moves)"
+
+
+def san(board, move: ChessMove) -> str:
+    """Standard algebraic notation of a legal `move` in the position on `board`, which is left unchanged"""
+    if move.type == MoveType.CASTLING:
+        text = "O-O" if move.end.col == 6 else "O-O-O"
+    else:
+        start, end = move.start, move.end
+        kind = board.get_piece_at(start).abbreviation
+        capture = move.type == MoveType.EN_PASSANT or board.get_piece_at(end) is not None
+
+        if kind == "P":
+            text = (ALGEBRA_NOTATIONS[start.index][0] + "x" if capture else "") + ALGEBRA_NOTATIONS[end.index]
+            if move.promotion is not None:
+                text += "=" + move.promotion
+        else:
+            # Name the origin file, else rank, else both, only if another piece of the kind can reach the square
+            rivals = [m.start for m in _legal_moves_to(board, _origins(board, kind, end), end, None)
+                      if m.start is not start]
+            origin = ALGEBRA_NOTATIONS[start.index]
+            if not rivals:
+                disambiguation = ""
+            elif all(r.col != start.col for r in rivals):
+                disambiguation = origin[0]
+            elif all(r.row != start.row for r in rivals):
+                disambiguation = origin[1]
+            else:
+                disambiguation = origin
+            text = kind + disambiguation + ("x" if capture else "") + ALGEBRA_NOTATIONS[end.index]
+
+    board.push(move)
+    player = board.current_player
+    if board.check_validator(player):
+        text += "#" if board.is_checkmate(player) else "+"
+    board.pop()
+    return text
+
+
+def parse_san(board, text: str) -> ChessMove:
+    """The legal move on `board` written `text` in SAN. Raises `InvalidSAN` if there is not exactly one."""
+    castling = CASTLING_PATTERN.fullmatch(text)
+    if castling is not None:
+        long = len(castling.group(1)) > 3
+        king = BoardCoordinates(BOARD_SIZE - 1 if board.current_player == Color.WHITE else 0, 4)
+        candidates = [m for m in board.iter_legal_moves(king)
+                      if m.type == MoveType.CASTLING and (m.end.col == 2) == long]
+        return _single_move(candidates, text)
+
+    match = SAN_PATTERN.fullmatch(text)
+    if match is None:
+        raise InvalidSAN(f"cannot read move {text!r}")
+    kind, file, rank, square, promotion = match.groups()
+    end = SQUARES_BY_NAME[square]
+
+    if kind is None:
+        # A pawn comes from the square behind, two behind on its first move, or diagonally behind when capturing
+        row = end.row + (1 if board.current_player == Color.WHITE else -1)
+        if file is not None:
+            origins = [BoardCoordinates(row, ord(file) - ord("a"))]
+        else:
+            origins = [BoardCoordinates(row, end.col), BoardCoordinates(2 * row - end.row, end.col)]
+        origins = [o for o in origins if o.is_in_bounds() and _is_own(board, o, "P")]
+    else:
+        origins = [o for o in _origins(board, kind, end) if (file is None or ALGEBRA_NOTATIONS[o.index][0] == file)
+                   and (rank is None or ALGEBRA_NOTATIONS[o.index][1] == rank)]
+    return _single_move(_legal_moves_to(board, origins, end, promotion), text)
+
+
+def _origins(board, kind: str, end: BoardCoordinates) -> list[BoardCoordinates]:
+    """Squares of the pieces of `kind` belonging to the player to move that reach `end`, ignoring pins"""
+    steps, slides = PIECE_STEPS[kind]
+    origins = []
+    for row_step, col_step in steps:
+        row, col = end.row + row_step, end.col + col_step
+        while 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE:
+            square = SQUARES[row * BOARD_SIZE + col]
+            if board.get_piece_at(square) is not None:
+                if _is_own(board, square, kind):
+                    origins.append(square)
+                break
+            if not slides:
+                break
+            row, col = row + row_step, col + col_step
+    return origins
+
+
+def _is_own(board, square: BoardCoordinates, kind: str) -> bool:
+    piece = board.get_piece_at(square)
+    return piece is not None and piece.abbreviation == kind and piece.color == board.current_player
+
+
+def _legal_moves_to(board, origins: list[BoardCoordinates], end: BoardCoordinates,
+                    promotion: str | None) -> list[ChessMove]:
+    return [m for origin in origins for m in board.iter_legal_moves(origin)
+            if m.end is end and m.promotion == promotion]
+
+
+def _single_move(candidates: list[ChessMove], text: str) -> ChessMove:
+    if not candidates:
+        raise InvalidSAN(f"illegal move {text!r}")
+    if len(candidates) > 1:
+        raise InvalidSAN(f"ambiguous move {text!r}")
+    return candidates[0]
+
+
+def parse_movetext(movetext: str) -> tuple[list[str], str | None]:
+    """
+    SAN of the main line moves in PGN movetext, skipping comments, variations, NAGs and move numbers,
+    and the game termination marker, if any
+    """
+    moves = []
+    termination = None
+    depth = 0
+    for match in TOKEN_PATTERN.finditer(movetext):
+        termination_marker, move = match.groups()
+        if move is not None:
+            if depth == 0:
+                moves.append(move)
+        elif termination_marker is not None:
+            termination = termination_marker
+        elif match.group() == "(":
+            depth += 1
+        elif match.group() == ")":
+            depth = max(depth - 1, 0)
+    return moves, termination
+
+
+def _ends_in_comment(line: str, in_comment: bool) -> bool:
+    """
+    Whether a brace comment is still open after `line`, given whether one was open before it. Brace comments
+    do not nest, and outside them a `;` comments out the rest of the line, braces included.
+    """
+    position = 0
+    while True:
+        if in_comment:
+            end = line.find("}", position)
+            if end < 0:
+                return True
+            in_comment = False
+            position = end + 1
+        else:
+            match = COMMENT_START_PATTERN.search(line, position)
+            if match is None or match.group() == ";":
+                return False
+            in_comment = True
+            position = match.end()
+
+
+def _split_games(lines: Iterable[str]) -> Iterator[tuple[dict[str, str], list[str]]]:
+    """Tags and movetext lines of each game, read a line at a time"""
+    headers: dict[str, str] = {}
+    movetext: list[str] = []
+    in_comment = False
+    for line in lines:
+        if line.startswith("%"):
+            continue
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        if stripped.startswith("[") and not in_comment:
+            if movetext:
+                yield headers, movetext
+                headers, movetext = {}, []
+            tag = TAG_PATTERN.match(stripped)
+            if tag is not None:
+                headers[tag.group(1)] = re.sub(r"\\(.)", r"\1", tag.group(2))
+            continue
+
+        movetext.append(stripped)
+        in_comment = _ends_in_comment(stripped, in_comment)
+
+    if headers or movetext:
+        yield headers, movetext
+
+
+def read_games(lines: Iterable[str], backend=None, parse_moves: bool = True) -> Iterator[Game]:
+    """
+    Read PGN games from `lines`, such as an open file, one game at a time, so memory use does not grow with
+    the file. Moves are resolved on a board of `backend`; a game with a move that cannot be played keeps the
+    moves before it, and says why in `error`. With `parse_moves` off, only tags and movetext are read.
+    """
+    if backend is None:
+        # Imported here because the backends build on this module
+        from .bitboard import BitBoard
+        backend = BitBoard
+    board = backend()
+
+    for headers, movetext_lines in _split_games(lines):
+        game = Game(headers)
+        game.movetext = "\n".join(movetext_lines)
+        moves, termination = parse_movetext(game.movetext)
+        if termination is not None:
+            headers.setdefault("Result", termination)
+
+        if parse_moves:
+            try:
+                board.load(game.fen)
+                for text in moves:
+                    move = parse_san(board, text)
+                    board.push(move)
+                    game.moves.append(move)
+            except (InvalidFEN, InvalidSAN) as e:
+                game.error = str(e)
+        yield game
+
+
+def _format_tag(name: str, value: str) -> str:
+    value = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'[{name} "{value}"]'
+
+
+def format_game(game: Game, backend=None) -> str:
+    """PGN of `game`: the Seven Tag Roster, any other tags, then its moves in SAN, wrapped to 79 columns"""
+    if backend is None:
+        from .bitboard import BitBoard
+        backend = BitBoard
+    board = backend(game.fen)
+
+    lines = [_format_tag(name, game.headers.get(name, default)) for name, default in SEVEN_TAG_ROSTER.items()]
+    lines += [_format_tag(name, value) for name, value in game.headers.items() if name not in SEVEN_TAG_ROSTER]
+    lines.append("")
+
+    tokens = []
+    for i, move in enumerate(game.moves):
+        if board.current_player == Color.WHITE:
+            tokens.append(f"{board.fullmove_number}.")
+        elif i == 0:
+            tokens.append(f"{board.fullmove_number}...")
+        tokens.append(san(board, move))
+        board.push(move)
+    tokens.append(game.result)
+
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_LENGTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def write_games(games: Iterable[Game], output: TextIO, backend=None):
+    for i, game in enumerate(games):
+        if i:
+            output.write("\n")
+        output.write(format_game(game, backend))
+
+
+def main():
+    # Imported here because the backends build on this module
+    from .perft import BACKENDS
+
+    parser = argparse.ArgumentParser(description="Read a PGN file, checking every move, and optionally rewrite it")
+    parser.add_argument("input", help="PGN file, or - for stdin")
+    parser.add_argument("-o", "--output", help="write the games back out with normalized SAN")
+    parser.add_argument("--backend", choices=BACKENDS, default="bitboard")
+    args = parser.parse_args()
+
+    backend = BACKENDS[args.backend]
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", errors="replace")
+    output = None if args.output is None else open(args.output, "w")
+    games = moves = errors = 0
+    start = time.perf_counter()
+    with source:
+        for game in read_games(source, backend):
+            games += 1
+            moves += len(game.moves)
+            if game.error is not None:
+                errors += 1
+                print(f"game {games}: {game.error}", file=sys.stderr)
+            if output is not None:
+                if games > 1:
+                    output.write("\n")
+                output.write(format_game(game, backend))
+    if output is not None:
+        output.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"{games} games, {moves} moves, {errors} with errors in {elapsed:.1f}s "
+          f"({moves / elapsed if elapsed else 0:.0f} moves/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ from .piece import Piece
 
 
 class Bishop(Piece):
+    __slots__ = ()
+
     def __init__(self, color: Color):
         super().__init__(color)
         self.abbreviation = "B"
@@ -12,3 +14,6 @@ class Bishop(Piece):
     def possible_moves(self, position: BoardCoordinates) -> list[ChessMove]:
         return super().diagonal_moves(position, BOARD_SIZE)
 
+    def attacked_squares(self, position: BoardCoordinates) -> list[BoardCoordinates]:
+        return super().diagonal_attacks(position, BOARD_SIZE)
+
@@ -1,12 +1,48 @@
-from chesslib.utils import Color, BoardCoordinates
-from ..chess_move import ChessMove
+from chesslib.utils import Color, BoardCoordinates, get_opponent
+from ..chess_move import MoveType, ChessMove
 from .piece import Piece
 
+KING_COLUMN = 4
+# Castling right, rook column, and the columns between king and rook (the king passes the first two)
+CASTLING_SIDES = (("K", 7, (5, 6)), ("Q", 0, (3, 2, 1)))
+
 
 class King(Piece):
+    __slots__ = ("home_row",)
+
     def __init__(self, color: Color):
         super().__init__(color)
         self.abbreviation = "K"
+        self.home_row = 7 if color == Color.WHITE else 0
 
     def possible_moves(self, position: BoardCoordinates) -> list[ChessMove]:
-        return super().orthogonal_moves(position, 1) + super().diagonal_moves(position, 1)
+        return super().orthogonal_moves(position, 1) + super().diagonal_moves(position, 1) + self._castling_moves(position)
+
+    def attacked_squares(self, position: BoardCoordinates) -> list[BoardCoordinates]:
+        return super().orthogonal_attacks(position, 1) + super().diagonal_attacks(position, 1)
+
+    def _castling_moves(self, position: BoardCoordinates) -> list[ChessMove]:
+        if position.row != self.home_row or position.col != KING_COLUMN:
+            return []
+
+        enemy = get_opponent(self.color)
+        moves = []
+        for right, rook_col, between in CASTLING_SIDES:
+            if self.color == Color.BLACK:
+                right = right.lower()
+            if right not in self.board.castling:
+                continue
+
+            rook = self.board.get_piece_at(BoardCoordinates(self.home_row, rook_col))
+            if rook is None or rook.abbreviation != "R" or rook.color != self.color:
+                continue
+            if any(self.board.get_piece_at(BoardCoordinates(self.home_row, col)) is not None for col in between):
+                continue
+
+            passed = [position] + [BoardCoordinates(self.home_row, col) for col in between[:2]]
+            if any(self.board.is_attacked(square, enemy) for square in passed):
+                continue
+
+            moves.append(ChessMove(position, passed[-1], MoveType.CASTLING))
+
+        return moves
@@ -5,8 +5,13 @@ from chesslib.chess_move import MoveType, ChessMove
 
 Direction = tuple[int, int]
 
+ORTHOGONAL_DIRECTIONS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+DIAGONAL_DIRECTIONS = ((1, 1), (-1, 1), (-1, -1), (1, -1))
+
 
 class Piece(ABC):
+    __slots__ = ("color", "board", "abbreviation")
+
     def __init__(self, color: Color):
         self.color = color
         self.board = None
@@ -16,15 +21,24 @@ class Piece(ABC):
     def possible_moves(self, position: BoardCoordinates) -> list[ChessMove]:
         pass
 
+    @abstractmethod
+    def attacked_squares(self, position: BoardCoordinates) -> list[BoardCoordinates]:
+        """Squares this piece attacks from `position`, whether they are empty, enemy or own pieces"""
+        pass
+
+    @property
+    def symbol(self) -> str:
+        """FEN letter of the piece: uppercase for white, lowercase for black"""
+        return self.abbreviation if self.color == Color.WHITE else self.abbreviation.lower()
+
     def place(self, board):
         self.board = board
 
     def orthogonal_moves(self, position: BoardCoordinates, distance: int) -> list[ChessMove]:
         """Find all possible orthogonal moves from a position up to (and including) `distance` steps"""
         legal_moves = []
-        directions = ((1, 0), (0, 1), (-1, 0), (0, -1))
 
-        for d in directions:
+        for d in ORTHOGONAL_DIRECTIONS:
             legal_moves += self._move_in_direction(position, d, distance)
 
         return legal_moves
@@ -32,13 +46,30 @@ class Piece(ABC):
     def diagonal_moves(self, position: BoardCoordinates, distance: int) -> list[ChessMove]:
         """Find all possible diagonal moves from a position up to (and including) `distance` steps"""
         legal_moves = []
-        directions = ((1, 1), (-1, 1), (-1, -1), (1, -1))
 
-        for d in directions:
+        for d in DIAGONAL_DIRECTIONS:
             legal_moves += self._move_in_direction(position, d, distance)
 
         return legal_moves
 
+    def orthogonal_attacks(self, position: BoardCoordinates, distance: int) -> list[BoardCoordinates]:
+        """Find all squares attacked orthogonally from a position up to (and including) `distance` steps"""
+        attacked = []
+
+        for d in ORTHOGONAL_DIRECTIONS:
+            attacked += self._attack_in_direction(position, d, distance)
+
+        return attacked
+
+    def diagonal_attacks(self, position: BoardCoordinates, distance: int) -> list[BoardCoordinates]:
+        """Find all squares attacked diagonally from a position up to (and including) `distance` steps"""
+        attacked = []
+
+        for d in DIAGONAL_DIRECTIONS:
+            attacked += self._attack_in_direction(position, d, distance)
+
+        return attacked
+
     def _move_in_direction(self, position: BoardCoordinates, direction: Direction, distance: int) -> list[ChessMove]:
         collision = False
         moves: list[ChessMove] = []
@@ -58,6 +89,20 @@ class Piece(ABC):
 
         return moves
 
+    def _attack_in_direction(self, position: BoardCoordinates, direction: Direction, distance: int) -> list[BoardCoordinates]:
+        attacked: list[BoardCoordinates] = []
+
+        for i in range(1, distance+1):
+            upcoming = self._increment(position, direction, i)
+            if not upcoming.is_in_bounds():
+                break
+
+            attacked.append(upcoming)
+            if self.board.get_piece_at(upcoming) is not None:
+                break
+
+        return attacked
+
     def _increment(self, position: BoardCoordinates, direction: Direction, distance: int) -> BoardCoordinates:
         return BoardCoordinates(position.row + direction[0] * distance, position.col + direction[1] * distance)
 
@@ -5,9 +5,15 @@ from .piece import Piece
 
 
 class Queen(Piece):
+    __slots__ = ()
+
     def __init__(self, color: Color):
         super().__init__(color)
         self.abbreviation = "Q"
 
     def possible_moves(self, position: BoardCoordinates) -> list[ChessMove]:
         return super().orthogonal_moves(position, BOARD_SIZE) + super().diagonal_moves(position, BOARD_SIZE)
+
+    def attacked_squares(self, position: BoardCoordinates) -> list[BoardCoordinates]:
+        return super().orthogonal_attacks(position, BOARD_SIZE) + super().diagonal_attacks(position, BOARD_SIZE)
+
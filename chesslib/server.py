@@ -0,0 +1,303 @@
+import argparse
+import asyncio
+import json
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from itertools import count
+from typing import AsyncIterator
+
+from .constants import INIT_FEN, InvalidFEN, InvalidSAN
+from .board import Board
+from .bitboard import BitBoard
+from .chess_move import ChessMove
+from .journal import Journal
+from . import instrumentation
+from .pgn import san, parse_san
+from .termination import Termination
+
+BACKENDS = {"board": Board, "bitboard": BitBoard}
+# Longest request line accepted; a client sending more is disconnected
+MAX_LINE = 1 << 16
+DEFAULT_MAX_GAMES = 100000
+# Seconds a change waits for others to share its journal commit
+DEFAULT_COMMIT_DELAY = 0.002
+
+
+class RequestError(Exception): pass
+
+
+class Game:
+    def __init__(self, board):
+        self.board = board
+        # Requests on one game are handled one at a time, even when they are run on an executor
+        self.lock = asyncio.Lock()
+
+
+class GameServer:
+    """
+    Hosts many games in one process, spoken to over TCP or Unix sockets with one JSON object per line.
+    Each request has an `op` and its arguments, and gets exactly one reply, in order:
+
+        {"op": "new", "fen": ...}              -> {"ok": true, "game": 1, "fen": ...}
+        {"op": "load", "game": 1, "fen": ...}  -> {"ok": true, "fen": ...}
+        {"op": "move", "game": 1, "move": "e2e4" or "e4"}  -> {"ok": true, "move": "e2e4", "san": "e4", "fen": ...}
+        {"op": "legal_moves", "game": 1}       -> {"ok": true, "moves": ["a2a3", ...]}
+        {"op": "status", "game": 1}            -> {"ok": true, "fen": ..., "turn": "white", "check": false,
+                                                   "termination": "threefold repetition" or null, ...}
+        {"op": "close", "game": 1}             -> {"ok": true}
+        {"op": "stats"}                        -> {"ok": true, "enabled": false, "stages": {"BitBoard.move": ...}}
+        {"op": "stats", "format": "prometheus"} -> {"ok": true, "text": ...}
+
+    Failures reply `{"ok": false, "error": ...}`. A request's `id`, if any, is copied to its reply.
+    A connection's requests are handled one after another, and the next one is not read until the reply
+    to the last has been sent, so a client that stops reading stops being served.
+
+    With a `journal`, the games in it are resumed, and a change is only replied to once it is on disk.
+    Changes made within `commit_delay` seconds of each other are written with one fsync.
+    """
+    def __init__(self, backend: str = "bitboard", max_games: int = DEFAULT_MAX_GAMES, executor: Executor | None = None,
+                 journal: Journal | None = None, commit_delay: float = DEFAULT_COMMIT_DELAY):
+        self.backend = BACKENDS[backend]
+        self.max_games = max_games
+        # Where board work runs; `None` runs it on the event loop, which is fastest for the bitboard backend.
+        # A process pool works on copies of the boards, so changed boards are always returned and stored back.
+        self.executor = executor
+        self.games: dict[int, Game] = {}
+        self.journal = journal
+        self.commit_delay = commit_delay
+        self._commit: asyncio.Future | None = None
+        if journal is not None:
+            self.games = {game_id: Game(board) for game_id, board in journal.recover(self.backend).items()}
+        self._game_ids = count(max(self.games, default=0) + 1)
+        self.operations = {"new": self._new, "load": self._load, "move": self._move, "legal_moves": self._legal_moves,
+                           "status": self._status, "close": self._close, "stats": self._stats}
+
+    async def serve_tcp(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_LINE)
+
+    async def serve_unix(self, path: str) -> asyncio.Server:
+        return await asyncio.start_unix_server(self.handle_connection, path, limit=MAX_LINE)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    writer.write(self._encode({"ok": False, "error": f"request longer than {MAX_LINE} bytes"}))
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+
+                writer.write(self._encode(await self.handle_line(line)))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_line(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"ok": False, "error": "request is not JSON"}
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "request is not a JSON object"}
+        return await self.handle_request(request)
+
+    async def handle_request(self, request: dict) -> dict:
+        try:
+            op = request.get("op")
+            if not isinstance(op, str) or op not in self.operations:
+                raise RequestError(f"unknown op {op!r}")
+            reply = await self.operations[op](request)
+            reply["ok"] = True
+        except RequestError as e:
+            reply = {"ok": False, "error": str(e)}
+        except Exception as e:
+            # Whatever went wrong, the request still gets its one reply and the connection stays open
+            reply = {"ok": False, "error": f"internal error: {type(e).__name__}: {e}"}
+        if "id" in request:
+            reply["id"] = request["id"]
+        return reply
+
+    async def _new(self, request: dict) -> dict:
+        if len(self.games) >= self.max_games:
+            raise RequestError("too many games")
+        fen = _fen(request)
+        # The slot is taken before loading, so concurrent requests cannot all pass the limit
+        game_id = next(self._game_ids)
+        game = self.games[game_id] = Game(self.backend())
+        async with game.lock:
+            try:
+                game.board = board = await self._run(_load_board, game.board, fen)
+            except BaseException:
+                del self.games[game_id]
+                raise
+            if self.journal is not None:
+                self.journal.snapshot(game_id, board)
+                await self._durable()
+        return {"game": game_id, "fen": board.fen()}
+
+    async def _load(self, request: dict) -> dict:
+        async with self._locked(request) as game:
+            game.board = board = await self._run(_load_board, game.board, _fen(request))
+            if self.journal is not None:
+                self.journal.snapshot(request["game"], board)
+                await self._durable()
+        return {"fen": board.fen()}
+
+    async def _move(self, request: dict) -> dict:
+        self._game(request)
+        if not isinstance(request.get("move"), str):
+            raise RequestError("missing move")
+        async with self._locked(request) as game:
+            game.board, move, reply = await self._run(_make_move, game.board, request["move"])
+            if self.journal is not None:
+                self.journal.record_move(request["game"], game.board, move)
+                await self._durable()
+        return reply
+
+    async def _legal_moves(self, request: dict) -> dict:
+        async with self._locked(request) as game:
+            moves = await self._run(game.board.legal_moves)
+        return {"moves": [str(m) for m in moves]}
+
+    async def _status(self, request: dict) -> dict:
+        async with self._locked(request) as game:
+            return await self._run(_status, game.board)
+
+    async def _close(self, request: dict) -> dict:
+        # Requests already waiting for the game find it gone once they get the lock
+        async with self._locked(request):
+            del self.games[request["game"]]
+            if self.journal is not None:
+                self.journal.close_game(request["game"])
+                await self._durable()
+        return {}
+
+    async def _stats(self, request: dict) -> dict:
+        """Counters of `chesslib.instrumentation`, filled while it is enabled, e.g. with `--instrument`"""
+        if request.get("format") == "prometheus":
+            return {"text": instrumentation.stats.to_prometheus()}
+        return {"enabled": instrumentation.enabled(), "stages": instrumentation.stats.to_dict()}
+
+    def _game(self, request: dict) -> Game:
+        game_id = request.get("game")
+        if not isinstance(game_id, int) or isinstance(game_id, bool):
+            raise RequestError(f"game must be an integer, not {game_id!r}")
+        game = self.games.get(game_id)
+        if game is None:
+            raise RequestError(f"no game {request.get('game')!r}")
+        return game
+
+    @asynccontextmanager
+    async def _locked(self, request: dict) -> AsyncIterator[Game]:
+        """Hold the lock of the request's game, failing if the game was closed while waiting for it"""
+        game = self._game(request)
+        async with game.lock:
+            if self.games.get(request["game"]) is not game:
+                raise RequestError(f"no game {request['game']!r}")
+            yield game
+
+    async def _durable(self):
+        """Wait until everything journalled so far is on disk; changes arriving together share one commit"""
+        if self._commit is None:
+            self._commit = asyncio.ensure_future(self._group_commit())
+        await asyncio.shield(self._commit)
+
+    async def _group_commit(self):
+        await asyncio.sleep(self.commit_delay)
+        # Changes journalled from here on wait for the next commit
+        self._commit = None
+        await asyncio.get_running_loop().run_in_executor(None, self.journal.commit)
+
+    async def _run(self, function, *args):
+        if self.executor is None:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    @staticmethod
+    def _encode(reply: dict) -> bytes:
+        return json.dumps(reply, separators=(",", ":")).encode() + b"\n"
+
+
+def _fen(request: dict) -> str:
+    fen = request.get("fen", INIT_FEN)
+    if not isinstance(fen, str):
+        raise RequestError(f"fen must be a string, not {fen!r}")
+    return fen
+
+
+def _load_board(board, fen: str):
+    try:
+        board.load(fen)
+    except InvalidFEN as e:
+        raise RequestError(f"invalid FEN: {e}")
+    return board
+
+
+def _make_move(board, text: str) -> tuple[object, ChessMove, dict]:
+    """Play a move given in coordinate notation, such as `e7e8q`, or in SAN, returning the board it was played on"""
+    move = next((m for m in board.iter_legal_moves() if str(m) == text), None)
+    if move is None:
+        try:
+            move = parse_san(board, text)
+        except InvalidSAN as e:
+            raise RequestError(str(e))
+    movetext = san(board, move)
+    board.push(move)
+    return board, move, {"move": str(move), "san": movetext, "fen": board.fen()}
+
+
+def _status(board) -> dict:
+    player = board.current_player
+    check = board.check_validator(player)
+    termination = board.termination()
+    return {"fen": board.fen(), "turn": str(player), "check": check,
+            "checkmate": termination == Termination.CHECKMATE, "stalemate": termination == Termination.STALEMATE,
+            "termination": None if termination is None else termination.value}
+
+
+async def serve(server: GameServer, host: str, port: int, unix: str | None):
+    listener = await (server.serve_unix(unix) if unix is not None else server.serve_tcp(host, port))
+    for socket in listener.sockets:
+        print(f"serving on {socket.getsockname()}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host chess games over a JSON lines socket protocol")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--backend", choices=BACKENDS, default="bitboard")
+    parser.add_argument("--max-games", type=int, default=DEFAULT_MAX_GAMES)
+    parser.add_argument("--journal", help="log games to this file, and resume the games already in it")
+    parser.add_argument("--instrument", action="store_true", help="count and time board operations for the stats op")
+    args = parser.parse_args()
+
+    if args.instrument:
+        instrumentation.enable()
+
+    journal = None
+    if args.journal is not None:
+        journal = Journal(args.journal)
+    server = GameServer(args.backend, args.max_games, journal=journal)
+    if journal is not None:
+        # The log is rewritten as one snapshot per game, so it only grows with this run's moves
+        journal.compact({game_id: game.board for game_id, game in server.games.items()})
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if journal is not None:
+            journal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,532 @@
+import argparse
+import mmap
+import os
+import struct
+import time
+from itertools import product
+
+from .constants import BOARD_SIZE, INIT_FEN
+from .utils import Color, parse_letter_coordinates
+from .chess_move import ChessMove
+from .bitboard import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks, bit_squares
+
+# Each position is one byte: 0 for a draw, 255 for an illegal placement, otherwise the distance to mate in
+# plies plus one. Odd distances are wins for the side to move, even ones losses; 0 plies means checkmated.
+DRAW = 0
+ILLEGAL = 255
+MAX_DISTANCE = 253
+# Results for the side to move
+WIN, LOSS = 1, -1
+BLACK, WHITE = Color.BLACK.value, Color.WHITE.value
+
+# Table files: a header, then one byte per position. Positions are indexed by side to move, the white king's
+# square within the symmetry region, then the square of every other piece, 64 values each.
+HEADER = struct.Struct("<4sBBB16s")
+MAGIC = b"CLTB"
+VERSION = 1
+PIECE_ORDER = "KQRBNP"
+FILE_EXTENSION = ".tb"
+
+# Without pawns the board has 8 symmetries, so the white king is kept to the a1-d1-d4 triangle;
+# with pawns only the files can be mirrored, so it is kept to files a-d
+PAWNLESS, PAWNS = 0, 1
+
+
+def _transforms(allow_rank_flips: bool) -> list[list[int]]:
+    transforms = []
+    for swap in ((False, True) if allow_rank_flips else (False,)):
+        for flip_rows in ((False, True) if allow_rank_flips else (False,)):
+            for flip_cols in (False, True):
+                table = []
+                for square in range(64):
+                    row, col = divmod(square, BOARD_SIZE)
+                    if swap:
+                        row, col = col, row
+                    if flip_rows:
+                        row = BOARD_SIZE - 1 - row
+                    if flip_cols:
+                        col = BOARD_SIZE - 1 - col
+                    table.append(row * BOARD_SIZE + col)
+                transforms.append(table)
+    return transforms
+
+
+def _king_regions() -> tuple[tuple[list[int], list[list[int]]], ...]:
+    """Per symmetry kind: the white king squares stored, and for every square, a transform taking it there"""
+    regions = []
+    for symmetry, in_region in ((PAWNLESS, lambda row, col: BOARD_SIZE - 1 - row <= col <= 3),
+                                (PAWNS, lambda row, col: col <= 3)):
+        transforms = _transforms(symmetry == PAWNLESS)
+        region = [s for s in range(64) if in_region(*divmod(s, BOARD_SIZE))]
+        king_transforms = [next(t for t in transforms if t[square] in region) for square in range(64)]
+        regions.append((region, king_transforms))
+    return tuple(regions)
+
+
+KING_REGIONS = _king_regions()
+
+
+def split_material(material: str) -> tuple[str, str]:
+    """White and black pieces of a material string such as `KRK` or `KBNK`, each in `KQRBNP` order"""
+    material = material.upper()
+    if not material.startswith("K") or material.count("K") != 2 or material.strip(PIECE_ORDER):
+        raise ValueError(f"bad material {material!r}")
+    split = material.index("K", 1)
+    order = PIECE_ORDER.index
+    return "K" + "".join(sorted(material[1:split], key=order)), "K" + "".join(sorted(material[split + 1:], key=order))
+
+
+def _table_pieces(material: str) -> list[tuple[str, int]]:
+    """Pieces in index order: white king, black king, then the other white and black pieces, as (kind, color value)"""
+    white, black = split_material(material)
+    return ([("K", WHITE), ("K", BLACK)] + [(p, WHITE) for p in white[1:]]
+            + [(p, BLACK) for p in black[1:]])
+
+
+def _no_mate_possible(material: str) -> bool:
+    """A lone king against a king and at most one minor piece can never be mated, so every position is a draw"""
+    others = material.replace("K", "")
+    return len(others) == 0 or others in ("B", "N")
+
+
+def _attacks(kind: str, color: int, square: int, occupancy: int) -> int:
+    if kind == "K":
+        return KING_ATTACKS[square]
+    if kind == "N":
+        return KNIGHT_ATTACKS[square]
+    if kind == "P":
+        return PAWN_ATTACKS[color][square]
+    if kind == "R":
+        return rook_attacks(square, occupancy)
+    if kind == "B":
+        return bishop_attacks(square, occupancy)
+    return rook_attacks(square, occupancy) | bishop_attacks(square, occupancy)
+
+
+def _attacked(pieces: list[tuple[str, int, int]], square: int, by_color: int, occupancy: int) -> bool:
+    for kind, color, at in pieces:
+        if color == by_color and _attacks(kind, color, at, occupancy) >> square & 1:
+            return True
+    return False
+
+
+def _index(pieces: list[tuple[str, int]], placement: list[tuple[str, int, int]], side: int) -> int:
+    """Index of a placement of `(kind, color, square)` in a table of `pieces`; equal pieces may come in any order"""
+    remaining = list(placement)
+    index = side
+    for kind, color in pieces:
+        for i, (k, c, square) in enumerate(remaining):
+            if k == kind and c == color:
+                index = index * 64 + square
+                del remaining[i]
+                break
+    return index
+
+
+class _Generator:
+    """Retrograde analysis of one material set, given the finished tables of everything it converts into"""
+    def __init__(self, material: str, tables: dict[str, bytearray]):
+        self.material = material
+        self.pieces = _table_pieces(material)
+        self.count = len(self.pieces)
+        self.positions = 64 ** self.count
+        self.tables = tables
+        self.values = bytearray(2 * self.positions)
+        self.in_check = bytearray(2 * self.positions)
+
+    def generate(self) -> bytearray:
+        self._mark_illegal()
+        counts, exits, buckets = self._count_moves()
+        self._resolve(counts, exits, buckets)
+        return self.values
+
+    def _mark_illegal(self):
+        values, in_check, pieces = self.values, self.in_check, self.pieces
+        for squares in product(range(64), repeat=self.count):
+            index = 0
+            for square in squares:
+                index = index * 64 + square
+            placement = [(kind, color, square) for (kind, color), square in zip(pieces, squares)]
+            if len(set(squares)) < self.count or any(k == "P" and not 8 <= s < 56 for k, _, s in placement):
+                values[index] = values[self.positions + index] = ILLEGAL
+                continue
+
+            occupancy = 0
+            for square in squares:
+                occupancy |= 1 << square
+            for side in (BLACK, WHITE):
+                king = squares[0] if side == WHITE else squares[1]
+                if _attacked(placement, king, side ^ 1, occupancy):
+                    # The side not to move is in check, so it is illegal for the other side to be to move
+                    values[(side ^ 1) * self.positions + index] = ILLEGAL
+                    in_check[side * self.positions + index] = 1
+
+    def _moves(self, base: int, squares: tuple[int, ...], side: int):
+        """
+        Successors of the position `base` (the placement index of `squares`) with `side` to move, as
+        `(in-table index, None)`, or `(None, value for the opponent)` for moves leaving the table
+        """
+        occupancy = [0, 0]
+        for (_, color), square in zip(self.pieces, squares):
+            occupancy[color] |= 1 << square
+        both = occupancy[0] | occupancy[1]
+        opponent = (side ^ 1) * self.positions
+
+        for slot, ((kind, color), square) in enumerate(zip(self.pieces, squares)):
+            if color != side:
+                continue
+            if kind == "P":
+                targets = PAWN_ATTACKS[color][square] & occupancy[color ^ 1]
+                step = 8 if color == BLACK else -8
+                if not both >> (square + step) & 1:
+                    targets |= 1 << (square + step)
+                    home_row = 1 if color == BLACK else 6
+                    if square // BOARD_SIZE == home_row and not both >> (square + 2 * step) & 1:
+                        targets |= 1 << (square + 2 * step)
+            else:
+                targets = _attacks(kind, color, square, both) & ~occupancy[color]
+
+            weight = 64 ** (self.count - 1 - slot)
+            while targets:
+                bit = targets & -targets
+                targets ^= bit
+                target = bit.bit_length() - 1
+                promotion = kind == "P" and target // BOARD_SIZE in (0, BOARD_SIZE - 1)
+                if not both & bit and not promotion:
+                    yield opponent + base + (target - square) * weight, None
+                    continue
+
+                placement = [(k, c, target if s == square else s)
+                             for (k, c), s in zip(self.pieces, squares) if s != target]
+                for promoted in ("Q", "R", "B", "N") if promotion else (kind,):
+                    converted = [(promoted, c, s) if s == target else (k, c, s) for k, c, s in placement]
+                    value = self._exit_value(converted, side ^ 1)
+                    if value != ILLEGAL:
+                        yield None, value
+
+    def _exit_value(self, placement: list[tuple[str, int, int]], side: int) -> int:
+        """Value, for `side` to move, of a position reached by a capture or promotion"""
+        white = "".join(sorted((k for k, c, _ in placement if c == WHITE), key=PIECE_ORDER.index))
+        black = "".join(sorted((k for k, c, _ in placement if c == BLACK), key=PIECE_ORDER.index))
+        material = white + black
+        if _no_mate_possible(material):
+            occupancy = 0
+            for _, _, square in placement:
+                occupancy |= 1 << square
+            king = next(s for k, c, s in placement if k == "K" and c == side ^ 1)
+            return ILLEGAL if _attacked(placement, king, side, occupancy) else DRAW
+
+        table = self.tables[material]
+        return table[_index(_table_pieces(material), placement, side)]
+
+    def _count_moves(self) -> tuple[bytearray, bytearray, list[list[int]]]:
+        """
+        Count every position's legal moves that stay in this table, and settle what the moves leaving it
+        decide: a win through a capture or promotion, or a loss when every move leaves the table into a loss
+        """
+        values, positions = self.values, self.positions
+        counts = bytearray(2 * positions)
+        # Per position, 1 if a move leaving the table draws or wins, otherwise the distance of the longest
+        # loss it leads to, plus two, so that 0 means no move leaves the table
+        exits = bytearray(2 * positions)
+        buckets: list[list[int]] = [[] for _ in range(MAX_DISTANCE + 2)]
+
+        for squares in product(range(64), repeat=self.count):
+            base = 0
+            for square in squares:
+                base = base * 64 + square
+            for side in (BLACK, WHITE):
+                index = side * positions + base
+                if values[index] == ILLEGAL:
+                    continue
+
+                count = 0
+                best_win = None
+                longest_loss = -1
+                escapes = False
+                for successor, value in self._moves(base, squares, side):
+                    if successor is not None:
+                        if values[successor] != ILLEGAL:
+                            count += 1
+                    elif value == DRAW:
+                        escapes = True
+                    elif value % 2:
+                        # The opponent is mated in `value - 1` plies
+                        if best_win is None or value < best_win:
+                            best_win = value
+                    else:
+                        longest_loss = max(longest_loss, value)
+
+                counts[index] = count
+                if best_win is not None:
+                    exits[index] = 1
+                    buckets[best_win].append(index)
+                elif escapes:
+                    exits[index] = 1
+                elif longest_loss >= 0:
+                    exits[index] = longest_loss + 1
+                    if count == 0:
+                        buckets[longest_loss].append(index)
+                elif count == 0 and self.in_check[index]:
+                    buckets[0].append(index)
+
+        return counts, exits, buckets
+
+    def _resolve(self, counts: bytearray, exits: bytearray, buckets: list[list[int]]):
+        """Settle positions in order of distance to mate, walking back from each to the positions that lead to it"""
+        values, positions = self.values, self.positions
+        done = bytearray(2 * positions)
+        for distance in range(MAX_DISTANCE + 1):
+            for index in buckets[distance]:
+                if done[index]:
+                    continue
+                done[index] = 1
+                values[index] = distance + 1
+                lost = distance % 2 == 0
+
+                for previous in self._unmoves(index):
+                    if done[previous] or values[previous] == ILLEGAL:
+                        continue
+                    if lost:
+                        buckets[distance + 1].append(previous)
+                        continue
+                    counts[previous] -= 1
+                    if counts[previous] == 0 and exits[previous] != 1:
+                        # Every move loses; the slowest loss is the distance
+                        buckets[max(distance + 1, exits[previous] - 1)].append(previous)
+
+        # Positions never settled are draws, including stalemates
+        for index in range(2 * positions):
+            if not done[index] and values[index] != ILLEGAL:
+                values[index] = DRAW
+
+    def _unmoves(self, index: int):
+        """Positions one move earlier, by the side not to move, that stay in this table (no uncaptures)"""
+        side = index // self.positions
+        squares = []
+        rest = index % self.positions
+        for _ in range(self.count):
+            rest, square = divmod(rest, 64)
+            squares.append(square)
+        squares.reverse()
+
+        both = 0
+        for square in squares:
+            both |= 1 << square
+        mover = side ^ 1
+        base = mover * self.positions
+        for slot, ((kind, color), square) in enumerate(zip(self.pieces, squares)):
+            if color != mover:
+                continue
+            if kind == "P":
+                step = -8 if color == BLACK else 8
+                origins = []
+                back = square + step
+                if 8 <= back < 56 and not both >> back & 1:
+                    origins.append(back)
+                    double_row = 3 if color == BLACK else 4
+                    if square // BOARD_SIZE == double_row and not both >> (back + step) & 1:
+                        origins.append(back + step)
+            else:
+                origins = bit_squares(_attacks(kind, color, square, both) & ~both)
+
+            weight = 64 ** (self.count - 1 - slot)
+            for origin in origins:
+                yield index - side * self.positions + base + (origin - square) * weight
+
+
+class Tablebase:
+    """Tables read from a directory of `.tb` files, memory-mapped and probed without loading them"""
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.files: dict[str, tuple[mmap.mmap, int, list[tuple[str, int]]] | None] = {}
+
+    def probe(self, board) -> tuple[int, int] | None:
+        """
+        `(WIN, LOSS or DRAW for the side to move, plies to mate)` for a position covered by a table, or `None`.
+        Castling rights and en passant are not considered; positions with castling rights are not probed.
+        """
+        if board.castling:
+            return None
+
+        placement = []
+        for key, piece in board.items():
+            square = parse_letter_coordinates(key)
+            placement.append((piece.abbreviation, piece.color.value, square.index))
+        return self._probe(placement, board.current_player.value)
+
+    def best_move(self, board) -> ChessMove | None:
+        """A move keeping the best result: the quickest win, otherwise a draw, otherwise the slowest loss"""
+        best, best_score = None, None
+        for move in board.legal_moves():
+            board.push(move)
+            result = self.probe(board)
+            board.pop()
+            if result is None:
+                return None
+
+            outcome, distance = result
+            # Scored for the mover, whose opponent's result is `outcome`
+            if outcome == LOSS:
+                score = 1000 - distance
+            elif outcome == DRAW:
+                score = 0
+            else:
+                score = distance - 1000
+            if best_score is None or score > best_score:
+                best, best_score = move, score
+        return best
+
+    def close(self):
+        for entry in self.files.values():
+            if entry is not None:
+                entry[0].close()
+        self.files = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _probe(self, placement: list[tuple[str, int, int]], side: int) -> tuple[int, int] | None:
+        white = "".join(sorted((k for k, c, _ in placement if c == WHITE), key=PIECE_ORDER.index))
+        black = "".join(sorted((k for k, c, _ in placement if c == BLACK), key=PIECE_ORDER.index))
+        if _no_mate_possible(white + black):
+            return DRAW, 0
+
+        table = self._open(white + black)
+        if table is None:
+            # Tables are generated with colors one way round; mirror the board to use them the other way
+            table = self._open(black + white)
+            if table is None:
+                return None
+            placement = [(k, c ^ 1, (BOARD_SIZE - 1 - s // BOARD_SIZE) * BOARD_SIZE + s % BOARD_SIZE)
+                         for k, c, s in placement]
+            side ^= 1
+
+        data, symmetry, pieces = table
+        region, king_transforms = KING_REGIONS[symmetry]
+        white_king = next(s for k, c, s in placement if k == "K" and c == WHITE)
+        transform = king_transforms[white_king]
+        placement = [(k, c, transform[s]) for k, c, s in placement]
+
+        index = _index(pieces, placement, 0)
+        rest_size = 64 ** (len(pieces) - 1)
+        king_index = index // rest_size
+        offset = HEADER.size + (side * len(region) + region.index(king_index)) * rest_size + index % rest_size
+        value = data[offset]
+        if value == ILLEGAL:
+            return None
+        if value == DRAW:
+            return DRAW, 0
+        return (WIN if value % 2 == 0 else LOSS), value - 1
+
+    def _open(self, material: str):
+        if material not in self.files:
+            path = os.path.join(self.directory, material + FILE_EXTENSION)
+            if not os.path.exists(path):
+                self.files[material] = None
+            else:
+                with open(path, "rb") as f:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, _, symmetry, _ = HEADER.unpack_from(data)
+                if magic != MAGIC or version != VERSION:
+                    raise ValueError(f"{path} is not a version {VERSION} table")
+                self.files[material] = (data, symmetry, _table_pieces(material))
+        return self.files[material]
+
+
+def generate(material: str, tables: dict[str, bytearray] | None = None) -> dict[str, bytearray]:
+    """
+    Build the full table for `material`, and first those of every material it can convert into by a capture
+    or promotion. Returns all of them by material; tables already in `tables` are reused.
+    """
+    tables = {} if tables is None else tables
+    white, black = split_material(material)
+    material = white + black
+    if material in tables or _no_mate_possible(material):
+        return tables
+
+    pieces = _table_pieces(material)
+    for i, (kind, color) in enumerate(pieces):
+        if kind == "K":
+            continue
+        remaining = [k for j, (k, c) in enumerate(pieces) if j != i]
+        colors = [c for j, (k, c) in enumerate(pieces) if j != i]
+        generate(_material_of(remaining, colors), tables)
+        if kind == "P":
+            for promoted in ("Q", "R", "B", "N"):
+                generate(_material_of(remaining + [promoted], colors + [color]), tables)
+                # A promotion can also capture
+                for j, (other, other_color) in enumerate(pieces):
+                    if other_color != color and other != "K":
+                        rest = [k for n, (k, c) in enumerate(pieces) if n not in (i, j)] + [promoted]
+                        rest_colors = [c for n, (k, c) in enumerate(pieces) if n not in (i, j)] + [color]
+                        generate(_material_of(rest, rest_colors), tables)
+
+    tables[material] = _Generator(material, tables).generate()
+    return tables
+
+
+def _material_of(kinds: list[str], colors: list[int]) -> str:
+    white = "".join(sorted((k for k, c in zip(kinds, colors) if c == WHITE), key=PIECE_ORDER.index))
+    black = "".join(sorted((k for k, c in zip(kinds, colors) if c == BLACK), key=PIECE_ORDER.index))
+    return white + black
+
+
+def save(material: str, values: bytearray, directory: str):
+    """Write a full table to `directory`, keeping only the positions in the white king's symmetry region"""
+    pieces = _table_pieces(material)
+    symmetry = PAWNS if any(kind == "P" for kind, _ in pieces) else PAWNLESS
+    region, _ = KING_REGIONS[symmetry]
+    rest_size = 64 ** (len(pieces) - 1)
+    positions = 64 * rest_size
+
+    with open(os.path.join(directory, material + FILE_EXTENSION), "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(pieces), symmetry, material.encode()))
+        for side in (0, 1):
+            for king in region:
+                start = side * positions + king * rest_size
+                f.write(values[start:start + rest_size])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate or probe endgame tablebases")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    generate_parser = subparsers.add_parser("generate", help="build tables by retrograde analysis")
+    generate_parser.add_argument("materials", nargs="+", help="material sets such as KQK, KRK, KPK or KBNK")
+    generate_parser.add_argument("--directory", default=".", help="where to write the tables")
+    probe_parser = subparsers.add_parser("probe", help="look up a position")
+    probe_parser.add_argument("fen", nargs="?", default=INIT_FEN)
+    probe_parser.add_argument("--directory", default=".", help="where the tables are")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        tables = {}
+        for material in args.materials:
+            start = time.perf_counter()
+            generated = set(tables)
+            generate(material, tables)
+            for name in tables.keys() - generated:
+                save(name, tables[name], args.directory)
+                print(f"{name}: written to {os.path.join(args.directory, name + FILE_EXTENSION)}")
+            print(f"{material}: {time.perf_counter() - start:.1f}s")
+        return
+
+    # Imported here because the board is only needed to read the position
+    from .board import Board
+    board = Board(args.fen)
+    with Tablebase(args.directory) as tablebase:
+        result = tablebase.probe(board)
+        if result is None:
+            print("not in the tablebase")
+            return
+        outcome, distance = result
+        name = {WIN: "win", DRAW: "draw", LOSS: "loss"}[outcome]
+        print(f"{name}" + (f", mate in {distance} plies" if outcome != DRAW else ""))
+        print(f"best move {tablebase.best_move(board)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from enum import Enum
+
+from .utils import Color
+
+# Halfmoves without a capture or pawn move after which the game is drawn
+FIFTY_MOVE_PLIES = 100
+
+
+class Termination(Enum):
+    """Ways a game ends by rule, named as in a PGN `Termination` tag"""
+    CHECKMATE = "checkmate"
+    STALEMATE = "stalemate"
+    FIFTY_MOVES = "fifty-move rule"
+    THREEFOLD_REPETITION = "threefold repetition"
+    INSUFFICIENT_MATERIAL = "insufficient material"
+
+    @property
+    def is_draw(self) -> bool:
+        return self != Termination.CHECKMATE
+
+
+class GameStatus:
+    """
+    Game endings for the boards. Each board keeps `positions`, the keys of the positions before every move on its
+    move stack, so a repetition is found by comparing ints, and only as far back as the last capture or pawn move,
+    since no earlier position can come back. The status is worked out once per position and cached, so asking
+    again after a move, as `move` does for its subscribers, is O(1).
+    """
+    positions: list[int]
+    # (plies pushed, hash, termination) of the last position whose status was worked out, reset by loading and popping
+    _status: tuple[int, int, Termination | None] | None = None
+
+    def repetitions(self) -> int:
+        """Times the current position has occurred, counting this one"""
+        key = self.hash
+        positions = self.positions
+        count = 1
+        # The same side is to move every other ply
+        for i in range(len(positions) - 2, max(len(positions) - self.halfmove_clock, 0) - 1, -2):
+            if positions[i] == key:
+                count += 1
+        return count
+
+    def is_threefold_repetition(self) -> bool:
+        return self.repetitions() >= 3
+
+    def is_fifty_moves(self) -> bool:
+        return self.halfmove_clock >= FIFTY_MOVE_PLIES
+
+    def is_stalemate(self) -> bool:
+        return not self.check_validator(self.current_player) and next(self.iter_legal_moves(), None) is None
+
+    def is_insufficient_material(self) -> bool:
+        """
+        Neither side can mate: bare kings, a lone knight or bishop against a bare king, or only bishops,
+        all on squares of one color
+        """
+        minors = []
+        for key, piece in self.items():
+            abbreviation = piece.abbreviation
+            if abbreviation in "PRQ":
+                return False
+            if abbreviation != "K":
+                minors.append((abbreviation, (ord(key[0]) + ord(key[1])) % 2))
+        if len(minors) <= 1:
+            return True
+        return all(abbreviation == "B" for abbreviation, _ in minors) and len({shade for _, shade in minors}) == 1
+
+    def termination(self) -> Termination | None:
+        """How the game has ended in the current position, or `None` if it goes on"""
+        key = self.hash
+        plies = len(self.positions)
+        status = self._status
+        if status is not None and status[0] == plies and status[1] == key:
+            return status[2]
+
+        player: Color = self.current_player
+        if next(self.iter_legal_moves(), None) is None:
+            termination = Termination.CHECKMATE if self.check_validator(player) else Termination.STALEMATE
+        elif self.is_fifty_moves():
+            termination = Termination.FIFTY_MOVES
+        elif self.is_threefold_repetition():
+            termination = Termination.THREEFOLD_REPETITION
+        elif self.is_insufficient_material():
+            termination = Termination.INSUFFICIENT_MATERIAL
+        else:
+            termination = None
+        self._status = (plies, key, termination)
+        return termination
+
+    def is_game_over(self) -> bool:
+        return self.termination() is not None
+
+    def is_draw(self) -> bool:
+        termination = self.termination()
+        return termination is not None and termination.is_draw
@@ -11,9 +11,24 @@ class Color(Enum):
 
 
 class BoardCoordinates:
-    def __init__(self, row: int, col: int):
-        self.row = row
-        self.col = col
+    """
+    Immutable board square. The 64 on-board squares are interned, so `BoardCoordinates(row, col)` returns
+    the same object every time; out-of-bounds coordinates, used while walking off the board, are not.
+    """
+    __slots__ = ("row", "col", "index")
+
+    def __new__(cls, row: int, col: int):
+        if 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE:
+            return SQUARES[row * BOARD_SIZE + col]
+        return cls._create(row, col)
+
+    @classmethod
+    def _create(cls, row: int, col: int):
+        coordinates = object.__new__(cls)
+        object.__setattr__(coordinates, "row", row)
+        object.__setattr__(coordinates, "col", col)
+        object.__setattr__(coordinates, "index", row * BOARD_SIZE + col)
+        return coordinates
 
     @classmethod
     def from_algebra_notation(cls, col: str, row: int):
@@ -22,26 +37,59 @@ class BoardCoordinates:
 
         return cls(parsed_row, parsed_column)
 
+    def __setattr__(self, name, value):
+        raise AttributeError("BoardCoordinates are immutable")
+
+    def __reduce__(self):
+        return BoardCoordinates, (self.row, self.col)
+
     def __str__(self):
         return self.letter_notation()
 
+    def __repr__(self):
+        return f"BoardCoordinates({self.row}, {self.col})"
+
     def __eq__(self, other) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, BoardCoordinates):
             raise TypeError("BoardCoordinates can only be compared to BoardCoordinates")
 
         return self.col == other.col and self.row == other.row
 
+    def __hash__(self) -> int:
+        # Unique for on-board squares; off-board coordinates may collide, which `__eq__` sorts out
+        return self.index
+
     def is_in_bounds(self) -> bool:
         return 0 <= self.row < BOARD_SIZE and 0 <= self.col < BOARD_SIZE
 
+    def algebra_notation(self) -> str:
+        """Square name as used in FEN and move notation, the inverse of `from_algebra_notation`"""
+        if not self.is_in_bounds():
+            raise OutOfBoundsError
+
+        return ALGEBRA_NOTATIONS[self.index]
+
     def letter_notation(self) -> str:
         if not self.is_in_bounds():
             raise OutOfBoundsError
 
-        return f"{COLUMN_LABELS[self.col]}{ROW_LABELS[self.row]}"
+        return LETTER_NOTATIONS[self.index]
+
+
+# Every on-board square, indexed by `row * 8 + col`, and its names
+SQUARES = tuple(BoardCoordinates._create(row, col) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE))
+LETTER_NOTATIONS = tuple(f"{COLUMN_LABELS[s.col]}{ROW_LABELS[s.row]}" for s in SQUARES)
+ALGEBRA_NOTATIONS = tuple(f"{COLUMN_LABELS[s.col].lower()}{BOARD_SIZE - s.row}" for s in SQUARES)
+SQUARES_BY_LETTER_NOTATION = dict(zip(LETTER_NOTATIONS, SQUARES))
 
 
 def parse_letter_coordinates(value: str) -> BoardCoordinates:
+    square = SQUARES_BY_LETTER_NOTATION.get(value)
+    if square is not None:
+        return square
+
     col = COLUMN_LABELS.index(value[0])
     row = ROW_LABELS.index(int(value[1]))
 
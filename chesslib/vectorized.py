@@ -0,0 +1,253 @@
+import argparse
+import time
+from typing import Iterable
+
+import numpy as np
+
+from .utils import Color
+from .bitboard import (BitBoard, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, KNIGHT_STEPS, KING_STEPS, ROOK_DIRECTIONS,
+                       BISHOP_DIRECTIONS, CASTLES, CASTLING_ROOKS, DOUBLE_PUSH_ROWS, PROMOTION_ROWS, FULL_BOARD)
+
+# Positions are handled many at a time as arrays of the same bitboards `BitBoard` uses: square 0 is A8, and a
+# side's six bitboards are indexed by kind. Every function works on whole arrays, so the interpreter only pays
+# per batch, not per position.
+WHITE, BLACK = Color.WHITE.value, Color.BLACK.value
+ZERO = np.uint64(0)
+ONE = np.uint64(1)
+FILES = [sum(1 << (row * 8 + col) for row in range(8)) for col in range(8)]
+
+
+def _column_mask(dc: int) -> np.uint64:
+    """Squares a step `dc` columns sideways can land on without wrapping around to the other edge"""
+    wrapped = FILES[:dc] if dc > 0 else FILES[8 + dc:]
+    return np.uint64(FULL_BOARD ^ sum(wrapped))
+
+
+def _shifts(steps: tuple[tuple[int, int], ...]) -> list[tuple[int, np.uint64]]:
+    """`(row, col)` steps as a shift of the square index, and the squares the step may land on"""
+    return [(dr * 8 + dc, _column_mask(dc)) for dr, dc in steps]
+
+
+KNIGHT_SHIFTS = _shifts(KNIGHT_STEPS)
+KING_SHIFTS = _shifts(KING_STEPS)
+ROOK_SHIFTS = _shifts(ROOK_DIRECTIONS)
+BISHOP_SHIFTS = _shifts(BISHOP_DIRECTIONS)
+# Indexed by color value, like `bitboard.PAWN_ATTACKS`
+PAWN_SHIFTS = (_shifts(((1, -1), (1, 1))), _shifts(((-1, -1), (-1, 1))))
+DOUBLE_PUSH_MASKS = tuple(np.uint64(row) for row in DOUBLE_PUSH_ROWS)
+PROMOTION_MASKS = tuple(np.uint64(row) for row in PROMOTION_ROWS)
+
+
+class Positions:
+    """
+    N positions as arrays: `pieces` (N, 12) uint64 bitboards indexed like `BitBoard.bitboards`, the color value of
+    the side to move, castling rights as bits like `BitBoard.castling_rights`, and the en passant square, or -1
+    """
+    def __init__(self, pieces: np.ndarray, side: np.ndarray, castling: np.ndarray, en_passant: np.ndarray):
+        self.pieces = np.asarray(pieces, dtype=np.uint64).reshape(-1, 12)
+        self.side = np.asarray(side, dtype=np.uint8)
+        self.castling = np.asarray(castling, dtype=np.uint8)
+        self.en_passant = np.asarray(en_passant, dtype=np.int8)
+
+    def __len__(self):
+        return len(self.side)
+
+    @classmethod
+    def from_boards(cls, boards: Iterable) -> "Positions":
+        """Positions of boards of either backend"""
+        pieces, side, castling, en_passant = [], [], [], []
+        for board in boards:
+            if not isinstance(board, BitBoard):
+                board = BitBoard.from_bytes(board.to_bytes())
+            pieces.append(board.bitboards)
+            side.append(board.current_player.value)
+            castling.append(board.castling_rights)
+            en_passant.append(-1 if board.en_passant_square is None else board.en_passant_square)
+        return cls(np.array(pieces, dtype=np.uint64), side, castling, en_passant)
+
+    @classmethod
+    def from_fens(cls, fens: Iterable[str]) -> "Positions":
+        board = BitBoard()
+
+        def load(fen: str) -> BitBoard:
+            board.load(fen)
+            return board
+        return cls.from_boards(load(fen) for fen in fens)
+
+
+def _shift(bitboards: np.ndarray, amount: int) -> np.ndarray:
+    return bitboards << np.uint64(amount) if amount > 0 else bitboards >> np.uint64(-amount)
+
+
+def _step(bitboards: np.ndarray, shifts: list[tuple[int, np.uint64]]) -> np.ndarray:
+    """Squares one step away from any square of `bitboards`"""
+    result = np.zeros_like(bitboards)
+    for amount, mask in shifts:
+        result |= _shift(bitboards, amount) & mask
+    return result
+
+
+def _slide(bitboards: np.ndarray, empty: np.ndarray, shifts: list[tuple[int, np.uint64]]) -> np.ndarray:
+    """
+    Squares reached sliding from any square of `bitboards`, up to and including the first occupied square of each
+    ray. Each direction is a Kogge-Stone fill: three doubling shifts instead of one per square.
+    """
+    result = np.zeros_like(bitboards)
+    for amount, mask in shifts:
+        generators = bitboards
+        propagators = empty & mask
+        generators = generators | propagators & _shift(generators, amount)
+        propagators = propagators & _shift(propagators, amount)
+        generators = generators | propagators & _shift(generators, 2 * amount)
+        propagators = propagators & _shift(propagators, 2 * amount)
+        generators = generators | propagators & _shift(generators, 4 * amount)
+        result |= _shift(generators, amount) & mask
+    return result
+
+
+def _pawn_attacks(pawns: np.ndarray, white: np.ndarray) -> np.ndarray:
+    return np.where(white, _step(pawns, PAWN_SHIFTS[WHITE]), _step(pawns, PAWN_SHIFTS[BLACK]))
+
+
+def _attacks(pieces: np.ndarray, occupied: np.ndarray, white: np.ndarray) -> np.ndarray:
+    """Squares attacked by one side, from its (N, 6) bitboards, whether it is white, and all occupied squares"""
+    empty = ~occupied
+    attacks = _pawn_attacks(pieces[:, PAWN], white)
+    attacks |= _step(pieces[:, KNIGHT], KNIGHT_SHIFTS)
+    attacks |= _step(pieces[:, KING], KING_SHIFTS)
+    attacks |= _slide(pieces[:, BISHOP] | pieces[:, QUEEN], empty, BISHOP_SHIFTS)
+    attacks |= _slide(pieces[:, ROOK] | pieces[:, QUEEN], empty, ROOK_SHIFTS)
+    return attacks
+
+
+def _squares(bitboards: np.ndarray) -> np.ndarray:
+    """The bits of uint64 `bitboards` as a bool array with one more axis, of the 64 squares"""
+    data = np.ascontiguousarray(bitboards, dtype="<u8")
+    bits = np.unpackbits(data.view(np.uint8).reshape(*data.shape, 8), axis=-1, bitorder="little")
+    return bits.reshape(*data.shape, 64).astype(bool)
+
+
+def _sides(positions: Positions) -> tuple[np.ndarray, np.ndarray]:
+    """The (N, 6) bitboards of the side to move and of its opponent"""
+    rows = np.arange(len(positions))[:, None]
+    kinds = np.arange(6)
+    side = positions.side.astype(np.intp)[:, None]
+    return positions.pieces[rows, side * 6 + kinds], positions.pieces[rows, (side ^ 1) * 6 + kinds]
+
+
+def attack_masks(positions: Positions) -> np.ndarray:
+    """(N, 2) squares attacked by each color, indexed by color value"""
+    pieces = positions.pieces
+    occupied = np.bitwise_or.reduce(pieces, axis=1)
+    return np.stack([_attacks(pieces[:, color * 6:color * 6 + 6], occupied, np.bool_(color == WHITE))
+                     for color in (BLACK, WHITE)], axis=1)
+
+
+def in_check(positions: Positions) -> np.ndarray:
+    """Whether the side to move is in check, as `check_validator(board.current_player)`"""
+    us, them = _sides(positions)
+    occupied = np.bitwise_or.reduce(positions.pieces, axis=1)
+    return _attacks(them, occupied, positions.side != WHITE) & us[:, KING] != 0
+
+
+def legal_move_counts(positions: Positions) -> np.ndarray:
+    """
+    Number of legal moves of the side to move, as `len(board.legal_moves())`. Every pseudo-legal move of every
+    position is made at once on copies of the bitboards, and those leaving the king attacked are dropped.
+    """
+    n = len(positions)
+    us, them = _sides(positions)
+    white = positions.side == WHITE
+    own = np.bitwise_or.reduce(us, axis=1)
+    enemy = np.bitwise_or.reduce(them, axis=1)
+    occupied = own | enemy
+    en_passant = np.where(positions.en_passant >= 0, ONE << positions.en_passant.clip(0).astype(np.uint64), ZERO)
+
+    # Every piece of the side to move, as (position, kind, square)
+    index, kind, square = np.nonzero(_squares(us))
+    start = ONE << square.astype(np.uint64)
+    empty = ~occupied[index]
+    is_white = white[index]
+    targets = np.zeros(len(index), dtype=np.uint64)
+    for piece, attacks in ((KNIGHT, lambda s, e: _step(s, KNIGHT_SHIFTS)), (KING, lambda s, e: _step(s, KING_SHIFTS)),
+                           (BISHOP, lambda s, e: _slide(s, e, BISHOP_SHIFTS)),
+                           (ROOK, lambda s, e: _slide(s, e, ROOK_SHIFTS)),
+                           (QUEEN, lambda s, e: _slide(s, e, BISHOP_SHIFTS) | _slide(s, e, ROOK_SHIFTS))):
+        selected = kind == piece
+        targets[selected] = attacks(start[selected], empty[selected])
+    pawns = kind == PAWN
+    pawn, pawn_empty, pawn_white = start[pawns], empty[pawns], is_white[pawns]
+    single = np.where(pawn_white, pawn >> np.uint64(8), pawn << np.uint64(8)) & pawn_empty
+    double = np.where(pawn_white, (single & DOUBLE_PUSH_MASKS[WHITE]) >> np.uint64(8),
+                      (single & DOUBLE_PUSH_MASKS[BLACK]) << np.uint64(8)) & pawn_empty
+    captures = _pawn_attacks(pawn, pawn_white) & (enemy[index[pawns]] | en_passant[index[pawns]])
+    targets[pawns] = single | double | captures
+    targets &= ~own[index]
+
+    # Every pseudo-legal move, made on copies of the bitboards
+    piece_index, end = np.nonzero(_squares(targets))
+    position = index[piece_index]
+    moved = kind[piece_index]
+    moving_white = white[position]
+    end_bit = ONE << end.astype(np.uint64)
+    captured_en_passant = (moved == PAWN) & (end_bit == en_passant[position])
+    removed = end_bit | np.where(captured_en_passant,
+                                 np.where(moving_white, end_bit << np.uint64(8), end_bit >> np.uint64(8)), ZERO)
+    occupied_after = occupied[position] & ~start[piece_index] & ~removed | end_bit
+    enemy_after = them[position] & ~removed[:, None]
+    king_after = np.where(moved == KING, end_bit, us[position, KING])
+    legal = _attacks(enemy_after, occupied_after, ~moving_white) & king_after == 0
+
+    promotion_rows = np.where(moving_white, PROMOTION_MASKS[WHITE], PROMOTION_MASKS[BLACK])
+    # Moving a pawn onto the last row is one move per piece it can promote to
+    weights = np.where((moved == PAWN) & (end_bit & promotion_rows != 0), 4, 1)
+    counts = np.bincount(position[legal], weights=weights[legal], minlength=n).astype(np.int64)
+
+    enemy_attacks = _attacks(them, occupied, ~white)
+    for color, castles in ((BLACK, CASTLES[BLACK]), (WHITE, CASTLES[WHITE])):
+        for right, king_start, king_end, between, passed in castles:
+            passed_mask = np.uint64(sum(1 << s for s in passed))
+            counts += ((positions.side == color) & (positions.castling & right != 0)
+                       & (occupied & np.uint64(between) == 0)
+                       & (us[:, KING] >> np.uint64(king_start) & ONE != 0)
+                       & (us[:, ROOK] >> np.uint64(CASTLING_ROOKS[king_end][0]) & ONE != 0)
+                       & (enemy_attacks & passed_mask == 0))
+    return counts
+
+
+def analyse(positions: Positions) -> dict[str, np.ndarray]:
+    """Check, legal move count, checkmate and stalemate of every position, like `chesslib.batch.analyse`"""
+    check = in_check(positions)
+    moves = legal_move_counts(positions)
+    return {"check": check, "legal_moves": moves, "checkmate": check & (moves == 0),
+            "stalemate": ~check & (moves == 0)}
+
+
+def main():
+    # Imported here because the reference positions live with the perft driver
+    from .perft import REFERENCE_POSITIONS
+
+    parser = argparse.ArgumentParser(description="Time vectorized and per-board analysis of the reference positions")
+    parser.add_argument("--count", type=int, default=10000, help="positions to analyse")
+    args = parser.parse_args()
+
+    fens = [fen for fen, _ in REFERENCE_POSITIONS.values()]
+    fens = (fens * (args.count // len(fens) + 1))[:args.count]
+    positions = Positions.from_fens(fens)
+    start = time.perf_counter()
+    analyse(positions)
+    vectorized = time.perf_counter() - start
+
+    board = BitBoard()
+    start = time.perf_counter()
+    for fen in fens:
+        board.load(fen)
+        board.check_validator(board.current_player)
+        len(board.legal_moves())
+    per_board = time.perf_counter() - start
+    print(f"vectorized {vectorized / args.count * 1e6:.2f}us  bitboard {per_board / args.count * 1e6:.2f}us "
+          f"per position")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import random
+
+from .constants import BOARD_SIZE
+from .utils import Color
+
+PIECE_ABBREVIATIONS = "PNBRQK"
+CASTLING_SYMBOLS = "KQkq"
+
+# A fixed seed keeps the keys identical across processes, so hashes can be shared and stored
+_random = random.Random(0x5A0B1157)
+
+# Indexed by `color.value * 6 + kind` (the bitboard piece index), then by square `row * 8 + col`
+PIECE_KEYS = [[_random.getrandbits(64) for _ in range(BOARD_SIZE * BOARD_SIZE)] for _ in range(12)]
+BLACK_TO_MOVE_KEY = _random.getrandbits(64)
+CASTLING_KEYS = {symbol: _random.getrandbits(64) for symbol in CASTLING_SYMBOLS}
+EN_PASSANT_KEYS = [_random.getrandbits(64) for _ in range(BOARD_SIZE)]
+# Combined key for every set of castling rights, indexed by the rights as bits in FEN order
+CASTLING_RIGHTS_KEYS = [0] * 16
+for _rights in range(16):
+    for _i, _symbol in enumerate(CASTLING_SYMBOLS):
+        if _rights >> _i & 1:
+            CASTLING_RIGHTS_KEYS[_rights] ^= CASTLING_KEYS[_symbol]
+
+
+def piece_key(color: Color, abbreviation: str, row: int, col: int) -> int:
+    return PIECE_KEYS[color.value * 6 + PIECE_ABBREVIATIONS.index(abbreviation)][row * BOARD_SIZE + col]
+
+
+def castling_key(castling: str) -> int:
+    key = 0
+    for symbol in castling:
+        key ^= CASTLING_KEYS[symbol]
+    return key
+
+
+def position_hash(board) -> int:
+    """Hash a position from scratch; boards keep theirs up to date incrementally"""
+    key = 0
+    for location in board.occupied(Color.WHITE) + board.occupied(Color.BLACK):
+        piece = board.get_piece_at(location)
+        key ^= piece_key(piece.color, piece.abbreviation, location.row, location.col)
+
+    key ^= castling_key(board.castling)
+    if board.en_passant is not None:
+        key ^= EN_PASSANT_KEYS[board.en_passant.col]
+    if board.current_player == Color.BLACK:
+        key ^= BLACK_TO_MOVE_KEY
+    return key
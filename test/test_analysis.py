@@ -0,0 +1,52 @@
+import time
+import unittest
+
+from chesslib.analysis import Analyser
+from chesslib.bitboard import BitBoard
+from chesslib.engine import MAX_PLY, MATE_SCORE
+
+MIDDLEGAME = "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4"
+
+
+def wait_for_final(analyser: Analyser, timeout: float = 30) -> list:
+    updates = []
+    deadline = time.monotonic() + timeout
+    while analyser.busy and time.monotonic() < deadline:
+        updates += analyser.poll(timeout=0.1)
+    return updates
+
+
+class TestAnalyser(unittest.TestCase):
+    def test_streams_each_iteration(self):
+        board = BitBoard()
+        with Analyser(depth=2) as analyser:
+            request = analyser.analyse(board)
+            updates = wait_for_final(analyser)
+
+        self.assertFalse(analyser.busy)
+        self.assertEqual([request] * 3, [u.request for u in updates])
+        self.assertEqual([1, 2, 2], [u.result.depth for u in updates])
+        self.assertEqual([False, False, True], [u.final for u in updates])
+        self.assertIn(updates[-1].result.move, board.legal_moves())
+
+    def test_new_position_cancels_stale_request(self):
+        with Analyser(depth=MAX_PLY) as analyser:
+            analyser.analyse(BitBoard(MIDDLEGAME))
+            analyser.poll(timeout=5)
+
+            # The deep search is abandoned, and nothing more from it is returned
+            mate_in_one = BitBoard("3k4/8/3K4/8/8/8/8/7Q w - - 0 1")
+            request = analyser.analyse(mate_in_one)
+            updates = wait_for_final(analyser)
+
+        self.assertTrue(updates)
+        self.assertEqual({request}, {u.request for u in updates})
+        self.assertEqual(MATE_SCORE - 1, updates[-1].result.score)
+
+    def test_cancel(self):
+        with Analyser(depth=MAX_PLY) as analyser:
+            analyser.analyse(BitBoard(MIDDLEGAME))
+            analyser.cancel()
+
+            self.assertFalse(analyser.busy)
+            self.assertEqual([], analyser.poll(timeout=0.5))
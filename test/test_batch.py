@@ -0,0 +1,55 @@
+import io
+import json
+import unittest
+from parameterized import parameterized
+
+from chesslib.batch import analyse_positions, epd_to_fen, write_csv, write_jsonl
+
+POSITIONS = [
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+    "# comment lines and blank lines are skipped",
+    "",
+    "6k1/5ppp/8/8/8/8/8/R5K1 b - - 0 1",
+    "R5k1/5ppp/8/8/8/8/8/6K1 b - - bm Ra8; id \"back rank\";",
+    "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1",
+    "8/8/8/8/8/8/8/8 w - - 0 1",
+    "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1",
+    "4k3/8/8/8/8/8/8/4R1K1 w - - 0 1",
+]
+
+
+class TestBatch(unittest.TestCase):
+    @parameterized.expand([("in-process", 1, 100), ("pool", 2, 2)])
+    def test_results_in_input_order(self, name, workers, chunk_size):
+        results = list(analyse_positions(POSITIONS, workers, chunk_size))
+
+        self.assertEqual([0, 3, 4, 5, 6, 7, 8], [r["index"] for r in results])
+        start, quiet, mated, stalemated, empty, short, wrong_side = results
+        self.assertEqual((True, 20), (start["valid"], start["legal_moves"]))
+        self.assertEqual((False, False, False), (quiet["check"], quiet["checkmate"], quiet["stalemate"]))
+        self.assertTrue(mated["checkmate"])
+        self.assertEqual("back rank", mated["id"])
+        self.assertTrue(stalemated["stalemate"])
+        self.assertEqual("each side needs exactly one king", empty["error"])
+        self.assertEqual("expected 8 ranks, got 7", short["error"])
+        self.assertEqual("side not to move is in check", wrong_side["error"])
+
+    @parameterized.expand([("board",), ("bitboard",)])
+    def test_backends_agree(self, backend):
+        self.assertEqual(list(analyse_positions(POSITIONS, 1, backend="bitboard")),
+                         list(analyse_positions(POSITIONS, 1, backend=backend)))
+
+    def test_epd_to_fen(self):
+        self.assertEqual(("8/8/8/8/8/8/8/8 w - - 0 1", "x"), epd_to_fen('8/8/8/8/8/8/8/8 w - - bm e4; id "x";'))
+        self.assertEqual(("8/8/8/8/8/8/8/8 w - - 3 9", None), epd_to_fen("8/8/8/8/8/8/8/8 w - - 3 9"))
+
+    def test_writers(self):
+        results = list(analyse_positions(POSITIONS[:1]))
+
+        output = io.StringIO()
+        write_jsonl(results, output)
+        self.assertEqual(results, [json.loads(line) for line in output.getvalue().splitlines()])
+
+        output = io.StringIO()
+        write_csv(results, output)
+        self.assertEqual("index,id,fen,valid,error,check,checkmate,stalemate,legal_moves", output.getvalue().splitlines()[0])
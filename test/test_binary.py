@@ -0,0 +1,57 @@
+import mmap
+import tempfile
+import unittest
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.binary import POSITION_SIZE
+from chesslib.perft import REFERENCE_POSITIONS
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+POSITIONS = [(f"{backend_name}_{name}", backend, fen) for backend_name, backend in BACKENDS
+             for name, (fen, _) in REFERENCE_POSITIONS.items()]
+EN_PASSANT_FENS = ["4k3/8/8/8/4P3/8/8/4K3 b - e3 0 1", "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 3"]
+
+
+class TestBinary(unittest.TestCase):
+    @parameterized.expand(POSITIONS)
+    def test_round_trip(self, name, backend, fen):
+        data = backend(fen).to_bytes()
+
+        self.assertEqual(POSITION_SIZE, len(data))
+        self.assertEqual(fen, backend.from_bytes(data).fen())
+
+    @parameterized.expand(BACKENDS)
+    def test_en_passant(self, name, backend):
+        for fen in EN_PASSANT_FENS:
+            self.assertEqual(fen, backend.from_bytes(backend(fen).to_bytes()).fen())
+
+    def test_backends_agree(self):
+        for fen, _ in REFERENCE_POSITIONS.values():
+            self.assertEqual(Board(fen).to_bytes(), BitBoard(fen).to_bytes())
+        self.assertEqual(Board(EN_PASSANT_FENS[0]).hash, BitBoard.from_bytes(Board(EN_PASSANT_FENS[0]).to_bytes()).hash)
+
+    @parameterized.expand(BACKENDS)
+    def test_load_from_memory_mapped_file(self, name, backend):
+        fens = [fen for fen, _ in REFERENCE_POSITIONS.values()]
+        with tempfile.TemporaryFile() as f:
+            f.write(b"".join(backend(fen).to_bytes() for fen in fens))
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                board = backend()
+                loaded = []
+                for offset in range(0, len(view), POSITION_SIZE):
+                    board.load_bytes(view, offset)
+                    loaded.append(board.fen())
+                view.release()
+
+        self.assertEqual(fens, loaded)
+
+    @parameterized.expand(BACKENDS)
+    def test_invalid_data(self, name, backend):
+        data = bytearray(backend().to_bytes())
+        data[8] = 0xFF
+        with self.assertRaises(ValueError):
+            backend.from_bytes(data)
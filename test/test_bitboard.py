@@ -0,0 +1,110 @@
+import unittest
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.utils import BoardCoordinates, Color
+from chesslib.zobrist import position_hash
+
+POSITIONS = [
+    ("Initial", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"),
+    ("Middlegame", "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4"),
+    ("Pinned", "4k3/8/8/8/1b6/8/3N4/4K2r w - - 0 1"),
+    ("Checked", "4k3/8/8/8/8/8/3q4/4K3 w - - 0 1"),
+    ("BlackToMove", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b KQkq - 0 1"),
+]
+
+
+class TestBitBoard(unittest.TestCase):
+    @parameterized.expand(POSITIONS)
+    def test_same_moves_as_board(self, name, fen):
+        board = Board()
+        board.load(fen)
+        bitboard = BitBoard()
+        bitboard.load(fen)
+
+        self.assertEqual(sorted(map(str, board.legal_moves())), sorted(map(str, bitboard.legal_moves())))
+
+    @parameterized.expand(POSITIONS)
+    def test_same_check_status_as_board(self, name, fen):
+        board = Board()
+        board.load(fen)
+        bitboard = BitBoard()
+        bitboard.load(fen)
+
+        for color in (Color.WHITE, Color.BLACK):
+            self.assertEqual(board.check_validator(color), bitboard.check_validator(color))
+            self.assertEqual(board.is_checkmate(color), bitboard.is_checkmate(color))
+
+    @parameterized.expand(POSITIONS)
+    def test_same_hash_as_board(self, name, fen):
+        board = Board()
+        board.load(fen)
+        bitboard = BitBoard()
+        bitboard.load(fen)
+
+        self.assertEqual(board.hash, bitboard.hash)
+        for move in board.legal_moves():
+            board.push(move)
+            bitboard.push(move)
+            self.assertEqual(board.hash, bitboard.hash)
+            self.assertEqual(position_hash(bitboard), bitboard.hash)
+            bitboard.pop()
+            board.pop()
+
+    def test_checkmate(self):
+        bitboard = BitBoard()
+        bitboard.load("7k/8/8/8/8/8/8/6RR b - - 0 1")
+
+        self.assertEqual(True, bitboard.is_checkmate(Color.BLACK))
+
+    def test_pieces_match_board(self):
+        board = Board()
+        bitboard = BitBoard()
+
+        for row in range(8):
+            for col in range(8):
+                expected = board.get_piece_at(BoardCoordinates(row, col))
+                actual = bitboard.get_piece_at(BoardCoordinates(row, col))
+                if expected is None:
+                    self.assertIsNone(actual)
+                else:
+                    self.assertEqual((expected.color, expected.abbreviation), (actual.color, actual.abbreviation))
+
+    @parameterized.expand([
+        (f"{backend.__name__}_{name}", backend, start, end, promotion, expected)
+        for backend in (Board, BitBoard)
+        for name, start, end, promotion, expected in [
+            ("queen", (1, 1), (0, 1), "Q", True),
+            ("knight", (1, 1), (0, 1), "N", True),
+            ("lowercase", (1, 1), (0, 1), "q", False),
+            ("unknown", (1, 1), (0, 1), "X", False),
+            ("empty", (1, 1), (0, 1), "", False),
+            ("king", (1, 1), (0, 1), "K", False),
+            ("not_a_promotion", (7, 4), (6, 4), "x", True),
+        ]
+    ])
+    def test_promotion_letters(self, name, backend, start, end, promotion, expected):
+        board = backend("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+        self.assertEqual(expected, board.move(BoardCoordinates(*start), BoardCoordinates(*end), promotion))
+
+    def test_en_passant_and_pop(self):
+        bitboard = BitBoard()
+        bitboard.load("4k3/p7/8/1P6/8/8/8/4K3 b - - 0 1")
+
+        self.assertEqual(True, bitboard.move(algebra_coordinates('A', 7), algebra_coordinates('A', 5)))
+        before = list(bitboard.mailbox)
+        self.assertEqual(True, bitboard.move(algebra_coordinates('B', 5), algebra_coordinates('A', 6)))
+        self.assertIsNone(bitboard.get_piece_at(algebra_coordinates('A', 5)))
+
+        bitboard.pop()
+        self.assertEqual(before, bitboard.mailbox)
+        self.assertEqual(Color.WHITE, bitboard.current_player)
+
+
+def algebra_coordinates(col: str, row: int) -> BoardCoordinates:
+    return BoardCoordinates.from_algebra_notation(col, row)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import random
+import tempfile
+import unittest
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.book import OpeningBook, polyglot_key, encode_book_move, ENTRY_FORMAT
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+# Keys from the Polyglot specification, after each move from the initial position
+SPEC_KEYS = [
+    ([], 0x463B96181691FC9C),
+    (["e2e4"], 0x823C9B50FD114196),
+    (["e2e4", "d7d5"], 0x0756B94461C50FB0),
+    (["e2e4", "d7d5", "e4e5"], 0x662FAFB965DB29D4),
+    (["e2e4", "d7d5", "e4e5", "f7f5"], 0x22A48B5A8E47FF78),
+    (["e2e4", "d7d5", "e4e5", "f7f5", "e1e2"], 0x652A607CA3F242C1),
+    (["e2e4", "d7d5", "e4e5", "f7f5", "e1e2", "e8f7"], 0x00FDD303C946BDD9),
+    (["a2a4", "b7b5", "h2h4", "b5b4", "c2c4"], 0x3C8123EA7B067637),
+    (["a2a4", "b7b5", "h2h4", "b5b4", "c2c4", "b4c3", "a1a3"], 0x5C3F9B829B279560),
+]
+CASTLING_FEN = "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1"
+
+
+def play(board, moves: list[str]):
+    for move in moves:
+        board.push(next(m for m in board.legal_moves() if str(m) == move))
+
+
+def book_entries(board, moves: dict[str, int]) -> list[bytes]:
+    key = polyglot_key(board)
+    legal = {str(m): m for m in board.legal_moves()}
+    return [ENTRY_FORMAT.pack(key, encode_book_move(legal[m]), weight, 0) for m, weight in moves.items()]
+
+
+class TestBook(unittest.TestCase):
+    def setUp(self):
+        start = Board()
+        castling = Board(CASTLING_FEN)
+        entries = book_entries(start, {"e2e4": 10, "d2d4": 30, "g1f3": 0}) + book_entries(castling, {"e1g1": 5})
+        # An entry for a move that is not legal in the position, as from a key collision
+        entries.append(ENTRY_FORMAT.pack(polyglot_key(start), 0x0E1C, 99, 0))
+        entries.sort()
+
+        with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+            f.write(b"".join(entries))
+        self.path = f.name
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    @parameterized.expand(BACKENDS)
+    def test_spec_keys(self, name, backend):
+        for moves, key in SPEC_KEYS:
+            board = backend()
+            play(board, moves)
+            self.assertEqual(key, polyglot_key(board), moves)
+
+    @parameterized.expand(BACKENDS)
+    def test_entries_by_weight(self, name, backend):
+        with OpeningBook(self.path) as book:
+            entries = book.entries(backend())
+
+            self.assertEqual(["d2d4", "e2e4", "g1f3"], [str(e.move) for e in entries])
+            self.assertEqual([30, 10, 0], [e.weight for e in entries])
+            self.assertEqual("d2d4", str(book.best_move(backend())))
+
+    @parameterized.expand(BACKENDS)
+    def test_castling_entry(self, name, backend):
+        with OpeningBook(self.path) as book:
+            self.assertEqual("e1g1", str(book.best_move(backend(CASTLING_FEN))))
+
+    def test_weighted_move_skips_zero_weights(self):
+        with OpeningBook(self.path) as book:
+            moves = {str(book.weighted_move(Board(), random.Random(seed))) for seed in range(50)}
+
+        self.assertEqual({"d2d4", "e2e4"}, moves)
+
+    def test_position_not_in_book(self):
+        board = Board()
+        play(board, ["a2a3"])
+        with OpeningBook(self.path) as book:
+            self.assertEqual([], book.entries(board))
+            self.assertIsNone(book.weighted_move(board))
+
+    def test_empty_book(self):
+        with tempfile.NamedTemporaryFile(suffix=".bin") as f:
+            with OpeningBook(f.name) as book:
+                self.assertIsNone(book.best_move(Board()))
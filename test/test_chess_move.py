@@ -0,0 +1,30 @@
+import pickle
+import unittest
+from parameterized import parameterized
+
+from chesslib.utils import BoardCoordinates
+from chesslib.chess_move import ChessMove, MoveType
+
+
+class TestChessMove(unittest.TestCase):
+    @parameterized.expand([
+        ("Regular", 6, 4, 4, 4, MoveType.REGULAR, None, "e2e4"),
+        ("EnPassant", 3, 4, 2, 3, MoveType.EN_PASSANT, None, "e5d6"),
+        ("Castling", 0, 4, 0, 6, MoveType.CASTLING, None, "e8g8"),
+        ("Promotion", 1, 0, 0, 1, MoveType.PROMOTION, "N", "a7b8n"),
+    ])
+    def test_unpacks_fields(self, name, start_row, start_col, end_row, end_col, type, promotion, expected):
+        move = ChessMove(BoardCoordinates(start_row, start_col), BoardCoordinates(end_row, end_col), type, promotion)
+
+        self.assertIs(BoardCoordinates(start_row, start_col), move.start)
+        self.assertIs(BoardCoordinates(end_row, end_col), move.end)
+        self.assertEqual(type, move.type)
+        self.assertEqual(promotion, move.promotion)
+        self.assertEqual(expected, str(move))
+
+    def test_value_round_trip(self):
+        move = ChessMove(BoardCoordinates(1, 7), BoardCoordinates(0, 7), MoveType.PROMOTION, "Q")
+
+        self.assertEqual(move, ChessMove.from_int(move.value))
+        self.assertEqual(move, pickle.loads(pickle.dumps(move)))
+        self.assertEqual(1, len({move, ChessMove.from_int(int(move))}))
@@ -29,3 +29,16 @@ class TestBoardCoordinates(unittest.TestCase):
         coordinates = BoardCoordinates(row, col)
         self.assertEqual(coordinates.is_in_bounds(), expected)
 
+
+    def test_interned(self):
+        self.assertIs(BoardCoordinates(3, 4), BoardCoordinates(3, 4))
+        self.assertIs(BoardCoordinates(6, 4), BoardCoordinates.from_algebra_notation("E", 2))
+
+    def test_hashable(self):
+        squares = {BoardCoordinates(0, 0), BoardCoordinates(0, 0), BoardCoordinates(7, 7)}
+        self.assertEqual(2, len(squares))
+        self.assertIn(BoardCoordinates(7, 7), squares)
+
+    def test_immutable(self):
+        with self.assertRaises(AttributeError):
+            BoardCoordinates(0, 0).row = 1
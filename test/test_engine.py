@@ -1,8 +1,10 @@
 import unittest
 
 from chesslib.board import Board, Color
+from chesslib.chess_move import ChessMove, MoveType
 from chesslib.piece import Piece, King, Pawn, Rook, Knight, Bishop
 from chesslib.utils import BoardCoordinates
+from chesslib.zobrist import position_hash
 
 
 class TestCheck(unittest.TestCase):
@@ -179,6 +181,33 @@ class TestSpecialMoves(unittest.TestCase):
 
         self.assertEqual(False, result)
 
+    def test_castling(self):
+        test_board = Board()
+        test_board.load("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+
+        result = test_board.move(algebra_coordinates('E', 1), algebra_coordinates('G', 1))
+
+        self.assertEqual(True, result)
+        self.assertEqual("R", test_board.get_piece_at(algebra_coordinates('F', 1)).abbreviation)
+        self.assertEqual("kq", test_board.castling)
+
+    def test_castling_through_check(self):
+        test_board = Board()
+        test_board.load("r3k2r/8/8/8/8/8/5r2/R3K2R w KQkq - 0 1")
+
+        result = test_board.move(algebra_coordinates('E', 1), algebra_coordinates('G', 1))
+
+        self.assertEqual(False, result)
+
+    def test_promotion(self):
+        test_board = Board()
+        test_board.load("4k3/1P6/8/8/8/8/8/4K3 w - - 0 1")
+
+        result = test_board.move(algebra_coordinates('B', 7), algebra_coordinates('B', 8), "N")
+
+        self.assertEqual(True, result)
+        self.assertEqual("N", test_board.get_piece_at(algebra_coordinates('B', 8)).abbreviation)
+
     def test_enpassant_target_not_pawn(self):
         test_board = ChessBoardStub()
 
@@ -193,6 +222,150 @@ class TestSpecialMoves(unittest.TestCase):
         self.assertEqual(False, result)
 
 
+class TestPushPop(unittest.TestCase):
+    def test_pop_restores_capture(self):
+        test_board = ChessBoardStub()
+
+        rook = Rook(Color.WHITE)
+        knight = Knight(Color.BLACK)
+        test_board.insert(rook, algebra_coordinates('A', 1))
+        test_board.insert(knight, algebra_coordinates('A', 8))
+        before = dict(test_board.state)
+
+        test_board.push(ChessMove(algebra_coordinates('A', 1), algebra_coordinates('A', 8), MoveType.REGULAR))
+        self.assertIs(rook, test_board.get_piece_at(algebra_coordinates('A', 8)))
+        self.assertEqual(Color.BLACK, test_board.current_player)
+
+        test_board.pop()
+        self.assertEqual(before, test_board.state)
+        self.assertEqual(Color.WHITE, test_board.current_player)
+
+    def test_pop_restores_en_passant(self):
+        test_board = ChessBoardStub()
+
+        test_board.insert(Pawn(Color.WHITE), algebra_coordinates('B', 5))
+        test_board.insert(Pawn(Color.BLACK), algebra_coordinates('A', 7))
+        test_board.set_player(Color.BLACK)
+
+        _ = test_board.move(algebra_coordinates('A', 7), algebra_coordinates('A', 5))
+        before = dict(test_board.state)
+
+        test_board.push(ChessMove(algebra_coordinates('B', 5), algebra_coordinates('A', 6), MoveType.EN_PASSANT))
+        self.assertIsNone(test_board.get_piece_at(algebra_coordinates('A', 5)))
+
+        test_board.pop()
+        self.assertEqual(before, test_board.state)
+        self.assertEqual(True, test_board.move(algebra_coordinates('B', 5), algebra_coordinates('A', 6)))
+
+
+class TestAttackMaps(unittest.TestCase):
+    def assert_maps_match_rebuild(self, board: Board):
+        counts = {color: {k: v for k, v in board._attack_counts[color].items() if v} for color in Color}
+        kings = dict(board._king_locations)
+
+        board._piece_attacks = None
+        board._build_attack_maps()
+
+        self.assertEqual({color: {k: v for k, v in board._attack_counts[color].items() if v} for color in Color}, counts)
+        self.assertEqual(board._king_locations, kings)
+
+    def test_incremental_updates(self):
+        test_board = Board()
+        test_board.load("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1")
+        test_board.check_validator(Color.WHITE)
+
+        for move in test_board.legal_moves():
+            test_board.push(move)
+            self.assert_maps_match_rebuild(test_board)
+            for reply in test_board.legal_moves():
+                test_board.push(reply)
+                self.assert_maps_match_rebuild(test_board)
+                test_board.pop()
+            test_board.pop()
+            self.assert_maps_match_rebuild(test_board)
+
+    def test_attack_count(self):
+        test_board = ChessBoardStub()
+
+        test_board.insert(Rook(Color.WHITE), algebra_coordinates('A', 1))
+        test_board.insert(Rook(Color.WHITE), algebra_coordinates('H', 4))
+        test_board.insert(Knight(Color.BLACK), algebra_coordinates('B', 6))
+
+        self.assertEqual(2, test_board.attack_count(algebra_coordinates('A', 4), Color.WHITE))
+        self.assertEqual(1, test_board.attack_count(algebra_coordinates('A', 4), Color.BLACK))
+        self.assertEqual(0, test_board.attack_count(algebra_coordinates('B', 8), Color.BLACK))
+
+
+class TestZobrist(unittest.TestCase):
+    def test_incremental_hash_matches_recomputed(self):
+        test_board = Board()
+        test_board.load("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+        initial = test_board.hash
+
+        for move in test_board.legal_moves():
+            test_board.push(move)
+            self.assertEqual(position_hash(test_board), test_board.hash)
+            test_board.pop()
+
+        self.assertEqual(initial, test_board.hash)
+
+    def test_transposition_same_hash(self):
+        test_board = Board()
+        initial = test_board.hash
+
+        for start, end in (('G1', 'F3'), ('G8', 'F6'), ('F3', 'G1'), ('F6', 'G8')):
+            test_board.move(algebra_coordinates(start[0], int(start[1])), algebra_coordinates(end[0], int(end[1])))
+
+        self.assertEqual(initial, test_board.hash)
+
+    def test_hash_covers_castling_en_passant_and_side(self):
+        fens = [
+            "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1",
+            "r3k2r/8/8/8/8/8/8/R3K2R w Kkq - 0 1",
+            "r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1",
+            "4k3/8/8/8/4P3/8/8/4K3 b - e3 0 1",
+            "4k3/8/8/8/4P3/8/8/4K3 b - - 0 1",
+        ]
+        hashes = set()
+        for fen in fens:
+            test_board = Board()
+            test_board.load(fen)
+            hashes.add(test_board.hash)
+
+        self.assertEqual(len(fens), len(hashes))
+
+
+class TestLegalMoves(unittest.TestCase):
+    def legal_moves(self, fen: str, origin: str | None = None) -> set[str]:
+        test_board = Board(fen)
+        location = None if origin is None else algebra_coordinates(origin[0], int(origin[1]))
+        return {str(m) for m in test_board.iter_legal_moves(location)}
+
+    def test_pinned_piece_moves_along_pin(self):
+        self.assertEqual({"e2e3", "e2e4", "e2e5", "e2e6", "e2e7", "e2e8"},
+                         self.legal_moves("4r2k/8/8/8/8/8/4R3/4K3 w - - 0 1", "E2"))
+
+    def test_pinned_knight_cannot_move(self):
+        self.assertEqual(set(), self.legal_moves("7k/8/8/8/b7/8/2N5/3K4 w - - 0 1", "C2"))
+
+    def test_check_blocked_or_king_moves(self):
+        self.assertEqual({"d2e3", "e1d1", "e1f1", "e1f2"}, self.legal_moves("4r2k/8/8/8/8/8/3B4/R3K3 w - - 0 1"))
+
+    def test_double_check_only_king_moves(self):
+        moves = self.legal_moves("4r2k/8/8/8/8/5n2/3B4/R3K3 w - - 0 1")
+        self.assertEqual({"e1d1", "e1f1", "e1f2"}, moves)
+
+    def test_en_passant_uncovering_check(self):
+        self.assertNotIn("e5d6", self.legal_moves("7k/8/8/K2pP2r/8/8/8/8 w - d6 0 1"))
+        self.assertIn("e5d6", self.legal_moves("7k/8/8/K2pP3/8/8/8/8 w - d6 0 1"))
+
+    def test_checkmate_uses_legal_moves(self):
+        test_board = Board("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1")
+
+        self.assertTrue(test_board.is_checkmate(Color.BLACK))
+        self.assertEqual([], test_board.legal_moves())
+
+
 class ChessBoardStub(Board):
     def __init__(self):
         super().__init__()
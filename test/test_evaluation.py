@@ -0,0 +1,83 @@
+import random
+import unittest
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.evaluation import Evaluator, PawnTable, pack, unpack, taper, position_scores, pawn_structure, pawn_key
+from chesslib.perft import REFERENCE_POSITIONS
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+FENS = [fen for fen, _ in REFERENCE_POSITIONS.values()]
+
+
+def mirror(fen: str) -> str:
+    """The same position with the colors swapped and the board flipped"""
+    placement, player, castling, en_passant, *counters = fen.split()
+    placement = "/".join(reversed(placement.split("/"))).swapcase()
+    castling = "".join(sorted(castling.swapcase())) if castling != "-" else "-"
+    en_passant = en_passant if en_passant == "-" else en_passant[0] + str(9 - int(en_passant[1]))
+    return " ".join([placement, "b" if player == "w" else "w", castling, en_passant, *counters])
+
+
+class TestEvaluation(unittest.TestCase):
+    @parameterized.expand([(1, -2, 3), (-300, 250, 24), (-1000, -1000, 0), (0, 0, 31)])
+    def test_pack_round_trip(self, mg, eg, phase):
+        self.assertEqual((mg, eg, phase), unpack(pack(mg, eg, phase)))
+        self.assertEqual((mg * 2, -eg, phase * 2), unpack(pack(mg, eg, phase) * 2 - pack(0, 3 * eg)))
+
+    def test_taper(self):
+        self.assertEqual(100, taper(pack(100, -100, 24)))
+        self.assertEqual(-100, taper(pack(100, -100, 0)))
+        self.assertEqual(0, taper(pack(100, -100, 12)))
+
+    @parameterized.expand(BACKENDS)
+    def test_incremental_scores(self, name, backend):
+        rng = random.Random(7)
+        for fen in FENS:
+            board = backend(fen)
+            expected = [(board.psqt, board.pawn_key)]
+            for _ in range(60):
+                moves = board.legal_moves()
+                if not moves:
+                    break
+                board.push(rng.choice(moves))
+                expected.append(position_scores(board))
+                self.assertEqual(expected[-1], (board.psqt, board.pawn_key), board.fen())
+            while board.move_stack:
+                expected.pop()
+                board.pop()
+                self.assertEqual(expected[-1], (board.psqt, board.pawn_key))
+
+    @parameterized.expand(FENS)
+    def test_backends_agree(self, fen):
+        for color in (Board(fen).current_player, Board(mirror(fen)).current_player):
+            self.assertEqual(Board(fen).mobility(color), BitBoard(fen).mobility(color))
+        self.assertEqual(Evaluator()(Board(fen)), Evaluator()(BitBoard(fen)))
+
+    @parameterized.expand(FENS)
+    def test_symmetric(self, fen):
+        evaluate = Evaluator()
+        self.assertEqual(evaluate(BitBoard(fen)), evaluate(BitBoard(mirror(fen))))
+
+    def test_initial_position_is_even(self):
+        self.assertEqual(0, Evaluator()(BitBoard()))
+
+    def test_pawn_structure(self):
+        # White's d5 pawn is isolated and held back by c7; its h pawns are doubled, isolated and passed.
+        # Black's b7 pawn is passed.
+        board = BitBoard("4k3/1pp5/8/3P4/8/7P/7P/4K3 w - - 0 1")
+        mg, eg, _ = unpack(pawn_structure(board.pawn_key))
+        self.assertEqual((-5 - 10 - 2 * 5 + 5 + 0 - 0, -15 - 20 - 2 * 15 + 15 + 10 - 10), (mg, eg))
+
+    def test_pawn_table(self):
+        table = PawnTable(size=16)
+        evaluate = Evaluator(table)
+        board = BitBoard()
+        evaluate(board)
+        board.push(board.legal_moves()[0])
+        evaluate(board)
+        board.pop()
+        evaluate(board)
+        self.assertEqual((1, 2), (table.hits, table.misses))
+        self.assertEqual(pawn_structure(board.pawn_key), table.score(pawn_key(0xFF << 48, 0xFF << 8)))
@@ -0,0 +1,77 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.events import Event, IllegalMoveReason, print_events
+from chesslib.pgn import SQUARES_BY_NAME
+from chesslib.utils import Color
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+FOOLS_MATE = [("f2", "f3"), ("e7", "e5"), ("g2", "g4"), ("d8", "h4")]
+
+
+def play(board, moves: list[tuple[str, str]]) -> list[bool]:
+    return [board.move(SQUARES_BY_NAME[start], SQUARES_BY_NAME[end]) for start, end in moves]
+
+
+class TestEvents(unittest.TestCase):
+    @parameterized.expand(BACKENDS)
+    def test_silent_without_subscribers(self, name, backend):
+        board = backend()
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual([True, True, False, True, True],
+                             play(board, FOOLS_MATE[:2] + [("e1", "e3")] + FOOLS_MATE[2:]))
+            board.load("4k3/8/8/8/8/8/8/4K3 w - - 0 1")
+            self.assertIsNone(board.find_piece("Q", Color.WHITE))
+        self.assertEqual("", output.getvalue())
+
+    @parameterized.expand(BACKENDS)
+    def test_events(self, name, backend):
+        board = backend()
+        events = []
+        for event in Event:
+            board.subscribe(event, lambda b, *args, event=event: events.append((event, *args)))
+        play(board, FOOLS_MATE)
+
+        made = [(str(e[1]), e[2]) for e in events if e[0] == Event.MOVE_MADE]
+        self.assertEqual([("f2f3", "f3"), ("e7e5", "e5"), ("g2g4", "g4"), ("d8h4", "Qh4#")], made)
+        self.assertEqual([(Event.CHECK, Color.WHITE), (Event.CHECKMATE, Color.WHITE)], events[-2:])
+
+    @parameterized.expand([
+        (f"{backend_name}_{name}", backend, fen, move, reason) for backend_name, backend in BACKENDS
+        for name, fen, move, reason in [
+            ("illegal", "4k3/8/8/8/8/8/8/4K3 w - - 0 1", ("e1", "e3"), IllegalMoveReason.ILLEGAL),
+            ("pinned", "4k3/4r3/8/8/8/8/4N3/4K3 w - - 0 1", ("e2", "c3"), IllegalMoveReason.KING_IN_CHECK),
+        ]
+    ])
+    def test_illegal_move(self, name, backend, fen, move, reason):
+        board = backend(fen)
+        rejected = []
+        board.subscribe(Event.ILLEGAL_MOVE, lambda b, start, end, why: rejected.append((start, end, why)))
+        self.assertEqual([False], play(board, [move]))
+        self.assertEqual([(SQUARES_BY_NAME[move[0]], SQUARES_BY_NAME[move[1]], reason)], rejected)
+
+    @parameterized.expand(BACKENDS)
+    def test_unsubscribe(self, name, backend):
+        board = backend()
+        moves = []
+        callback = board.subscribe(Event.MOVE_MADE, lambda b, move, movetext: moves.append(movetext))
+        play(board, FOOLS_MATE[:1])
+        board.unsubscribe(Event.MOVE_MADE, callback)
+        play(board, FOOLS_MATE[1:2])
+        self.assertEqual(["f3"], moves)
+        self.assertEqual({}, board.listeners)
+
+    @parameterized.expand(BACKENDS)
+    def test_print_events(self, name, backend):
+        board = backend()
+        print_events(board)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            play(board, FOOLS_MATE[:2] + [("e1", "e3")] + FOOLS_MATE[2:])
+        self.assertEqual("move: f3\nmove: e5\nIllegal move\nmove: g4\nmove: Qh4#\nCheckmate! Game Over.\n",
+                         output.getvalue())
@@ -0,0 +1,51 @@
+import unittest
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.constants import InvalidFEN
+from chesslib.perft import REFERENCE_POSITIONS
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+POSITIONS = [(f"{backend_name}_{name}", backend, fen) for backend_name, backend in BACKENDS
+             for name, (fen, _) in REFERENCE_POSITIONS.items()]
+
+
+class TestFen(unittest.TestCase):
+    @parameterized.expand(POSITIONS)
+    def test_round_trip(self, name, backend, fen):
+        self.assertEqual(fen, backend(fen).fen())
+
+    @parameterized.expand(BACKENDS)
+    def test_counters_follow_moves(self, name, backend):
+        board = backend()
+        for move in ("g1f3", "g8f6", "e2e4"):
+            board.push(next(m for m in board.legal_moves() if str(m) == move))
+
+        self.assertEqual("rnbqkb1r/pppppppp/5n2/8/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq e3 0 2", board.fen())
+        board.pop()
+        self.assertEqual("rnbqkb1r/pppppppp/5n2/8/8/5N2/PPPPPPPP/RNBQKB1R w KQkq - 2 2", board.fen())
+        board.pop()
+        board.pop()
+        self.assertEqual("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", board.fen())
+
+    @parameterized.expand(BACKENDS)
+    def test_missing_fields_default(self, name, backend):
+        self.assertEqual("4k3/8/8/8/8/8/8/4K3 b - - 0 1", backend("4k3/8/8/8/8/8/8/4K3 b").fen())
+
+    @parameterized.expand([
+        ("TooFewRanks", "8/8/8/8/8/8/8 w - - 0 1"),
+        ("ShortRank", "8/8/8/8/8/8/8/7 w - - 0 1"),
+        ("LongRank", "8/8/8/8/8/8/8/8p w - - 0 1"),
+        ("UnknownPiece", "8/8/8/8/8/8/8/7x w - - 0 1"),
+        ("BadSide", "8/8/8/8/8/8/8/8 x - - 0 1"),
+        ("BadCastling", "8/8/8/8/8/8/8/8 w KX - 0 1"),
+        ("BadEnPassant", "8/8/8/8/8/8/8/8 w - e4 0 1"),
+        ("BadClock", "8/8/8/8/8/8/8/8 w - - x 1"),
+    ])
+    def test_invalid(self, name, fen):
+        for _, backend in BACKENDS:
+            board = backend()
+            with self.assertRaises(InvalidFEN):
+                board.load(fen)
+            self.assertEqual(backend().fen(), board.fen())
@@ -0,0 +1,79 @@
+import asyncio
+import json
+import unittest
+
+from chesslib import instrumentation
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.instrumentation import Instrumentation, instrumented, STAGES
+from chesslib.server import GameServer
+from chesslib.utils import BoardCoordinates
+
+
+class TestInstrumentation(unittest.TestCase):
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_disabled_leaves_original_methods(self):
+        originals = {(owner, name): owner.__dict__[name] for owner, name, _ in STAGES}
+        with instrumented():
+            self.assertTrue(instrumentation.enabled())
+            self.assertIsNot(originals[(Board, "move")], Board.__dict__["move"])
+        self.assertFalse(instrumentation.enabled())
+        self.assertEqual(originals, {(owner, name): owner.__dict__[name] for owner, name, _ in STAGES})
+
+    def test_counts_board_stages(self):
+        board = Board()
+        with instrumented() as counters:
+            self.assertTrue(board.move(BoardCoordinates(6, 4), BoardCoordinates(4, 4)))
+            self.assertFalse(board.move(BoardCoordinates(1, 4), BoardCoordinates(4, 4)))
+            board.legal_moves()
+        board.legal_moves()
+
+        stages = counters.to_dict()
+        self.assertEqual(2, stages["Board.move"]["calls"])
+        self.assertEqual(2, stages["Board._valid_move"]["calls"])
+        self.assertEqual(1, stages["Board.push"]["calls"])
+        self.assertEqual({"calls": 1, "items": 20}, {k: stages["Board.legal_moves"][k] for k in ("calls", "items")})
+        # The e2 pawn for the first move, the e7 pawn for the illegal one, then black's eight for the legal moves
+        self.assertEqual(10, stages["Pawn.possible_moves"]["calls"])
+        self.assertGreater(stages["Board.move"]["seconds"], 0)
+        self.assertNotIn("Board.is_checkmate", stages)
+
+    def test_counts_bitboard_stages(self):
+        board = BitBoard()
+        with instrumented() as counters:
+            self.assertEqual(20, len(board.legal_moves()))
+        stages = counters.to_dict()
+        self.assertEqual(20, stages["BitBoard._generate_moves"]["items"])
+        self.assertEqual(20, stages["BitBoard._leaves_king_attacked"]["calls"])
+        self.assertEqual(20, stages["BitBoard._push"]["calls"])
+
+    def test_exports(self):
+        counters = Instrumentation()
+        counters.stages["Pawn.possible_moves"].calls = 3
+        counters.stages["Pawn.possible_moves"].items = 5
+        counters.stages["Pawn.possible_moves"].nanoseconds = 2_000_000_000
+
+        self.assertEqual({"enabled": False, "stages": {"Pawn.possible_moves": {"calls": 3, "items": 5, "seconds": 2.0}}},
+                         json.loads(counters.to_json()))
+        text = counters.to_prometheus()
+        self.assertIn("# TYPE chesslib_stage_calls_total counter\n", text)
+        self.assertIn('chesslib_stage_moves_total{stage="Pawn.possible_moves"} 5\n', text)
+        self.assertIn('chesslib_stage_seconds_total{stage="Pawn.possible_moves"} 2.0\n', text)
+        counters.reset()
+        self.assertEqual({}, counters.to_dict())
+
+    def test_server_stats(self):
+        instrumentation.stats.reset()
+        instrumentation.enable()
+        server = GameServer()
+
+        async def requests():
+            await server.handle_request({"op": "new"})
+            await server.handle_request({"op": "move", "game": 1, "move": "e2e4"})
+            return await server.handle_request({"op": "stats"})
+
+        reply = asyncio.run(requests())
+        self.assertTrue(reply["enabled"])
+        self.assertGreater(reply["stages"]["BitBoard._push"]["calls"], 0)
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+import random
+import stat
+import tempfile
+import unittest
+from unittest import mock
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.journal import Journal
+from chesslib.server import GameServer
+from chesslib.termination import Termination
+from test.test_server import Client
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+
+
+def play_randomly(board, moves: int, rng: random.Random):
+    """Push up to `moves` random legal moves, returning those played"""
+    played = []
+    for _ in range(moves):
+        legal = board.legal_moves()
+        if not legal:
+            break
+        played.append(rng.choice(legal))
+        board.push(played[-1])
+    return played
+
+
+class TestJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "games.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @parameterized.expand(BACKENDS)
+    def test_recover_replays_after_latest_snapshot(self, name, backend):
+        rng = random.Random(3)
+        boards = {game: backend() for game in range(1, 4)}
+        with Journal(self.path, snapshot_interval=5) as journal:
+            for game, board in boards.items():
+                journal.snapshot(game, board)
+            for _ in range(12):
+                for game, board in boards.items():
+                    for move in play_randomly(board, 1, rng):
+                        journal.record_move(game, board, move)
+            journal.commit()
+
+        recovered = Journal(self.path).recover(backend)
+        self.assertEqual({game: board.fen() for game, board in boards.items()},
+                         {game: board.fen() for game, board in recovered.items()})
+        self.assertEqual(boards[1].hash, recovered[1].hash)
+
+    @parameterized.expand(BACKENDS)
+    def test_recovered_games_keep_repetition_history(self, name, backend):
+        board = backend()
+        with Journal(self.path, snapshot_interval=3) as journal:
+            journal.snapshot(1, board)
+            for move in ["g1f3", "g8f6", "f3g1", "f6g8"] * 2:
+                move = next(m for m in board.legal_moves() if str(m) == move)
+                board.push(move)
+                journal.record_move(1, board, move)
+        self.assertEqual(Termination.THREEFOLD_REPETITION, board.termination())
+
+        with Journal(self.path) as journal:
+            recovered = journal.recover(backend)[1]
+        self.assertEqual(board.positions[-board.halfmove_clock:], recovered.positions[-board.halfmove_clock:])
+        self.assertEqual(Termination.THREEFOLD_REPETITION, recovered.termination())
+
+    def test_closed_games_not_recovered(self):
+        with Journal(self.path) as journal:
+            journal.snapshot(1, BitBoard())
+            journal.snapshot(2, BitBoard())
+            journal.close_game(1)
+        self.assertEqual([2], list(Journal(self.path).recover(BitBoard)))
+
+    def test_uncommitted_records_lost(self):
+        journal = Journal(self.path)
+        journal.snapshot(1, BitBoard())
+        journal.commit()
+        board = BitBoard()
+        move = play_randomly(board, 1, random.Random(1))[0]
+        journal.record_move(1, board, move)
+        self.assertGreater(journal.pending, 0)
+
+        self.assertEqual(BitBoard().fen(), Journal(self.path).recover(BitBoard)[1].fen())
+
+    def test_torn_record_dropped(self):
+        board = BitBoard()
+        with Journal(self.path) as journal:
+            journal.snapshot(1, board)
+            move = play_randomly(board, 1, random.Random(2))[0]
+            journal.record_move(1, board, move)
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 1)
+
+        with Journal(self.path) as journal:
+            self.assertEqual(BitBoard().fen(), journal.recover(BitBoard)[1].fen())
+            # Records appended after a torn one are readable
+            journal.record_move(1, board, move)
+        self.assertEqual(board.fen(), Journal(self.path).recover(BitBoard)[1].fen())
+
+    def test_compact(self):
+        board = BitBoard()
+        with Journal(self.path, snapshot_interval=1000) as journal:
+            journal.snapshot(1, board)
+            for move in play_randomly(board, 40, random.Random(4)):
+                journal.record_move(1, board, move)
+            journal.commit()
+            size = os.path.getsize(self.path)
+            journal.compact(journal.recover(BitBoard))
+            self.assertLess(os.path.getsize(self.path), size)
+        self.assertEqual(board.fen(), Journal(self.path).recover(BitBoard)[1].fen())
+
+    @unittest.skipUnless(os.name == "posix", "directories can only be synced on POSIX")
+    def test_compact_syncs_directory(self):
+        synced_directories = []
+        fsync = os.fsync
+
+        def record(fd: int):
+            synced_directories.append(stat.S_ISDIR(os.fstat(fd).st_mode))
+            fsync(fd)
+
+        with Journal(self.path) as journal:
+            journal.snapshot(1, BitBoard())
+            with mock.patch("os.fsync", record):
+                journal.compact(journal.recover(BitBoard))
+        # The rename is synced after the new file's contents
+        self.assertEqual([False, True], synced_directories[-2:])
+
+    def test_not_a_journal(self):
+        with open(self.path, "wb") as f:
+            f.write(b"something else")
+        with self.assertRaises(ValueError):
+            Journal(self.path)
+
+
+class TestJournalledServer(unittest.IsolatedAsyncioTestCase):
+    async def test_games_survive_restart(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.log")
+            with Journal(path) as journal:
+                server = GameServer(journal=journal)
+                listener = await server.serve_tcp()
+                client = Client(*await asyncio.open_connection(*listener.sockets[0].getsockname()[:2]))
+                for _ in range(3):
+                    await client.request(op="new")
+                await client.request(op="close", game=2)
+                # Pipelined moves on several games share commits
+                client.writer.write(b"".join(json.dumps({"op": "move", "game": game, "move": move}).encode() + b"\n"
+                                             for game in (1, 3) for move in ("e4", "e5", "Nf3")))
+                replies = [json.loads(await client.reader.readline()) for _ in range(6)]
+                self.assertTrue(all(r["ok"] for r in replies), replies)
+                fens = {game: (await client.request(op="status", game=game))["fen"] for game in (1, 3)}
+                # Every change was committed before it was replied to
+                self.assertEqual(0, journal.pending)
+                await client.close()
+                listener.close()
+                await listener.wait_closed()
+
+            restarted = GameServer(journal=Journal(path))
+            self.assertEqual(fens, {game: g.board.fen() for game, g in restarted.games.items()})
+            self.assertEqual([1, 3], sorted(restarted.games))
+
+    async def test_requests_queued_behind_close_fail(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "games.log")
+            # A snapshot with every move, which would bring the game back if a move were logged after its close
+            with Journal(path, snapshot_interval=1) as journal:
+                server = GameServer(journal=journal)
+                await server.handle_request({"op": "new"})
+                # The first move holds the game's lock while its change is committed, so the rest queue behind it
+                replies = await asyncio.gather(*(server.handle_request(request) for request in (
+                    {"op": "move", "game": 1, "move": "e4"}, {"op": "move", "game": 1, "move": "e5"},
+                    {"op": "close", "game": 1}, {"op": "move", "game": 1, "move": "Nf3"})))
+                self.assertEqual([True, True, True, False], [r["ok"] for r in replies])
+                self.assertEqual("no game 1", replies[3]["error"])
+            self.assertEqual({}, GameServer(journal=Journal(path)).games)
@@ -0,0 +1,113 @@
+import io
+import unittest
+from parameterized import parameterized
+
+from chesslib.match import (EngineConfig, TimeControl, MatchStats, play_game, play_games, random_openings, run_match,
+                            schedule, WIN, DRAW, LOSS)
+from chesslib.pgn import read_games
+
+MATE_IN_ONE = "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+
+
+class TestMatch(unittest.TestCase):
+    def test_engine_config(self):
+        config = EngineConfig.parse("name=new,backend=board,depth=3,eval=material")
+        self.assertEqual(("new", "board", 3, "material"), (config.name, config.backend, config.depth, config.evaluation))
+        with self.assertRaises(ValueError):
+            EngineConfig.parse("name=new,speed=3")
+        with self.assertRaises(ValueError):
+            EngineConfig.parse("name=new,backend=abacus")
+
+    def test_time_control(self):
+        control = TimeControl.parse("60+0.5")
+        self.assertEqual((60, 0.5), (control.base, control.increment))
+        self.assertAlmostEqual(60 / 30 + 0.375, control.allotment(60))
+        # Never more than half of what is left
+        self.assertAlmostEqual(0.1, control.allotment(0.2))
+
+    def test_schedule_swaps_colors(self):
+        a, b = EngineConfig("a"), EngineConfig("b")
+        rounds = [(r, w.name, bl.name, fen) for r, w, bl, fen in schedule((a, b), ["x", "y"], 5)]
+        self.assertEqual([(1, "a", "b", "x"), (2, "b", "a", "x"), (3, "a", "b", "y"), (4, "b", "a", "y"),
+                          (5, "a", "b", "x")], rounds)
+
+    @parameterized.expand([
+        ("checkmate", MATE_IN_ONE, "1-0", "checkmate", 1),
+        ("insufficient", "8/8/8/4k3/8/8/8/4K2N w - - 0 1", "1/2-1/2", "insufficient material", 0),
+        ("stalemate", "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", "1/2-1/2", "stalemate", 0),
+        ("fifty_moves", "4k3/8/8/8/8/8/3R4/4K3 b - - 100 80", "1/2-1/2", "fifty-move rule", 0),
+    ])
+    def test_game_endings(self, name, fen, result, termination, plies):
+        game = play_game(1, EngineConfig("a", depth=2), EngineConfig("b", depth=2), fen, None)
+        self.assertEqual((result, termination, plies), (game.result, game.termination, len(game.moves)))
+
+    def test_mixed_backends_and_adjudication(self):
+        white = EngineConfig("a", backend="board", depth=1)
+        black = EngineConfig("b", backend="bitboard", depth=1, evaluation="material")
+        game = play_game(1, white, black, "4k3/8/8/8/8/8/3R4/4K3 w - - 0 1", None, max_plies=6)
+        self.assertEqual(("1/2-1/2", "adjudication", 6), (game.result, game.termination, len(game.moves)))
+
+    def test_time_forfeit(self):
+        game = play_game(1, EngineConfig("a", depth=3), EngineConfig("b", depth=3), "4k3/8/8/8/8/8/3R4/4K3 w - - 0 1",
+                         TimeControl(0))
+        self.assertEqual(("0-1", "time forfeit"), (game.result, game.termination))
+
+    def test_parallel_games(self):
+        engines = (EngineConfig("a", depth=2), EngineConfig("b", depth=2))
+        games = sorted(play_games(engines, [MATE_IN_ONE], 4, workers=2), key=lambda g: g.round)
+        self.assertEqual([1, 2, 3, 4], [g.round for g in games])
+        self.assertTrue(all(g.result == "1-0" for g in games))
+
+    def test_run_match_streams_pgn(self):
+        engines = (EngineConfig("a", depth=2), EngineConfig("b", depth=2))
+        pgn, log = io.StringIO(), io.StringIO()
+        stats = run_match(engines, [MATE_IN_ONE + "\n"], 4, pgn=pgn, log=log, sprt=False)
+
+        # Each engine wins with white
+        self.assertEqual((2, 0, 2), (stats.wins, stats.draws, stats.losses))
+        games = list(read_games(io.StringIO(pgn.getvalue()).readlines()))
+        self.assertEqual(["Ra8#"] * 4, [g.movetext.split()[1] for g in games])
+        self.assertEqual(MATE_IN_ONE, games[0].fen)
+        self.assertEqual(4, len(log.getvalue().splitlines()))
+
+
+class TestMatchStats(unittest.TestCase):
+    def stats(self, wins: int, draws: int, losses: int) -> MatchStats:
+        stats = MatchStats(elo0=0, elo1=10)
+        for score, count in ((WIN, wins), (DRAW, draws), (LOSS, losses)):
+            for _ in range(count):
+                stats.add(score)
+        return stats
+
+    def test_random_openings(self):
+        openings = random_openings(20, seed=1)
+        self.assertEqual(20, len(set(openings)))
+        self.assertEqual(openings, random_openings(20, seed=1))
+        self.assertTrue(all(fen.split()[-1] == "5" for fen in openings))
+
+    def test_depth_only_match_varies_games(self):
+        engines = EngineConfig("a", depth=1), EngineConfig("b", depth=1, evaluation="material")
+        pgn = io.StringIO()
+        stats = run_match(engines, [], 6, pgn=pgn, sprt=False, max_plies=10, seed=2)
+        self.assertEqual(6, stats.games)
+        games = list(read_games(io.StringIO(pgn.getvalue())))
+        played = [(g.headers["FEN"], tuple(map(str, g.moves))) for g in games]
+        # No game repeats another with the same colors
+        for white in ("a", "b"):
+            self.assertEqual(3, len({moves for game, (_, moves) in zip(games, played)
+                                     if game.headers["White"] == white}))
+        # Both games of a pair start from the same opening, with the colors swapped
+        self.assertEqual(3, len({fen for fen, _ in played}))
+
+    def test_elo(self):
+        self.assertEqual(0, self.stats(10, 10, 10).elo()[0])
+        elo, margin = self.stats(60, 20, 20).elo()
+        self.assertAlmostEqual(147.2, elo, places=1)
+        self.assertGreater(margin, 0)
+
+    def test_sprt(self):
+        self.assertIsNone(self.stats(5, 5, 5).decision)
+        self.assertEqual("H1", self.stats(300, 400, 200).decision)
+        self.assertEqual("H0", self.stats(200, 400, 300).decision)
+        # A run of wins is not certainty
+        self.assertIsNone(self.stats(3, 0, 0).decision)
@@ -0,0 +1,92 @@
+import unittest
+
+from chesslib.bitboard import BitBoard
+from chesslib.engine import MATE_SCORE, EXACT, LOWER_BOUND, Searcher
+from chesslib.parallel import SharedTranspositionTable, ParallelSearcher, HEADER_WORDS, _attached_tables, _search_worker
+
+
+class TestSharedTranspositionTable(unittest.TestCase):
+    def setUp(self):
+        self.table = SharedTranspositionTable(16)
+        self.table.new_search()
+
+    def tearDown(self):
+        self.table.close()
+
+    def test_store_and_probe(self):
+        self.table.store(35, 4, -MATE_SCORE + 3, LOWER_BOUND, 1234)
+
+        self.assertEqual((35, 4, -MATE_SCORE + 3, LOWER_BOUND, 1234, 1), self.table.probe(35))
+        self.assertIsNone(self.table.probe(19))
+
+    def test_shared_between_handles(self):
+        other = SharedTranspositionTable(16, self.table.name)
+        other.store(5, 2, 10, EXACT, None)
+
+        self.assertEqual((5, 2, 10, EXACT, None, 1), self.table.probe(5))
+        other.close()
+
+    def test_torn_entry_rejected(self):
+        self.table.store(3, 2, 10, EXACT, 7)
+        self.table.words[HEADER_WORDS + 2 * 3 + 1] ^= 1
+
+        self.assertIsNone(self.table.probe(3))
+
+    def test_deeper_entry_kept_within_search(self):
+        self.table.store(1, 5, 10, EXACT, None)
+        self.table.store(17, 2, 20, EXACT, None)
+        self.assertIsNotNone(self.table.probe(1))
+
+        self.table.new_search()
+        self.table.store(17, 2, 20, EXACT, None)
+        self.assertIsNotNone(self.table.probe(17))
+
+    def test_stop_cleared_by_new_search(self):
+        self.table.stop()
+        self.assertTrue(self.table.stopped())
+
+        self.table.new_search()
+        self.assertFalse(self.table.stopped())
+
+
+class TestParallelSearch(unittest.TestCase):
+    def test_helpers_search_ahead_of_main_worker(self):
+        fen = "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4"
+        table = SharedTranspositionTable(1 << 12)
+        table.new_search()
+        # Stopped from the start, each worker finishes only its first iteration
+        table.stop()
+        try:
+            main = _search_worker(BitBoard(fen), 4, None, table.name, table.size, 0)
+            self.assertEqual(1, main.depth)
+            board = BitBoard(fen)
+            self.assertEqual(1, table.probe(board.hash)[1])
+
+            helper = _search_worker(BitBoard(fen), 4, None, table.name, table.size, 1)
+            self.assertEqual(2, helper.depth)
+            self.assertEqual(2, table.probe(board.hash)[1])
+        finally:
+            _attached_tables.pop(table.name).close()
+            table.close()
+
+    def test_rotated_root_order_keeps_score(self):
+        fen = "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4"
+        scores = []
+        for rotation in (0, 1, 5):
+            searcher = Searcher(BitBoard(fen))
+            searcher.root_rotation = rotation
+            scores.append(searcher.search(3).score)
+        self.assertEqual(1, len(set(scores)))
+
+    def test_finds_mate_in_one(self):
+        board = BitBoard()
+        board.load("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+
+        with ParallelSearcher(workers=2, table_size=1 << 12) as searcher:
+            result = searcher.search(board, depth=3)
+            self.assertEqual("a1a8", str(result.move))
+            self.assertEqual(MATE_SCORE - 1, result.score)
+
+            # The pool and table are reused for the next search
+            result = searcher.search(board, time_limit=0.2)
+            self.assertEqual("a1a8", str(result.move))
@@ -0,0 +1,52 @@
+import unittest
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.perft import REFERENCE_POSITIONS, perft, divide
+
+BOARD_DEPTH = 2
+BITBOARD_DEPTH = 3
+
+
+class TestPerft(unittest.TestCase):
+    @parameterized.expand([(name, fen, counts) for name, (fen, counts) in REFERENCE_POSITIONS.items()])
+    def test_board(self, name, fen, counts):
+        board = Board()
+        board.load(fen)
+
+        self.assertEqual(counts[BOARD_DEPTH - 1], perft(board, BOARD_DEPTH))
+
+    @parameterized.expand([(name, fen, counts) for name, (fen, counts) in REFERENCE_POSITIONS.items()])
+    def test_bitboard(self, name, fen, counts):
+        board = BitBoard()
+        board.load(fen)
+
+        self.assertEqual(counts[BITBOARD_DEPTH - 1], perft(board, BITBOARD_DEPTH))
+
+    def test_divide_matches_perft(self):
+        fen, counts = REFERENCE_POSITIONS["kiwipete"]
+        board = BitBoard()
+        board.load(fen)
+
+        result = divide(board, 2)
+
+        self.assertEqual(counts[0], len(result))
+        self.assertEqual(counts[1], sum(result.values()))
+        self.assertEqual(43, result["e1g1"])
+        self.assertEqual(43, result["e1c1"])
+
+    def test_board_restored_after_perft(self):
+        fen, _ = REFERENCE_POSITIONS["position4"]
+        board = Board()
+        board.load(fen)
+        before = dict(board.state)
+
+        perft(board, 2)
+
+        self.assertEqual(before, board.state)
+        self.assertEqual("kq", board.castling)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.constants import InvalidSAN
+from chesslib.events import print_events
+from chesslib.pgn import Game, SQUARES_BY_NAME, san, parse_san, parse_movetext, read_games, format_game
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+SAN_CASES = [
+    ("pawn_push", "4k3/8/8/8/8/8/4P3/4K3 w - - 0 1", "e2e4", "e4"),
+    ("capture", "4k3/8/8/3p4/8/2N5/8/4K3 w - - 0 1", "c3d5", "Nxd5"),
+    ("file", "4k3/8/8/8/8/8/8/1N2KN2 w - - 0 1", "b1d2", "Nbd2"),
+    ("rank", "4k3/8/8/R7/8/8/8/R3K3 w - - 0 1", "a1a3", "R1a3"),
+    ("square", "4k3/8/8/8/8/Q7/8/Q1Q1K3 w - - 0 1", "a1b2", "Qa1b2"),
+    ("pinned_rival", "4k3/8/8/8/8/8/8/1N2KN1r w - - 0 1", "b1d2", "Nd2"),
+    ("short_castle", "r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1", "e1g1", "O-O"),
+    ("long_castle", "r3k2r/8/8/8/8/8/8/R3K2R b KQkq - 0 1", "e8c8", "O-O-O"),
+    ("en_passant", "4k3/8/8/3pP3/8/8/8/4K3 w - d6 0 1", "e5d6", "exd6"),
+    ("promotion", "4k3/1P6/8/8/8/8/8/4K3 w - - 0 1", "b7b8q", "b8=Q+"),
+    ("under_promotion", "4k3/1P6/8/8/8/8/8/4K3 w - - 0 1", "b7b8n", "b8=N"),
+    ("checkmate", "3k4/8/3K4/8/8/8/8/7Q w - - 0 1", "h1h8", "Qh8#"),
+]
+CASES = [(f"{backend_name}_{name}", backend, *case) for backend_name, backend in BACKENDS
+         for name, *case in SAN_CASES]
+PGN = """[Event "Casual \\"blitz\\""]
+[White "A"]
+[Black "B"]
+
+% escaped line, ignored
+1. e4 {King's pawn; a comment
+spanning lines} e5 2. Nf3 Nc6 (2... d6 3. d4 (3. Bc4) exd4) 3. Bb5 $1 a6 ; to the end of the line
+4. Ba4 Nf6 5. O-O 1-0
+
+[Event "Promotion"]
+[FEN "8/P7/8/8/8/8/6k1/4K3 w - - 0 1"]
+[SetUp "1"]
+
+1. a8=Q+ Kh2 2. Qh8+ Kg3 *
+
+[Event "Illegal"]
+[Result "*"]
+
+1. e4 e5 2. Ke3 *
+"""
+
+
+def move_from(board, text: str):
+    return next(m for m in board.legal_moves() if str(m) == text)
+
+
+class TestSan(unittest.TestCase):
+    @parameterized.expand(CASES)
+    def test_san(self, name, backend, fen, move, expected):
+        board = backend(fen)
+        self.assertEqual(expected, san(board, move_from(board, move)))
+        self.assertEqual(fen, board.fen())
+
+    @parameterized.expand(CASES)
+    def test_parse_san(self, name, backend, fen, move, text):
+        board = backend(fen)
+        self.assertEqual(move_from(board, move), parse_san(board, text))
+
+    @parameterized.expand([
+        ("annotated", "e2e4", "e4!?"),
+        ("zero_castling", "e1g1", "0-0"),
+        ("redundant_origin", "h1h3", "Rh1h3"),
+        ("check_suffix", "e2e4", "e4+"),
+    ])
+    def test_parse_variants(self, name, move, text):
+        board = Board("4k3/8/8/8/8/8/4P3/4K2R w K - 0 1")
+        self.assertEqual(move_from(board, move), parse_san(board, text))
+
+    @parameterized.expand([
+        ("illegal", "e5"),
+        ("ambiguous", "Nd2"),
+        ("unreadable", "Zz9"),
+        ("no_castling", "O-O-O"),
+    ])
+    def test_invalid_san(self, name, text):
+        board = Board("4k3/8/8/8/8/8/8/1N2KN2 w - - 0 1")
+        with self.assertRaises(InvalidSAN):
+            parse_san(board, text)
+
+    @parameterized.expand(BACKENDS)
+    def test_move_prints_san(self, name, backend):
+        board = backend("4k3/8/8/8/8/8/8/1N2KN2 w - - 0 1")
+        print_events(board)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            board.move(SQUARES_BY_NAME["b1"], SQUARES_BY_NAME["d2"])
+        self.assertEqual("move: Nbd2\n", output.getvalue())
+
+
+class TestPgn(unittest.TestCase):
+    def test_parse_movetext(self):
+        moves, termination = parse_movetext("1. e4 {a (comment)} e5 (1... c5 {x} 2. Nf3) 2. Nf3 $2 Nc6 1/2-1/2")
+        self.assertEqual(["e4", "e5", "Nf3", "Nc6"], moves)
+        self.assertEqual("1/2-1/2", termination)
+
+    def test_read_games(self):
+        games = list(read_games(io.StringIO(PGN)))
+        self.assertEqual(3, len(games))
+
+        first, promotion, illegal = games
+        self.assertEqual('Casual "blitz"', first.headers["Event"])
+        self.assertEqual("1-0", first.result)
+        self.assertEqual(["e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6", "b5a4", "g8f6", "e1g1"],
+                         [str(m) for m in first.moves])
+        self.assertIsNone(first.error)
+
+        self.assertEqual(["a7a8q", "g2h2", "a8h8", "h2g3"], [str(m) for m in promotion.moves])
+        self.assertEqual("*", promotion.result)
+
+        self.assertEqual(["e2e4", "e7e5"], [str(m) for m in illegal.moves])
+        self.assertEqual("illegal move 'Ke3'", illegal.error)
+
+    def test_braces_in_comments(self):
+        text = ('[Event "a"]\n\n1. e4 ; a { in a comment\ne5 {a ; and { in a brace comment}\n2. Nf3 1-0\n\n'
+                '[Event "b"]\n\n1. d4 {multi\n[not a tag]\nline} d5 *\n\n[Event "c"]\n\n1. c4 *\n')
+        games = list(read_games(io.StringIO(text)))
+        self.assertEqual(["a", "b", "c"], [g.headers["Event"] for g in games])
+        self.assertEqual([["e2e4", "e7e5", "g1f3"], ["d2d4", "d7d5"], ["c2c4"]],
+                         [[str(m) for m in g.moves] for g in games])
+
+    def test_headers_only(self):
+        games = list(read_games(io.StringIO(PGN), parse_moves=False))
+        self.assertEqual([[], [], []], [g.moves for g in games])
+        self.assertEqual(["1-0", "*", "*"], [g.result for g in games])
+
+    def test_streams(self):
+        """A game is read as soon as the next one starts, without reading further"""
+        def lines():
+            yield from io.StringIO(PGN).readlines()[:10]
+            raise AssertionError("read past the second game's tags")
+
+        games = read_games(lines())
+        self.assertEqual(9, len(next(games).moves))
+
+    @parameterized.expand(BACKENDS)
+    def test_round_trip(self, name, backend):
+        for game in read_games(io.StringIO(PGN), backend):
+            game.error = None
+            text = format_game(game, backend)
+            [copy] = read_games(io.StringIO(text), backend)
+            self.assertEqual(game.moves, copy.moves)
+            self.assertEqual(game.headers, {k: v for k, v in copy.headers.items() if v not in ("?", "????.??.??")})
+            self.assertIsNone(copy.error)
+
+    def test_format_game(self):
+        board = Board("4k3/8/8/8/8/8/8/R3K3 b - - 0 30")
+        game = Game({"Result": "*", "Annotator": "x", "FEN": board.fen(), "SetUp": "1"},
+                    [move_from(board, "e8d7")])
+        self.assertEqual('[Event "?"]\n[Site "?"]\n[Date "????.??.??"]\n[Round "?"]\n[White "?"]\n[Black "?"]\n'
+                         '[Result "*"]\n[Annotator "x"]\n[FEN "4k3/8/8/8/8/8/8/R3K3 b - - 0 30"]\n[SetUp "1"]\n\n'
+                         "30... Kd7 *\n", format_game(game))
@@ -0,0 +1,83 @@
+import unittest
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.engine import search, TranspositionTable, MATE_SCORE, EXACT
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+
+
+class TestSearch(unittest.TestCase):
+    @parameterized.expand(BACKENDS)
+    def test_finds_mate_in_one(self, name, backend):
+        board = backend()
+        board.load("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+
+        result = search(board, depth=3)
+
+        self.assertEqual("a1a8", str(result.move))
+        self.assertEqual(MATE_SCORE - 1, result.score)
+
+    @parameterized.expand(BACKENDS)
+    def test_captures_hanging_queen(self, name, backend):
+        board = backend()
+        board.load("4k3/8/8/3q4/8/8/3R4/4K3 w - - 0 1")
+
+        result = search(board, depth=2)
+
+        self.assertEqual("d2d5", str(result.move))
+
+    @parameterized.expand(BACKENDS)
+    def test_board_restored(self, name, backend):
+        board = backend()
+        board.load("r3k2r/pp3ppp/8/3p4/4P3/8/PP3PPP/R3K2R w KQkq - 0 1")
+        before = board.hash
+
+        search(board, depth=2)
+
+        self.assertEqual(before, board.hash)
+        self.assertEqual(0, len(board.move_stack))
+
+    def test_time_limit(self):
+        board = BitBoard()
+
+        result = search(board, time_limit=0.2)
+
+        self.assertIsNotNone(result.move)
+        self.assertGreaterEqual(result.depth, 1)
+        self.assertEqual(0, len(board.move_stack))
+
+    def test_stalemate_has_no_move(self):
+        board = BitBoard()
+        board.load("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")
+
+        result = search(board, depth=2)
+
+        self.assertIsNone(result.move)
+        self.assertEqual(0, result.score)
+
+
+class TestTranspositionTable(unittest.TestCase):
+    def test_deeper_result_kept(self):
+        table = TranspositionTable(16)
+
+        table.store(3, 5, 10, EXACT, None)
+        table.store(19, 2, 20, EXACT, None)
+
+        self.assertEqual(10, table.probe(3)[2])
+        self.assertIsNone(table.probe(19))
+
+    def test_stale_result_replaced(self):
+        table = TranspositionTable(16)
+
+        table.store(3, 5, 10, EXACT, None)
+        table.new_search()
+        table.store(19, 2, 20, EXACT, None)
+
+        self.assertIsNone(table.probe(3))
+        self.assertEqual(20, table.probe(19)[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
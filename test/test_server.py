@@ -0,0 +1,169 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from chesslib.server import GameServer, MAX_LINE
+
+
+class Client:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def request(self, **request) -> dict:
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+class TestGameServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = GameServer(max_games=3)
+        self.listener = await self.server.serve_tcp()
+        self.client = Client(*await asyncio.open_connection(*self.listener.sockets[0].getsockname()[:2]))
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.listener.close()
+        await self.listener.wait_closed()
+
+    async def test_play_to_checkmate(self):
+        reply = await self.client.request(op="new", id="a")
+        self.assertEqual({"ok": True, "id": "a", "game": 1,
+                          "fen": "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"}, reply)
+
+        for move, expected in [("f2f3", "f3"), ("e5", "e5"), ("g4", "g4"), ("d8h4", "Qh4#")]:
+            reply = await self.client.request(op="move", game=1, move=move)
+            self.assertTrue(reply["ok"], reply)
+            self.assertEqual(expected, reply["san"])
+
+        status = await self.client.request(op="status", game=1)
+        self.assertEqual({"ok": True, "fen": "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3",
+                          "turn": "white", "check": True, "checkmate": True, "stalemate": False,
+                          "termination": "checkmate"}, status)
+        self.assertEqual({"ok": True, "moves": []}, await self.client.request(op="legal_moves", game=1))
+
+    async def test_load_and_legal_moves(self):
+        await self.client.request(op="new")
+        reply = await self.client.request(op="load", game=1, fen="4k3/8/8/8/8/8/8/4K2R w K - 0 1")
+        self.assertTrue(reply["ok"])
+        moves = (await self.client.request(op="legal_moves", game=1))["moves"]
+        self.assertIn("e1g1", moves)
+        self.assertEqual(15, len(moves))
+
+    async def test_errors(self):
+        await self.client.request(op="new")
+        for request, error in [
+            ({"op": "fly"}, "unknown op 'fly'"),
+            ({"op": "status", "game": 7}, "no game 7"),
+            ({"op": "move", "game": 1}, "missing move"),
+            ({"op": "move", "game": 1, "move": "e5"}, "illegal move 'e5'"),
+            ({"op": "load", "game": 1, "fen": "8/8 w"}, "invalid FEN: expected 8 ranks, got 2"),
+            ({"op": "new", "fen": 123}, "fen must be a string, not 123"),
+            ({"op": "load", "game": 1, "fen": ["8/8"]}, "fen must be a string, not ['8/8']"),
+            ({"op": ["x"]}, "unknown op ['x']"),
+            ({"op": "move", "game": [1], "move": "e4"}, "game must be an integer, not [1]"),
+            ({"op": "status", "game": "1"}, "game must be an integer, not '1'"),
+            ({"op": "close", "game": True}, "game must be an integer, not True"),
+        ]:
+            self.assertEqual({"ok": False, "error": error}, await self.client.request(**request))
+
+        self.client.writer.write(b"not json\n")
+        self.assertEqual({"ok": False, "error": "request is not JSON"}, json.loads(await self.client.reader.readline()))
+        # The game is still usable after failed requests
+        self.assertTrue((await self.client.request(op="move", game=1, move="e4"))["ok"])
+
+    async def test_unexpected_errors_are_replied_to(self):
+        async def fail(request):
+            raise KeyError("boom")
+        self.server.operations["fail"] = fail
+        self.assertEqual({"ok": False, "error": "internal error: KeyError: 'boom'", "id": 3},
+                         await self.client.request(op="fail", id=3))
+        # The connection survives
+        self.assertTrue((await self.client.request(op="new"))["ok"])
+
+    async def test_status_reports_draws(self):
+        await self.client.request(op="new")
+        for move in ["Nf3", "Nf6", "Ng1", "Ng8"] * 2:
+            await self.client.request(op="move", game=1, move=move)
+        status = await self.client.request(op="status", game=1)
+        self.assertEqual((False, False, "threefold repetition"),
+                         (status["checkmate"], status["stalemate"], status["termination"]))
+
+        await self.client.request(op="load", game=1, fen="8/8/8/4k3/8/8/8/4K2N w - - 0 1")
+        self.assertEqual("insufficient material", (await self.client.request(op="status", game=1))["termination"])
+        await self.client.request(op="load", game=1)
+        self.assertIsNone((await self.client.request(op="status", game=1))["termination"])
+
+    async def test_game_limit_and_close(self):
+        for game in range(1, 4):
+            self.assertEqual(game, (await self.client.request(op="new"))["game"])
+        self.assertEqual({"ok": False, "error": "too many games"}, await self.client.request(op="new"))
+
+        self.assertEqual({"ok": True}, await self.client.request(op="close", game=2))
+        self.assertEqual(4, (await self.client.request(op="new"))["game"])
+        self.assertFalse((await self.client.request(op="status", game=2))["ok"])
+
+    async def test_games_shared_between_connections(self):
+        await self.client.request(op="new")
+        other = Client(*await asyncio.open_connection(*self.listener.sockets[0].getsockname()[:2]))
+        await other.request(op="move", game=1, move="d4")
+        self.assertEqual("black", (await self.client.request(op="status", game=1))["turn"])
+        await other.close()
+
+    async def test_pipelined_replies_in_order(self):
+        await self.client.request(op="new")
+        self.client.writer.write(b"".join(json.dumps({"op": "status", "game": 1, "id": i}).encode() + b"\n"
+                                          for i in range(50)))
+        replies = [json.loads(await self.client.reader.readline()) for _ in range(50)]
+        self.assertEqual(list(range(50)), [r["id"] for r in replies])
+
+    async def test_overlong_line_disconnects(self):
+        self.client.writer.write(b"x" * (MAX_LINE + 10) + b"\n")
+        reply = json.loads(await self.client.reader.readline())
+        self.assertFalse(reply["ok"])
+        self.assertEqual(b"", await self.client.reader.readline())
+
+
+class TestUnixServer(unittest.IsolatedAsyncioTestCase):
+    async def test_unix_socket_with_executor(self):
+        with tempfile.TemporaryDirectory() as directory, ThreadPoolExecutor(2) as executor:
+            path = os.path.join(directory, "chess.sock")
+            listener = await GameServer(executor=executor).serve_unix(path)
+            client = Client(*await asyncio.open_unix_connection(path))
+
+            await client.request(op="new")
+            reply = await client.request(op="move", game=1, move="Nf3")
+            self.assertEqual("g1f3", reply["move"])
+
+            await client.close()
+            listener.close()
+            await listener.wait_closed()
+
+    async def test_game_limit_with_executor(self):
+        with ThreadPoolExecutor(4) as executor:
+            server = GameServer(max_games=2, executor=executor)
+            replies = await asyncio.gather(*(server.handle_request({"op": "new"}) for _ in range(6)))
+            self.assertEqual(2, sum(r["ok"] for r in replies))
+            self.assertEqual(2, len(server.games))
+            # A game whose position fails to load gives its slot back
+            await server.handle_request({"op": "close", "game": 1})
+            self.assertEqual("invalid FEN: expected 8 ranks, got 2",
+                             (await server.handle_request({"op": "new", "fen": "8/8 w"}))["error"])
+            self.assertEqual(1, len(server.games))
+
+    async def test_process_pool_executor(self):
+        with ProcessPoolExecutor(1) as executor:
+            server = GameServer(executor=executor)
+            await server.handle_request({"op": "new"})
+            self.assertTrue((await server.handle_request({"op": "move", "game": 1, "move": "e4"}))["ok"])
+            self.assertEqual("black", (await server.handle_request({"op": "status", "game": 1}))["turn"])
+            await server.handle_request({"op": "load", "game": 1, "fen": "4k3/8/8/8/8/8/8/4K2R w K - 0 1"})
+            self.assertEqual(15, len((await server.handle_request({"op": "legal_moves", "game": 1}))["moves"]))
@@ -0,0 +1,117 @@
+import os
+import random
+import tempfile
+import unittest
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.tablebase import Tablebase, generate, save, split_material, WIN, LOSS, DRAW, HEADER, MAGIC
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+
+
+class TestTablebase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Generating a three-piece table takes a few seconds, so it is done once for every test
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.tables = generate("KQK")
+        save("KQK", cls.tables["KQK"], cls.directory.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.tablebase = Tablebase(self.directory.name)
+
+    def tearDown(self):
+        self.tablebase.close()
+
+    @parameterized.expand([
+        ("KQK", ("KQ", "K")),
+        ("kbnk", ("KBN", "K")),
+        ("KNBK", ("KBN", "K")),
+        ("KPKR", ("KP", "KR")),
+    ])
+    def test_split_material(self, material, expected):
+        self.assertEqual(expected, split_material(material))
+
+    @parameterized.expand([("KQ",), ("KQKK",), ("QKK",), ("KXK",)])
+    def test_bad_material(self, material):
+        with self.assertRaises(ValueError):
+            split_material(material)
+
+    def test_longest_mate(self):
+        # King and queen mate in at most 10 moves, so black to move loses in at most 20 plies
+        values = self.tables["KQK"]
+        self.assertEqual(21, max(v for v in values if v != 255))
+
+    def test_file_size(self):
+        path = os.path.join(self.directory.name, "KQK.tb")
+        with open(path, "rb") as f:
+            self.assertEqual(MAGIC, f.read(4))
+        # Both sides to move, the white king on one of 10 squares, 64 squares for each of the other two pieces
+        self.assertEqual(HEADER.size + 2 * 10 * 64 * 64, os.path.getsize(path))
+
+    @parameterized.expand([
+        ("mate_in_one", "3k4/8/3K4/8/8/8/8/7Q w - - 0 1", (WIN, 1)),
+        ("checkmated", "3k3Q/8/3K4/8/8/8/8/8 b - - 0 1", (LOSS, 0)),
+        ("stalemate", "k7/2Q5/1K6/8/8/8/8/8 b - - 0 1", (DRAW, 0)),
+        ("queen_hangs", "8/8/8/8/8/8/1q6/2K4k w - - 0 1", (DRAW, 0)),
+        ("black_queen", "8/8/8/8/8/8/1k6/q6K w - - 0 1", (LOSS, 14)),
+        ("lone_kings", "8/8/3k4/8/8/3K4/8/8 w - - 0 1", (DRAW, 0)),
+    ])
+    def test_probe(self, name, fen, expected):
+        for _, backend in BACKENDS:
+            self.assertEqual(expected, self.tablebase.probe(backend(fen)), backend)
+
+    @parameterized.expand([
+        ("castling_rights", "4k3/8/8/8/8/8/8/Q3K2R w K - 0 1"),
+        ("no_table", "4k3/8/8/8/8/8/8/R3K3 w - - 0 1"),
+        ("illegal", "3k4/8/8/8/8/8/8/3QK3 w - - 0 1"),
+    ])
+    def test_not_covered(self, name, fen):
+        self.assertIsNone(self.tablebase.probe(Board(fen)))
+
+    @parameterized.expand(BACKENDS)
+    def test_agrees_with_successors(self, name, backend):
+        """A win is one ply longer than the quickest loss it can force; a loss one longer than the slowest win"""
+        rng = random.Random(1)
+        board = backend()
+        checked = 0
+        while checked < 100:
+            squares = rng.sample(range(64), 3)
+            symbols = [None] * 64
+            for square, symbol in zip(squares, "KkQ"):
+                symbols[square] = symbol
+            ranks = ["".join(s or "1" for s in symbols[row:row + 8]) for row in range(0, 64, 8)]
+            board.load(f"{'/'.join(ranks)} {rng.choice('wb')} - - 0 1")
+            result = self.tablebase.probe(board)
+            if result is None:
+                continue
+
+            children = []
+            for move in board.legal_moves():
+                board.push(move)
+                children.append(self.tablebase.probe(board))
+                board.pop()
+            if not children:
+                expected = (LOSS, 0) if board.is_checkmate(board.current_player) else (DRAW, 0)
+            elif any(outcome == LOSS for outcome, _ in children):
+                expected = (WIN, min(d for outcome, d in children if outcome == LOSS) + 1)
+            elif any(outcome == DRAW for outcome, _ in children):
+                expected = (DRAW, 0)
+            else:
+                expected = (LOSS, max(d for _, d in children) + 1)
+            self.assertEqual(expected, result, board.fen())
+            checked += 1
+
+    def test_best_move_mates(self):
+        board = BitBoard("8/8/8/8/8/2k5/8/K6Q w - - 0 1")
+        outcome, distance = self.tablebase.probe(board)
+        self.assertEqual(WIN, outcome)
+        for _ in range(distance):
+            board.push(self.tablebase.best_move(board))
+        self.assertTrue(board.is_checkmate(board.current_player))
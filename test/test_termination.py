@@ -0,0 +1,109 @@
+import unittest
+from parameterized import parameterized
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.events import Event
+from chesslib.pgn import SQUARES_BY_NAME
+from chesslib.termination import Termination
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+# Both knights out and back, twice, repeats the starting position three times
+KNIGHT_SHUFFLE = [("g1", "f3"), ("g8", "f6"), ("f3", "g1"), ("f6", "g8")] * 2
+
+
+def play(board, moves: list[tuple[str, str]]) -> list[bool]:
+    return [board.move(SQUARES_BY_NAME[start], SQUARES_BY_NAME[end]) for start, end in moves]
+
+
+class TestTermination(unittest.TestCase):
+    @parameterized.expand([
+        (f"{backend_name}_{name}", backend, fen, termination) for backend_name, backend in BACKENDS
+        for name, fen, termination in [
+            ("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", None),
+            ("checkmate", "7k/6Q1/6K1/8/8/8/8/8 b - - 0 1", Termination.CHECKMATE),
+            ("stalemate", "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", Termination.STALEMATE),
+            ("fifty_moves", "4k3/8/8/8/8/8/3R4/4K3 b - - 100 80", Termination.FIFTY_MOVES),
+            ("ninety_nine_plies", "4k3/8/8/8/8/8/3R4/4K3 b - - 99 80", None),
+            ("mate_on_the_hundredth_ply", "7k/6Q1/6K1/8/8/8/8/8 b - - 100 80", Termination.CHECKMATE),
+            ("bare_kings", "8/8/8/4k3/8/8/8/4K3 w - - 0 1", Termination.INSUFFICIENT_MATERIAL),
+            ("lone_knight", "8/8/8/4k3/8/8/8/4K2N w - - 0 1", Termination.INSUFFICIENT_MATERIAL),
+            ("same_colored_bishops", "8/8/2b5/4k3/8/8/8/4KB2 w - - 0 1", Termination.INSUFFICIENT_MATERIAL),
+            ("opposite_colored_bishops", "8/8/3b4/4k3/8/8/8/4KB2 w - - 0 1", None),
+            ("two_knights", "8/8/8/4k3/8/8/8/3NKN2 w - - 0 1", None),
+            ("lone_pawn", "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1", None),
+        ]
+    ])
+    def test_termination(self, name, backend, fen, termination):
+        board = backend(fen)
+        self.assertEqual(termination, board.termination())
+        self.assertEqual(termination is not None, board.is_game_over())
+        self.assertEqual(termination is not None and termination != Termination.CHECKMATE, board.is_draw())
+
+    @parameterized.expand(BACKENDS)
+    def test_threefold_repetition(self, name, backend):
+        board = backend()
+        counts = []
+        for start, end in KNIGHT_SHUFFLE:
+            play(board, [(start, end)])
+            counts.append(board.repetitions())
+        self.assertEqual([1, 1, 1, 2, 2, 2, 2, 3], counts)
+        self.assertEqual(Termination.THREEFOLD_REPETITION, board.termination())
+        self.assertEqual(8, len(board.positions))
+
+        board.pop()
+        self.assertIsNone(board.termination())
+        self.assertEqual(7, len(board.positions))
+
+    @parameterized.expand(BACKENDS)
+    def test_pop_then_transposition(self, name, backend):
+        board = backend()
+        play(board, KNIGHT_SHUFFLE)
+        self.assertEqual(Termination.THREEFOLD_REPETITION, board.termination())
+        for _ in KNIGHT_SHUFFLE:
+            board.pop()
+        # Back to the start after as many plies, but the starting position has only occurred twice
+        play(board, [("b1", "c3"), ("g8", "f6"), ("c3", "e4"), ("f6", "g8"),
+                     ("e4", "c3"), ("b8", "c6"), ("c3", "b1"), ("c6", "b8")])
+        self.assertEqual(2, board.repetitions())
+        self.assertIsNone(board.termination())
+
+    @parameterized.expand(BACKENDS)
+    def test_repetitions_after_irreversible_moves(self, name, backend):
+        board = backend()
+        play(board, KNIGHT_SHUFFLE[:4] + [("e2", "e3"), ("e7", "e6")])
+        self.assertEqual(1, board.repetitions())
+        play(board, KNIGHT_SHUFFLE)
+        self.assertEqual(3, board.repetitions())
+        self.assertEqual(8, board.halfmove_clock)
+
+    @parameterized.expand(BACKENDS)
+    def test_load_resets_history(self, name, backend):
+        board = backend()
+        play(board, KNIGHT_SHUFFLE)
+        board.load(board.fen())
+        self.assertEqual([], board.positions)
+        self.assertEqual(1, board.repetitions())
+        self.assertIsNone(board.termination())
+
+    def test_replacing_state_resets_status(self):
+        board = Board()
+        self.assertIsNone(board.termination())
+        board.state = {key: piece for key, piece in board.state.items() if piece.abbreviation == "K"}
+        self.assertEqual(Termination.INSUFFICIENT_MATERIAL, board.termination())
+
+    @parameterized.expand(BACKENDS)
+    def test_draw_event(self, name, backend):
+        board = backend()
+        draws = []
+        board.subscribe(Event.DRAW, lambda b, termination: draws.append(termination))
+        play(board, KNIGHT_SHUFFLE)
+        self.assertEqual([Termination.THREEFOLD_REPETITION], draws)
+
+        board.load("8/8/8/4k3/8/8/3p4/4K3 w - - 0 1")
+        play(board, [("e1", "d2")])
+        self.assertEqual([Termination.THREEFOLD_REPETITION, Termination.INSUFFICIENT_MATERIAL], draws)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import random
+import unittest
+from parameterized import parameterized
+
+import numpy as np
+
+from chesslib.board import Board
+from chesslib.bitboard import BitBoard
+from chesslib.perft import REFERENCE_POSITIONS
+from chesslib.utils import Color, SQUARES
+from chesslib.vectorized import Positions, analyse, attack_masks, in_check, legal_move_counts
+
+BACKENDS = [("Board", Board), ("BitBoard", BitBoard)]
+SPECIAL_POSITIONS = [
+    "7k/5Q2/6K1/8/8/8/8/8 b - - 0 1",
+    "7k/6Q1/6K1/8/8/8/8/8 b - - 0 1",
+    "rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3",
+    # The en passant capture would uncover a rook's attack on the king along the rank
+    "8/8/8/KPp4r/8/8/8/7k w - c6 0 2",
+    "4k3/8/8/8/8/8/8/R3K2R w KQ - 0 1",
+    "r3k2r/8/8/8/8/8/8/4K3 b kq - 0 1",
+    "4k3/8/8/8/8/8/5r2/R3K2R w KQ - 0 1",
+    "4k3/1P6/8/8/8/8/8/4K3 w - - 0 1",
+]
+
+
+def corpus(seed: int = 7, games: int = 8) -> list[str]:
+    """The reference and special positions, and positions reached by random moves from the reference ones"""
+    rng = random.Random(seed)
+    fens = [fen for fen, _ in REFERENCE_POSITIONS.values()] + SPECIAL_POSITIONS
+    for fen, _ in REFERENCE_POSITIONS.values():
+        for _ in range(games):
+            board = BitBoard(fen)
+            for _ in range(rng.randint(1, 80)):
+                moves = board.legal_moves()
+                if not moves:
+                    break
+                board.push(rng.choice(moves))
+            fens.append(board.fen())
+    return fens
+
+
+class TestVectorized(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.fens = corpus()
+        cls.positions = Positions.from_fens(cls.fens)
+
+    @parameterized.expand(BACKENDS)
+    def test_agrees_with_board(self, name, backend):
+        results = analyse(self.positions)
+        for i, fen in enumerate(self.fens):
+            board = backend(fen)
+            player = board.current_player
+            moves = len(board.legal_moves())
+            self.assertEqual((board.check_validator(player), moves, board.is_checkmate(player)),
+                             (bool(results["check"][i]), int(results["legal_moves"][i]),
+                              bool(results["checkmate"][i])), fen)
+            self.assertEqual(not board.check_validator(player) and moves == 0, bool(results["stalemate"][i]), fen)
+
+    def test_special_positions(self):
+        positions = Positions.from_fens(SPECIAL_POSITIONS)
+        results = analyse(positions)
+        self.assertEqual([False, True, True, False, False, False, False, False], results["check"].tolist())
+        self.assertEqual([True, False, False, False, False, False, False, False], results["stalemate"].tolist())
+        self.assertEqual([False, True, True, False, False, False, False, False], results["checkmate"].tolist())
+        self.assertEqual([0, 0, 0, 4, 26, 26, 22, 9], legal_move_counts(positions).tolist())
+
+    def test_attack_masks(self):
+        masks = attack_masks(self.positions)
+        self.assertEqual((len(self.fens), 2), masks.shape)
+        for i, fen in enumerate(self.fens[:20]):
+            board = BitBoard(fen)
+            for color in Color:
+                expected = sum(1 << square.index for square in SQUARES if board.is_attacked(square, color))
+                self.assertEqual(expected, int(masks[i, color.value]), fen)
+
+    def test_from_boards(self):
+        boards = [Board(fen) for fen in self.fens[:10]] + [BitBoard(fen) for fen in self.fens[:10]]
+        positions = Positions.from_boards(boards)
+        self.assertEqual(20, len(positions))
+        np.testing.assert_array_equal(positions.pieces[:10], positions.pieces[10:])
+        np.testing.assert_array_equal(in_check(positions)[:10], in_check(self.positions)[:10])
+
+    def test_empty(self):
+        positions = Positions.from_fens([])
+        self.assertEqual(0, len(positions))
+        self.assertEqual([], legal_move_counts(positions).tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()